@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Location, DocumentType, SystemLog
+from .models import Location, DocumentType, SystemLog, DuplicateCandidate
 
 
 @admin.register(Location)
@@ -28,4 +28,11 @@ class SystemLogAdmin(admin.ModelAdmin):
 from django.contrib import admin
 from .models import UserProfile
 
-admin.site.register(UserProfile)
\ No newline at end of file
+admin.site.register(UserProfile)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ['entity', 'record_a', 'record_b', 'score', 'matched_on', 'status', 'created_at']
+    list_filter = ['entity', 'status']
+    readonly_fields = ['created_at', 'updated_at']
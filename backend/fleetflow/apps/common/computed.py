@@ -0,0 +1,74 @@
+"""
+Computed fields declared once as database expressions.
+
+A model's queryset lists its computed fields in `computed_fields`, mapping a
+name to a function that builds the expression (so date-relative conditions
+are evaluated per query). `with_computed()` annotates them, ComputedField
+serializes the annotation, and ComputedFilter filters on it, so list
+endpoints never call model methods per row.
+
+Annotations are stored under a prefixed alias so they don't shadow the model
+methods of the same name on the fetched instances.
+"""
+import django_filters
+from django.db import models
+from rest_framework import serializers
+
+ANNOTATION_PREFIX = 'computed_'
+
+
+def annotation_name(name):
+    """Alias a computed field is annotated under"""
+    return f'{ANNOTATION_PREFIX}{name}'
+
+
+class ComputedFieldsQuerySet(models.QuerySet):
+    """
+    QuerySet base for models with computed fields.
+
+    Subclasses set `computed_fields = {'name': lambda: expression}`.
+    """
+    computed_fields = {}
+
+    def with_computed(self, *names):
+        """Annotate the named computed fields, or all of them"""
+        names = names or tuple(self.computed_fields)
+        annotations = {
+            annotation_name(name): self.computed_fields[name]()
+            for name in names
+            if annotation_name(name) not in self.query.annotations
+        }
+        return self.annotate(**annotations) if annotations else self
+
+    def filter_computed(self, **conditions):
+        """Filter on computed fields by name, e.g. filter_computed(is_available=True)"""
+        queryset = self.with_computed(*conditions)
+        return queryset.filter(**{annotation_name(name): value for name, value in conditions.items()})
+
+
+def flag(condition):
+    """Boolean computed field from a Q condition"""
+    return models.ExpressionWrapper(condition, output_field=models.BooleanField())
+
+
+class ComputedField(serializers.ReadOnlyField):
+    """
+    Serializes a computed field from its annotation, falling back to the model
+    method of the same name for instances that weren't fetched with
+    `with_computed()` (e.g. the response to a create or update).
+    """
+
+    def get_attribute(self, instance):
+        annotation = annotation_name(self.source)
+        if hasattr(instance, annotation):
+            return getattr(instance, annotation)
+        return super().get_attribute(instance)
+
+
+class ComputedFilter(django_filters.BooleanFilter):
+    """Boolean filter on a computed field, e.g. ?is_available=true"""
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        return qs.filter_computed(**{self.field_name: value})
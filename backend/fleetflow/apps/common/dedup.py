@@ -0,0 +1,187 @@
+"""
+Duplicate detection for drivers and locations.
+
+Comparing every record with every other is quadratic, so candidates are
+blocked first: records are grouped by normalized keys (phone digits, license
+number, canonical email, city and postal code) and only pairs sharing a
+block are scored, with pg_trgm similarity computed set-based in one query
+per entity. Oversized blocks (placeholder phone numbers and the like) are
+skipped. Pairs above the threshold land in DuplicateCandidate for review.
+
+Merging reassigns every foreign key pointing at the duplicate to the record
+kept, in one UPDATE per relation, and deletes the duplicate. Rows that would
+then break a uniqueness rule on the referencing model (unique_together, a
+field-based UniqueConstraint, a unique foreign key) are dropped first; a
+relation covered by an expression-based UniqueConstraint can't be checked
+that way, so the merge is refused before anything is written.
+"""
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q, UniqueConstraint
+
+from .models import DuplicateCandidate
+
+MAX_BLOCK_SIZE = 50
+SCORE_THRESHOLD = 0.5
+
+ENTITIES = {
+    'driver': {
+        'model': 'drivers.Driver',
+        'table': 'drivers',
+        'blocks': {
+            'phone': "right(regexp_replace(phone_number, '[^0-9]', '', 'g'), 9)",
+            'license': "upper(regexp_replace(license_number, '[^A-Za-z0-9]', '', 'g'))",
+            'email': (
+                "regexp_replace(lower(split_part(email, '@', 1)), '[.]|[+].*', '', 'g')"
+                " || '@' || lower(split_part(email, '@', 2))"
+            ),
+        },
+        'score': "0.7 * similarity(lower(a.name), lower(b.name)) + 0.3 * similarity(lower(a.email), lower(b.email))",
+    },
+    'location': {
+        'model': 'common.Location',
+        'table': 'locations',
+        'blocks': {
+            'postal_code': "lower(trim(city)) || '|' || upper(regexp_replace(postal_code, '\\s', '', 'g'))",
+        },
+        'score': "0.7 * similarity(lower(a.name), lower(b.name)) + 0.3 * similarity(lower(a.address), lower(b.address))",
+    },
+}
+
+BLOCK_SQL = """
+SELECT keyed_a.id AS record_a, keyed_b.id AS record_b, %(block_{name})s AS block
+FROM (
+    SELECT id, {key} AS block_key, COUNT(*) OVER (PARTITION BY {key}) AS block_size
+    FROM {table}
+) keyed_a
+JOIN (
+    SELECT id, {key} AS block_key
+    FROM {table}
+) keyed_b ON keyed_b.block_key = keyed_a.block_key AND keyed_b.id > keyed_a.id
+WHERE keyed_a.block_key <> '' AND keyed_a.block_size <= %(max_block_size)s
+"""
+
+FIND_SQL = """
+WITH pairs AS (
+    {blocks}
+),
+scored AS (
+    SELECT p.record_a, p.record_b, array_agg(DISTINCT p.block ORDER BY p.block) AS matched_on,
+           MAX({score}) AS score
+    FROM pairs p
+    JOIN {table} a ON a.id = p.record_a
+    JOIN {table} b ON b.id = p.record_b
+    GROUP BY p.record_a, p.record_b
+)
+INSERT INTO duplicate_candidates (entity, record_a, record_b, score, matched_on, status, created_at, updated_at)
+SELECT %(entity)s, record_a, record_b, score, matched_on, 'pending', NOW(), NOW()
+FROM scored
+WHERE score >= %(threshold)s
+ON CONFLICT (entity, record_a, record_b) DO UPDATE SET
+    score = EXCLUDED.score,
+    matched_on = EXCLUDED.matched_on,
+    updated_at = NOW()
+WHERE duplicate_candidates.status = 'pending'
+"""
+
+
+def find_candidates(entity):
+    """Block, score and store candidate pairs for an entity. Returns the number written."""
+    config = ENTITIES[entity]
+    params = {'entity': entity, 'threshold': SCORE_THRESHOLD, 'max_block_size': MAX_BLOCK_SIZE}
+    blocks = []
+    for name, key in config['blocks'].items():
+        params[f'block_{name}'] = name
+        blocks.append(BLOCK_SQL.format(name=name, key=key, table=config['table']))
+    sql = FIND_SQL.format(blocks='UNION ALL'.join(blocks), score=config['score'], table=config['table'])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _unique_sets(relation):
+    """
+    (fields, condition) of each uniqueness rule on the referencing model that
+    includes the relation's field. Raises ValueError for rules that can't be
+    checked field by field.
+    """
+    model = relation.related_model
+    field = relation.field.name
+    unique_sets = [(tuple(fields), None) for fields in model._meta.unique_together if field in fields]
+    if relation.field.unique:
+        unique_sets.append(((field,), None))
+    for constraint in model._meta.constraints:
+        if not isinstance(constraint, UniqueConstraint):
+            continue
+        if constraint.expressions:
+            raise ValueError(
+                f"Can't merge through {model._meta.label}.{field}: "
+                f"unique constraint {constraint.name} is expression-based"
+            )
+        if field in constraint.fields:
+            unique_sets.append((tuple(constraint.fields), constraint.condition))
+    return unique_sets
+
+
+def _reassign(relation, duplicate_id, keep_id):
+    """Point one relation's rows at the kept record, dropping rows that would clash"""
+    model = relation.related_model
+    field = relation.field.name
+    rows = model._default_manager.filter(**{field: duplicate_id})
+    if relation.one_to_one:
+        # Derived per-record rows; the kept record's are recomputed after the merge
+        rows.delete()
+        return
+    for unique_fields, condition in _unique_sets(relation):
+        clashes = model._default_manager.filter(
+            **{field: keep_id}, **{other: OuterRef(other) for other in unique_fields if other != field}
+        )
+        clashing = rows
+        if condition is not None:
+            # A partial constraint only binds rows that both match its condition
+            clashes, clashing = clashes.filter(condition), rows.filter(condition)
+        clashing.filter(Exists(clashes)).delete()
+    rows.update(**{field: keep_id})
+
+
+def merge(candidate, keep_id):
+    """
+    Merge a candidate pair into `keep_id`, which must be one of its records.
+    Returns the ID of the record removed.
+    """
+    if keep_id not in (candidate.record_a, candidate.record_b):
+        raise ValueError("keep must be one of the candidate's records")
+    duplicate_id = candidate.record_b if keep_id == candidate.record_a else candidate.record_a
+    model = apps.get_model(ENTITIES[candidate.entity]['model'])
+
+    relations = [relation for relation in model._meta.related_objects if not relation.many_to_many]
+    for relation in relations:
+        # Refuse unsupported constraints up front rather than fail partway through
+        _unique_sets(relation)
+
+    with transaction.atomic():
+        for relation in relations:
+            _reassign(relation, duplicate_id, keep_id)
+        model._default_manager.filter(pk=duplicate_id).delete()
+
+        # Other pairs involving the removed record are found again on the next run
+        DuplicateCandidate.objects.filter(
+            Q(record_a=duplicate_id) | Q(record_b=duplicate_id), entity=candidate.entity, status='pending'
+        ).exclude(pk=candidate.pk).delete()
+        candidate.status = 'merged'
+        candidate.save(update_fields=['status', 'updated_at'])
+
+    if candidate.entity == 'driver':
+        _after_driver_merge(keep_id)
+    return duplicate_id
+
+
+def _after_driver_merge(driver_id):
+    """Bulk updates bypass the drivers' signal handlers; refresh what they maintain"""
+    from fleetflow.apps.drivers import compliance, safety
+    from fleetflow.apps.drivers.availability import invalidate_available_drivers
+
+    compliance.scan([driver_id])
+    safety.recompute([driver_id])
+    safety.refresh_driver_fleets([driver_id])
+    invalidate_available_drivers()
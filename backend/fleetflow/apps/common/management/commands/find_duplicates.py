@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.common.dedup import ENTITIES, find_candidates
+
+
+class Command(BaseCommand):
+    help = "Find likely duplicate drivers and locations and queue them for review"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entity', choices=sorted(ENTITIES), action='append', help="Only check this entity (repeatable)")
+
+    def handle(self, *args, **options):
+        for entity in options['entity'] or ENTITIES:
+            written = find_candidates(entity)
+            self.stdout.write(self.style.SUCCESS(f"Queued {written} {entity} candidate pairs"))
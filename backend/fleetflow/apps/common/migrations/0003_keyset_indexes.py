@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='system_logs_timesta_27eb31_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:48
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('driver', 'Driver'), ('location', 'Location')], max_length=20)),
+                ('record_a', models.BigIntegerField()),
+                ('record_b', models.BigIntegerField()),
+                ('score', models.FloatField()),
+                ('matched_on', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list, size=None)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('merged', 'Merged'), ('dismissed', 'Dismissed')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'duplicate_candidates',
+                'ordering': ['-score', 'id'],
+                'indexes': [models.Index(fields=['entity', 'status', '-score'], name='duplicate_c_entity_7db294_idx')],
+                'unique_together': {('entity', 'record_a', 'record_b')},
+            },
+        ),
+    ]
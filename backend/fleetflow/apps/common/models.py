@@ -1,3 +1,4 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.core.validators import MinValueValidator
 
@@ -71,12 +72,50 @@ class SystemLog(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['timestamp', 'level']),
+            models.Index(fields=['-timestamp', '-id']),
         ]
 
     def __str__(self):
         return f"{self.level.upper()} - {self.action} at {self.timestamp}"
 
 
+class DuplicateCandidate(models.Model):
+    """
+    A pair of records the dedup job found likely to be the same entity,
+    awaiting review. `record_a` is always the lower ID.
+    """
+    ENTITY_CHOICES = [
+        ('driver', 'Driver'),
+        ('location', 'Location'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('merged', 'Merged'),
+        ('dismissed', 'Dismissed'),
+    ]
+
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    record_a = models.BigIntegerField()
+    record_b = models.BigIntegerField()
+    score = models.FloatField()
+    matched_on = ArrayField(models.CharField(max_length=50), default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'duplicate_candidates'
+        ordering = ['-score', 'id']
+        unique_together = [['entity', 'record_a', 'record_b']]
+        indexes = [
+            models.Index(fields=['entity', 'status', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.record_a} ~ {self.record_b} ({self.score:.2f})"
+
+
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -0,0 +1,170 @@
+"""
+Keyset pagination for high-volume collections.
+
+Page number pagination runs COUNT(*) and OFFSET scans that grow with the table.
+Keyset pagination instead seeks past the last row of the previous page with a
+row-value comparison on an index-backed ordering, so every page costs the same.
+The total is reported as a planner estimate in the X-Estimated-Count header.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db import connections, models
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowValue(models.Func):
+    """SQL row constructor, e.g. (fuel_date, id)"""
+    function = ''
+    template = '(%(expressions)s)'
+    output_field = models.Field()
+
+
+def estimate_count(queryset):
+    """Row estimate from the planner's statistics for the queryset"""
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination.
+
+    Views declare `keyset_ordering`, a tuple of fields sharing one direction
+    that ends in a unique field, e.g. ('-fuel_date', '-id'), and back it with a
+    matching composite index.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, view):
+        ordering = tuple(view.keyset_ordering)
+        if len({field.startswith('-') for field in ordering}) != 1:
+            raise ValueError('keyset_ordering fields must share one direction')
+        return ordering
+
+    def encode_cursor(self, values):
+        payload = json.dumps(values, default=str, separators=(',', ':')).encode()
+        return urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_values(self, cursor, length):
+        """Raw JSON values of a cursor, which must hold `length` of them"""
+        try:
+            values = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != length:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def decode_cursor(self, model, field_names, cursor):
+        values = self.decode_values(cursor, len(field_names))
+        try:
+            return [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(field_names, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        field_names = [field.lstrip('-') for field in ordering]
+        descending = ordering[0].startswith('-')
+
+        queryset = queryset.order_by(*ordering)
+        self.estimated_count = estimate_count(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(queryset.model, field_names, cursor)
+            lookup = 'keyset__lt' if descending else 'keyset__gt'
+            queryset = queryset.alias(
+                keyset=RowValue(*[models.F(name) for name in field_names])
+            ).filter(**{lookup: RowValue(*[models.Value(value) for value in values])})
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_values = (
+            [getattr(page[-1], name) for name in field_names] if self.has_next else None
+        )
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response(
+            {'next': self.get_next_link(), 'results': data},
+            headers={'X-Estimated-Count': str(self.estimated_count)},
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptionalKeysetPagination(BasePagination):
+    """
+    Page number pagination unless the client opts in with ?pagination=cursor,
+    in which case the view's keyset ordering is used.
+    """
+    opt_in_query_param = 'pagination'
+    opt_in_value = 'cursor'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.keyset = KeysetPagination()
+        self.active = self.page_number
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.active, 'display_page_controls', False)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        wants_keyset = request.query_params.get(self.opt_in_query_param) == self.opt_in_value
+        self.active = self.keyset if wants_keyset else self.page_number
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.active.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number.get_schema_operation_parameters(view)
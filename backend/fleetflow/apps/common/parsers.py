@@ -0,0 +1,35 @@
+"""
+Request parsers shared across apps.
+"""
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON: one object per line, parsed into a list. Lines
+    that aren't a JSON object become None, so callers can report them by
+    position instead of rejecting the whole body.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            lines = stream.read().decode(encoding).splitlines()
+        except UnicodeDecodeError as e:
+            raise ParseError(f"NDJSON parse error - {e}")
+
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            records.append(record if isinstance(record, dict) else None)
+        return records
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Location, DocumentType, SystemLog
+from .models import Location, DocumentType, SystemLog, DuplicateCandidate
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -20,3 +20,9 @@ class SystemLogSerializer(serializers.ModelSerializer):
         model = SystemLog
         fields = '__all__'
         read_only_fields = ['timestamp']
+
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DuplicateCandidate
+        fields = '__all__'
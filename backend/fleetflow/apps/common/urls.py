@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LocationViewSet, DocumentTypeViewSet, SystemLogViewSet, HealthViewSet
+from .views import LocationViewSet, DocumentTypeViewSet, SystemLogViewSet, HealthViewSet, DuplicateCandidateViewSet
 
 app_name = 'common'
 
@@ -8,6 +8,7 @@ router = DefaultRouter()
 router.register(r'locations', LocationViewSet, basename='location')
 router.register(r'document-types', DocumentTypeViewSet, basename='document-type')
 router.register(r'logs', SystemLogViewSet, basename='log')
+router.register(r'duplicates', DuplicateCandidateViewSet, basename='duplicate')
 router.register(r'health', HealthViewSet, basename='health')
 
 urlpatterns = [
@@ -5,8 +5,10 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import Location, DocumentType, SystemLog
-from .serializers import LocationSerializer, DocumentTypeSerializer, SystemLogSerializer
+from . import dedup
+from .models import Location, DocumentType, SystemLog, DuplicateCandidate
+from .pagination import OptionalKeysetPagination
+from .serializers import LocationSerializer, DocumentTypeSerializer, SystemLogSerializer, DuplicateCandidateSerializer
 
 
 class LocationViewSet(viewsets.ModelViewSet):
@@ -38,10 +40,14 @@ class DocumentTypeViewSet(viewsets.ModelViewSet):
 class SystemLogViewSet(viewsets.ModelViewSet):
     """
     ViewSet for viewing system logs.
+
+    Pass ?pagination=cursor for keyset pagination on (timestamp, id).
     """
     queryset = SystemLog.objects.all()
     serializer_class = SystemLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['level', 'action']
     ordering_fields = ['timestamp']
@@ -49,6 +55,51 @@ class SystemLogViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'head', 'options']  # Read-only
 
 
+class DuplicateCandidateViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Review queue of likely duplicate drivers and locations, filled by the
+    find_duplicates command.
+
+    - GET /api/duplicates/?entity=&status= - List candidate pairs, best score first
+    - POST /api/duplicates/{id}/merge/ - Merge the pair (body: keep=<record id>, default record_a)
+    - POST /api/duplicates/{id}/dismiss/ - Mark the pair as not a duplicate
+    """
+    queryset = DuplicateCandidate.objects.all()
+    serializer_class = DuplicateCandidateSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['entity', 'status']
+    ordering_fields = ['score', 'created_at']
+    ordering = ['-score', 'id']
+
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        """Merge the duplicate record into the one kept"""
+        candidate = self.get_object()
+        if candidate.status != 'pending':
+            return Response({'error': f'Candidate is already {candidate.status}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            keep_id = int(request.data.get('keep', candidate.record_a))
+        except (TypeError, ValueError):
+            return Response({'error': 'keep must be one of the candidate\'s records'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dedup.merge(candidate, keep_id)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(candidate)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def dismiss(self, request, pk=None):
+        """Mark the pair as distinct records"""
+        candidate = self.get_object()
+        candidate.status = 'dismissed'
+        candidate.save(update_fields=['status', 'updated_at'])
+        serializer = self.get_serializer(candidate)
+        return Response(serializer.data)
+
+
 class HealthViewSet(viewsets.ViewSet):
     """
     Health check endpoint for monitoring.
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Driver, DriverViolation, DriverTraining
+from .models import Driver, DriverViolation, DriverTraining, DriverCompliance, DriverSafetyScore, DriverHoursOfService, DriverPayrollSummary
 
 
 @admin.register(Driver)
@@ -42,3 +42,33 @@ class DriverTrainingAdmin(admin.ModelAdmin):
     list_filter = ['training_type', 'training_date', 'expiry_date']
     search_fields = ['driver__name', 'provider', 'certificate_number']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(DriverCompliance)
+class DriverComplianceAdmin(admin.ModelAdmin):
+    list_display = ['driver', 'next_event_type', 'next_event_date', 'lapsed', 'scanned_at']
+    list_filter = ['next_event_type', 'next_event_date']
+    search_fields = ['driver__name', 'driver__license_number']
+    readonly_fields = ['scanned_at']
+
+
+@admin.register(DriverSafetyScore)
+class DriverSafetyScoreAdmin(admin.ModelAdmin):
+    list_display = ['driver', 'penalty', 'penalty_date', 'violation_count', 'updated_at']
+    search_fields = ['driver__name', 'driver__license_number']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(DriverHoursOfService)
+class DriverHoursOfServiceAdmin(admin.ModelAdmin):
+    list_display = ['driver', 'head_hour', 'on_duty_since', 'updated_at']
+    search_fields = ['driver__name', 'driver__license_number']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(DriverPayrollSummary)
+class DriverPayrollSummaryAdmin(admin.ModelAdmin):
+    list_display = ['driver', 'period_start', 'period_end', 'hours_worked', 'overtime_hours', 'total_pay']
+    list_filter = ['period_start']
+    search_fields = ['driver__name', 'driver__license_number']
+    readonly_fields = ['created_at']
@@ -5,3 +5,6 @@ class DriversConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fleetflow.apps.drivers'
     verbose_name = 'Drivers Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
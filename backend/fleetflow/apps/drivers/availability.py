@@ -0,0 +1,62 @@
+"""
+Cached list of drivers available for dispatch.
+
+Only the eligibility terms are cached: status, license and medical
+certificate dates and in-flight shipments, which change with driver and
+shipment rows or with the date. The cache key carries the current date, so
+the list rolls over at midnight, and a generation number that the signal
+handlers bump on commit whenever those rows change. A rebuild reads the
+generation before it queries, so a list built from rows read before a commit
+is never served after it.
+
+Hours-of-service limits move with the clock (open duty periods accrue and
+hourly buckets roll off the windows), so they are applied live to the cached
+IDs on every read.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Driver
+
+AVAILABLE_DRIVERS_CACHE_KEY = 'drivers:eligible-ids:{date}:{generation}'
+AVAILABLE_DRIVERS_GENERATION_KEY = 'drivers:eligible-ids:generation'
+AVAILABLE_DRIVERS_TIMEOUT = 60 * 15
+
+
+def _cache_key(now):
+    generation = cache.get_or_set(AVAILABLE_DRIVERS_GENERATION_KEY, 0, None)
+    return AVAILABLE_DRIVERS_CACHE_KEY.format(date=now.date().isoformat(), generation=generation)
+
+
+def eligible_driver_ids(now=None):
+    """IDs of eligible drivers by name, from the cache or one query"""
+    now = now or timezone.now()
+    key = _cache_key(now)
+    driver_ids = cache.get(key)
+    if driver_ids is None:
+        driver_ids = list(Driver.objects.eligible(now).order_by('name', 'id').values_list('id', flat=True))
+        cache.set(key, driver_ids, AVAILABLE_DRIVERS_TIMEOUT)
+    return driver_ids
+
+
+def available_driver_ids(now=None):
+    """IDs of available drivers by name: the cached eligible list, filtered by hours left now"""
+    now = now or timezone.now()
+    driver_ids = eligible_driver_ids(now)
+    within_limits = set(
+        Driver.objects.filter(id__in=driver_ids).within_driving_limits(now).values_list('id', flat=True)
+    )
+    return [driver_id for driver_id in driver_ids if driver_id in within_limits]
+
+
+def _bump_generation():
+    try:
+        cache.incr(AVAILABLE_DRIVERS_GENERATION_KEY)
+    except ValueError:
+        cache.add(AVAILABLE_DRIVERS_GENERATION_KEY, 1, None)
+
+
+def invalidate_available_drivers():
+    """Retire the cached list once the current transaction commits"""
+    transaction.on_commit(_bump_generation)
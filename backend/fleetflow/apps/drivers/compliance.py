@@ -0,0 +1,109 @@
+"""
+Driver compliance scan.
+
+Each driver's compliance items are the license, medical and training
+certificates, the background check (valid for a fixed period after it was
+performed) and the latest expiry of every training type. The scan stores the
+earliest upcoming expiry per driver in DriverCompliance, where the expiring
+endpoint reads it with one range query on the indexed date, and lists the
+items that have already lapsed.
+"""
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .availability import invalidate_available_drivers
+from .models import Driver, DriverCompliance, DriverTraining
+
+BATCH_SIZE = 1000
+DRIVER_FIELDS = ['id', 'license_expiry_date', 'medical_cert_expiry', 'training_cert_expiry', 'background_check_date']
+
+
+def expire_licenses(today=None):
+    """Mark every license past its expiry date as expired in one UPDATE"""
+    today = today or timezone.now().date()
+    expired = Driver.objects.filter(license_status='valid', license_expiry_date__lte=today).update(
+        license_status='expired', updated_at=timezone.now()
+    )
+    if expired:
+        # The UPDATE bypasses the post_save handlers
+        invalidate_available_drivers()
+    return expired
+
+
+def training_expiries(driver_ids):
+    """Latest expiry per training type, per driver"""
+    queryset = DriverTraining.objects.all()
+    if driver_ids is not None:
+        queryset = queryset.filter(driver_id__in=driver_ids)
+    rows = queryset.order_by().values('driver_id', 'training_type').annotate(expiry=Max('expiry_date'))
+    expiries = {}
+    for row in rows:
+        expiries.setdefault(row['driver_id'], []).append(row['expiry'])
+    return expiries
+
+
+def compliance_items(driver, trainings):
+    """(expiry_date, event_type) for each of a driver's dated compliance items"""
+    items = [
+        (driver['license_expiry_date'], 'license'),
+        (driver['medical_cert_expiry'], 'medical_cert'),
+        (driver['training_cert_expiry'], 'training_cert'),
+    ]
+    if driver['background_check_date']:
+        validity = timedelta(days=DriverCompliance.BACKGROUND_CHECK_VALIDITY_DAYS)
+        items.append((driver['background_check_date'] + validity, 'background_check'))
+    items.extend((expiry, 'training') for expiry in trainings)
+    return [(expiry, event_type) for expiry, event_type in items if expiry is not None]
+
+
+def evaluate(driver, trainings, today):
+    """A driver's unsaved DriverCompliance row"""
+    items = compliance_items(driver, trainings)
+    upcoming = min((item for item in items if item[0] > today), default=(None, None))
+    lapsed = sorted({event_type for expiry, event_type in items if expiry <= today})
+    return DriverCompliance(
+        driver_id=driver['id'], next_event_date=upcoming[0], next_event_type=upcoming[1], lapsed=lapsed,
+    )
+
+
+def scan(driver_ids=None, today=None):
+    """
+    Recompute the compliance row of the given drivers, or of all of them.
+    Returns the number of drivers scanned.
+    """
+    today = today or timezone.now().date()
+    if driver_ids is not None:
+        driver_ids = list(driver_ids)
+
+    trainings = training_expiries(driver_ids)
+    drivers = Driver.objects.order_by().values(*DRIVER_FIELDS)
+    if driver_ids is not None:
+        drivers = drivers.filter(id__in=driver_ids)
+
+    batch, scanned = [], 0
+    for driver in drivers.iterator(chunk_size=BATCH_SIZE):
+        batch.append(evaluate(driver, trainings.get(driver['id'], []), today))
+        if len(batch) >= BATCH_SIZE:
+            scanned += _save(batch)
+            batch = []
+    return scanned + _save(batch)
+
+
+def _save(rows):
+    DriverCompliance.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['driver'],
+        update_fields=['next_event_date', 'next_event_type', 'lapsed', 'scanned_at'],
+    )
+    return len(rows)
+
+
+def expiring(days, today=None):
+    """Compliance rows whose next event falls within the next `days` days"""
+    today = today or timezone.now().date()
+    return DriverCompliance.objects.filter(
+        next_event_date__gte=today, next_event_date__lte=today + timedelta(days=days)
+    )
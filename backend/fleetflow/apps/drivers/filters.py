@@ -0,0 +1,14 @@
+import django_filters
+
+from fleetflow.apps.common.computed import ComputedFilter
+
+from .models import Driver
+
+
+class DriverFilter(django_filters.FilterSet):
+    is_available = ComputedFilter()
+    is_license_valid = ComputedFilter()
+
+    class Meta:
+        model = Driver
+        fields = ['status', 'license_status', 'license_class', 'is_available', 'is_license_valid']
@@ -0,0 +1,65 @@
+"""
+Hours-of-service tracking.
+
+Shipment transitions keep each driver's DriverHoursOfService ring current:
+picking up a shipment opens a duty period, and delivering it spreads the
+period's minutes over the hourly buckets it covered. Advancing the ring
+clears the buckets that fall out of the week, so every update touches at
+most one week of buckets regardless of history.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import DriverHoursOfService
+
+RING_HOURS = DriverHoursOfService.RING_HOURS
+
+
+def _lock(driver_id):
+    row, _ = DriverHoursOfService.objects.select_for_update().get_or_create(driver_id=driver_id)
+    return row
+
+
+def _advance(row, hour):
+    """Move the ring head forward to `hour`, clearing the hours it skips"""
+    if row.head_hour is None or hour - row.head_hour >= RING_HOURS or len(row.bucket_minutes) != RING_HOURS:
+        row.bucket_minutes = [0.0] * RING_HOURS
+    elif hour > row.head_hour:
+        for skipped in range(row.head_hour + 1, hour + 1):
+            row.bucket_minutes[skipped % RING_HOURS] = 0.0
+    else:
+        return
+    row.head_hour = hour
+
+
+def add_period(row, start, end):
+    """Spread a driving period's minutes over the ring's hourly buckets"""
+    if end <= start:
+        return
+    _advance(row, DriverHoursOfService.epoch_hour(end))
+    oldest = DriverHoursOfService.hour_start(row.head_hour - RING_HOURS + 1)
+    start = max(start, oldest)
+    while start < end:
+        hour = DriverHoursOfService.epoch_hour(start)
+        hour_end = min(DriverHoursOfService.hour_start(hour) + timedelta(hours=1), end)
+        row.bucket_minutes[hour % RING_HOURS] += (hour_end - start).total_seconds() / 60
+        start = hour_end
+
+
+def start_duty(driver_id, moment):
+    """Open a duty period for a driver picking up a shipment"""
+    with transaction.atomic():
+        row = _lock(driver_id)
+        if row.on_duty_since is None or moment < row.on_duty_since:
+            row.on_duty_since = moment
+            row.save()
+
+
+def end_duty(driver_id, start, end):
+    """Close a driver's duty period on delivery and record the time driven"""
+    with transaction.atomic():
+        row = _lock(driver_id)
+        add_period(row, start, end)
+        row.on_duty_since = None
+        row.save()
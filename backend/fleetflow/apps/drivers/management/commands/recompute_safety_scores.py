@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.drivers.safety import recompute, refresh_fleet_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild driver safety scores from the full violation history and refresh fleet safety ratings"
+
+    def handle(self, *args, **options):
+        drivers = recompute()
+        fleets = refresh_fleet_ratings()
+        self.stdout.write(self.style.SUCCESS(f"Scored {drivers} drivers, rated {fleets} fleets"))
@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fleetflow.apps.drivers.payroll import run_payroll
+
+
+class Command(BaseCommand):
+    help = "Compute driver pay and overtime for a payroll period from delivered shipments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', help="First day of the period (YYYY-MM-DD)")
+        parser.add_argument('end', help="Last day of the period (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            period_start = date.fromisoformat(options['start'])
+            period_end = date.fromisoformat(options['end'])
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        if period_end < period_start:
+            raise CommandError("The period must end on or after its start")
+
+        written = run_payroll(period_start, period_end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} payroll summaries for {period_start} to {period_end}"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.drivers.compliance import expire_licenses, scan
+
+
+class Command(BaseCommand):
+    help = "Expire lapsed licenses and recompute each driver's next compliance event"
+
+    def handle(self, *args, **options):
+        expired = expire_licenses()
+        scanned = scan()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} licenses, scanned {scanned} drivers"))
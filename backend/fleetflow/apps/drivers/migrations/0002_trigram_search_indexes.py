@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:34
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='driver',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='drivers_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='drivers_email_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['license_number'], name='drivers_license_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_number'], name='drivers_phone_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
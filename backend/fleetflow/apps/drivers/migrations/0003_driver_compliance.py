@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:40
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0002_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverCompliance',
+            fields=[
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compliance', serialize=False, to='drivers.driver')),
+                ('next_event_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('next_event_type', models.CharField(blank=True, choices=[('license', 'License'), ('medical_cert', 'Medical Certificate'), ('training_cert', 'Training Certificate'), ('background_check', 'Background Check'), ('training', 'Training')], max_length=50, null=True)),
+                ('lapsed', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, default=list, size=None)),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'driver_compliance',
+            },
+        ),
+    ]
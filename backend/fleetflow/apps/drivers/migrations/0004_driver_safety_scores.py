@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0003_driver_compliance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverSafetyScore',
+            fields=[
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='safety_score', serialize=False, to='drivers.driver')),
+                ('penalty', models.FloatField(default=0)),
+                ('penalty_date', models.DateField()),
+                ('violation_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'driver_safety_scores',
+            },
+        ),
+    ]
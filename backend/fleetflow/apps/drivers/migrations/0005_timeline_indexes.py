@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0004_driver_safety_scores'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='drivertraining',
+            index=models.Index(fields=['driver', '-training_date', '-id'], name='driver_trai_driver__3a9a46_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driverviolation',
+            index=models.Index(fields=['driver', '-violation_date', '-id'], name='driver_viol_driver__205cb3_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:44
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverHoursOfService',
+            fields=[
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hours_of_service', serialize=False, to='drivers.driver')),
+                ('bucket_minutes', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=168)),
+                ('head_hour', models.BigIntegerField(blank=True, null=True)),
+                ('on_duty_since', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'driver_hours_of_service',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0006_driver_hours_of_service'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverPayrollSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(db_index=True)),
+                ('period_end', models.DateField()),
+                ('shipment_count', models.IntegerField(default=0)),
+                ('hours_worked', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('regular_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('hourly_rate', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('regular_pay', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('overtime_pay', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_pay', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_summaries', to='drivers.driver')),
+            ],
+            options={
+                'db_table': 'driver_payroll_summaries',
+                'ordering': ['-period_start', 'driver'],
+                'unique_together': {('driver', 'period_start', 'period_end')},
+            },
+        ),
+    ]
@@ -1,7 +1,136 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import GreaterThan
 from django.core.validators import MinValueValidator, RegexValidator
 from django.utils import timezone
 
+from fleetflow.apps.common.computed import ComputedFieldsQuerySet, flag
+
+
+def _license_valid():
+    return models.Q(license_status='valid', license_expiry_date__gt=timezone.now().date())
+
+
+class RingWindowSum(models.Func):
+    """
+    Sum of the hour buckets of a ring buffer newer than a threshold hour:
+    RingWindowSum(buckets, head_hour, threshold_hour). The bucket at 0-based
+    position p holds the latest hour h <= head_hour with h % size == p.
+    """
+    output_field = models.FloatField()
+
+    def __init__(self, buckets, head_hour, threshold_hour, size):
+        self.size = size
+        super().__init__(buckets, head_hour, threshold_hour)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (buckets, buckets_params), (head, head_params), (threshold, threshold_params) = (
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        )
+        sql = (
+            f"(SELECT COALESCE(SUM(bucket.value), 0) "
+            f"FROM unnest({buckets}) WITH ORDINALITY AS bucket(value, position) "
+            f"WHERE {head} - (({head} - (bucket.position - 1)) %% {int(self.size)}) > {threshold})"
+        )
+        return sql, (*buckets_params, *head_params, *head_params, *threshold_params)
+
+
+class EpochMinutes(models.Func):
+    """Minutes in an interval expression"""
+    template = '(EXTRACT(EPOCH FROM %(expressions)s) / 60)'
+    output_field = models.FloatField()
+
+
+def _driving_hours(now):
+    """
+    Expressions for hours driven in the trailing 24h and 7d windows and the
+    hours left under each limit, from the hours-of-service ring and any open
+    duty period. Windows are aligned to whole hours.
+    """
+    current_hour = DriverHoursOfService.epoch_hour(now)
+    annotations = {}
+    for name, window_hours, limit in DriverHoursOfService.WINDOWS:
+        threshold_hour = current_hour - window_hours
+        window_start = DriverHoursOfService.hour_start(threshold_hour + 1)
+        open_minutes = models.Case(
+            models.When(
+                hours_of_service__on_duty_since__isnull=False,
+                then=EpochMinutes(models.Value(now) - Greatest(
+                    'hours_of_service__on_duty_since', models.Value(window_start)
+                )),
+            ),
+            default=models.Value(0.0),
+            output_field=models.FloatField(),
+        )
+        closed_minutes = RingWindowSum(
+            'hours_of_service__bucket_minutes', 'hours_of_service__head_hour',
+            models.Value(threshold_hour), size=DriverHoursOfService.RING_HOURS,
+        )
+        driven = Coalesce(closed_minutes + Greatest(open_minutes, models.Value(0.0)), models.Value(0.0)) / 60
+        annotations[f'driven_hours_{name}'] = driven
+        annotations[f'remaining_hours_{name}'] = models.Value(float(limit)) - driven
+    return annotations
+
+
+def _within_driving_limits(now):
+    hours = _driving_hours(now)
+    return models.Q(*(
+        GreaterThan(hours[f'remaining_hours_{name}'], 0.0) for name, _, _ in DriverHoursOfService.WINDOWS
+    ))
+
+
+def eligible_condition(now=None):
+    """
+    Active, with a valid, unexpired license and medical certificate (when one
+    is on record) and not committed to an in-flight shipment. Only row changes
+    and the date move this, unlike the hours-of-service limits.
+    """
+    from fleetflow.apps.logistics.models import Shipment
+
+    now = now or timezone.now()
+    medical_valid = models.Q(medical_cert_expiry__isnull=True) | models.Q(medical_cert_expiry__gt=now.date())
+    in_flight = Shipment.objects.filter(assigned_driver=OuterRef('pk'), status__in=Shipment.IN_FLIGHT_STATUSES)
+    return models.Q(status='active') & _license_valid() & medical_valid & ~Exists(in_flight)
+
+
+def available_condition(now=None):
+    """Eligible for dispatch and with hours left under every hours-of-service limit"""
+    now = now or timezone.now()
+    return eligible_condition(now) & _within_driving_limits(now)
+
+
+class DriverQuerySet(ComputedFieldsQuerySet):
+    """
+    Query helpers for driver representations.
+    """
+    computed_fields = {
+        'is_license_valid': lambda: flag(_license_valid()),
+        'is_available': lambda: flag(available_condition()),
+    }
+
+    def available(self):
+        """Drivers available for dispatch, matching the is_available computed field"""
+        return self.filter(available_condition())
+
+    def eligible(self, now=None):
+        """Drivers available for dispatch before the hours-of-service limits are applied"""
+        return self.filter(eligible_condition(now))
+
+    def with_driving_hours(self, now=None):
+        """Annotate hours driven and left under each hours-of-service limit"""
+        return self.annotate(**_driving_hours(now or timezone.now()))
+
+    def within_driving_limits(self, now=None):
+        """Drivers with hours left under every hours-of-service limit"""
+        return self.filter(_within_driving_limits(now or timezone.now()))
+
 
 class Driver(models.Model):
     """
@@ -62,26 +191,41 @@ class Driver(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DriverQuerySet.as_manager()
+
     class Meta:
         db_table = 'drivers'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['license_number']),
+            GinIndex(fields=['name'], name='drivers_name_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['email'], name='drivers_email_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['license_number'], name='drivers_license_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['phone_number'], name='drivers_phone_trgm_idx', opclasses=['gin_trgm_ops']),
         ]
 
     def __str__(self):
         return f"{self.name} ({self.license_number})"
 
     def is_license_valid(self):
-        """Check if driver's license is valid"""
+        """Check if driver's license is valid (see DriverQuerySet.computed_fields)"""
         if self.license_status != 'valid':
             return False
         return self.license_expiry_date > timezone.now().date()
 
     def is_available(self):
-        """Check if driver is available for assignment"""
-        return self.status == 'active' and self.is_license_valid()
+        """Check if driver is available for assignment (see available_condition)"""
+        if self.pk is None:
+            return False
+        return Driver.objects.filter(pk=self.pk).available().exists()
+
+    def get_safety_score(self):
+        """Current safety score, the maximum when no violations are on record"""
+        try:
+            return self.safety_score.get_score()
+        except DriverSafetyScore.DoesNotExist:
+            return DriverSafetyScore.MAX_SCORE
 
     def get_age(self):
         """Calculate driver age"""
@@ -125,6 +269,9 @@ class DriverViolation(models.Model):
     class Meta:
         db_table = 'driver_violations'
         ordering = ['-violation_date']
+        indexes = [
+            models.Index(fields=['driver', '-violation_date', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.driver.name} - {self.get_violation_type_display()} on {self.violation_date}"
@@ -156,6 +303,9 @@ class DriverTraining(models.Model):
     class Meta:
         db_table = 'driver_trainings'
         ordering = ['-training_date']
+        indexes = [
+            models.Index(fields=['driver', '-training_date', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.driver.name} - {self.get_training_type_display()}"
@@ -163,3 +313,177 @@ class DriverTraining(models.Model):
     def is_valid(self):
         """Check if training certification is still valid"""
         return self.expiry_date > timezone.now().date()
+
+
+class DriverCompliance(models.Model):
+    """
+    A driver's next compliance event, kept by the compliance scan.
+
+    `next_event_date` is the earliest upcoming expiry across the license,
+    certificates, background check and trainings; `lapsed` lists the items
+    already past their expiry.
+    """
+    EVENT_TYPE_CHOICES = [
+        ('license', 'License'),
+        ('medical_cert', 'Medical Certificate'),
+        ('training_cert', 'Training Certificate'),
+        ('background_check', 'Background Check'),
+        ('training', 'Training'),
+    ]
+    BACKGROUND_CHECK_VALIDITY_DAYS = 365
+
+    driver = models.OneToOneField(Driver, on_delete=models.CASCADE, primary_key=True, related_name='compliance')
+    next_event_date = models.DateField(null=True, blank=True, db_index=True)
+    next_event_type = models.CharField(max_length=50, choices=EVENT_TYPE_CHOICES, null=True, blank=True)
+    lapsed = ArrayField(models.CharField(max_length=50), default=list, blank=True)
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'driver_compliance'
+
+    def __str__(self):
+        return f"{self.driver_id} - {self.next_event_type} on {self.next_event_date}"
+
+    def is_compliant(self):
+        """Check if nothing has lapsed"""
+        return not self.lapsed
+
+
+class DriverSafetyScore(models.Model):
+    """
+    Time-decayed, severity-weighted violation penalty per driver.
+
+    Each violation adds its severity weight (reduced once resolved), decaying
+    exponentially with the violation's age. The penalty is stored as of
+    `penalty_date` and decayed to the read date, so a violation change is one
+    O(1) upsert. The score maps the penalty onto the 0-5 rating scale.
+    """
+    MAX_SCORE = 5
+    HALF_LIFE_DAYS = 365
+    PENALTY_SCALE = 10
+    SEVERITY_WEIGHTS = {'minor': 1, 'moderate': 3, 'major': 5}
+    RESOLVED_FACTOR = 0.5
+
+    driver = models.OneToOneField(Driver, on_delete=models.CASCADE, primary_key=True, related_name='safety_score')
+    penalty = models.FloatField(default=0)
+    penalty_date = models.DateField()
+    violation_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'driver_safety_scores'
+
+    def __str__(self):
+        return f"{self.driver_id} - {self.get_score()}"
+
+    @classmethod
+    def decay_rate(cls):
+        """Per-day exponential decay constant"""
+        return math.log(2) / cls.HALF_LIFE_DAYS
+
+    def get_penalty(self, on_date=None):
+        """Penalty decayed to a date"""
+        on_date = on_date or timezone.now().date()
+        return self.penalty * math.exp(-self.decay_rate() * (on_date - self.penalty_date).days)
+
+    def get_score(self, on_date=None):
+        """Safety score on a 0-5 scale"""
+        score = self.MAX_SCORE * math.exp(-max(self.get_penalty(on_date), 0) / self.PENALTY_SCALE)
+        return round(score, 2)
+
+
+class DriverHoursOfService(models.Model):
+    """
+    Sliding-window driving hours per driver.
+
+    Completed driving periods are spread over a ring of hourly buckets
+    covering the last week, indexed by epoch hour modulo the ring size, with
+    `head_hour` the newest hour written. A period still in progress is held in
+    `on_duty_since`. Driven hours in any trailing window up to a week are a
+    bounded sum over the ring, so answering never touches shipment history.
+    """
+    RING_HOURS = 24 * 7
+    DAILY_LIMIT_HOURS = 11
+    WEEKLY_LIMIT_HOURS = 60
+    # (annotation suffix, window length in hours, limit in hours)
+    WINDOWS = [
+        ('24h', 24, DAILY_LIMIT_HOURS),
+        ('7d', RING_HOURS, WEEKLY_LIMIT_HOURS),
+    ]
+
+    driver = models.OneToOneField(Driver, on_delete=models.CASCADE, primary_key=True, related_name='hours_of_service')
+    bucket_minutes = ArrayField(models.FloatField(), size=RING_HOURS, default=list)
+    head_hour = models.BigIntegerField(null=True, blank=True)
+    on_duty_since = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'driver_hours_of_service'
+
+    def __str__(self):
+        return f"Hours of service for {self.driver_id}"
+
+    @staticmethod
+    def epoch_hour(moment):
+        """Whole hours since the Unix epoch"""
+        return int(moment.timestamp() // 3600)
+
+    @staticmethod
+    def hour_start(epoch_hour):
+        """Start of an epoch hour"""
+        return datetime.fromtimestamp(epoch_hour * 3600, tz=dt_timezone.utc)
+
+    def get_driven_hours(self, window_hours, now=None):
+        """Hours driven in the trailing window, aligned to whole hours"""
+        now = now or timezone.now()
+        threshold_hour = self.epoch_hour(now) - window_hours
+        minutes = 0.0
+        if self.head_hour is not None:
+            for position, value in enumerate(self.bucket_minutes):
+                hour = self.head_hour - (self.head_hour - position) % self.RING_HOURS
+                if hour > threshold_hour:
+                    minutes += value
+        if self.on_duty_since is not None:
+            window_start = self.hour_start(threshold_hour + 1)
+            minutes += max((now - max(self.on_duty_since, window_start)).total_seconds() / 60, 0)
+        return minutes / 60
+
+    def get_remaining_hours(self, now=None):
+        """Hours left under each limit, keyed by window"""
+        return {
+            name: round(limit - self.get_driven_hours(window_hours, now), 2)
+            for name, window_hours, limit in self.WINDOWS
+        }
+
+
+class DriverPayrollSummary(models.Model):
+    """
+    A driver's pay for one payroll period, written by the payroll run.
+
+    Hours are the time the driver spent on shipments within the period, with
+    overlapping shipments counted once. Hours beyond the weekly threshold in
+    any ISO week are overtime, counted in time order across period edges.
+    """
+    OVERTIME_WEEKLY_THRESHOLD = 40
+    OVERTIME_MULTIPLIER = Decimal('1.5')
+
+    driver = models.ForeignKey(Driver, on_delete=models.CASCADE, related_name='payroll_summaries')
+    period_start = models.DateField(db_index=True)
+    period_end = models.DateField()
+    shipment_count = models.IntegerField(default=0)
+    hours_worked = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    regular_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    overtime_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    hourly_rate = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    regular_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    overtime_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'driver_payroll_summaries'
+        ordering = ['-period_start', 'driver']
+        unique_together = [['driver', 'period_start', 'period_end']]
+
+    def __str__(self):
+        return f"{self.driver_id} - {self.period_start} to {self.period_end}: {self.total_pay}"
@@ -0,0 +1,171 @@
+"""
+Payroll runs.
+
+One query pulls every driver's shipment intervals (pickup to delivery, the
+SQL form of Shipment.get_duration_hours) over the whole ISO weeks the period
+touches, and the rest is NumPy array arithmetic:
+
+- each driver's overlapping shipments are merged, so concurrent shipments
+  aren't paid twice
+- busy time is split into segments at week boundaries and the period edges
+- within each week, hours count toward the weekly overtime threshold in
+  time order, so a week straddling two periods pays the same overtime in
+  total as if it fell in one; each period pays the part inside it
+- pay is priced at the driver's hourly rate
+
+The summaries are then written with a single bulk_create, replacing any
+earlier run of the period.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection, transaction
+
+from .models import DriverPayrollSummary
+
+WEEK_SECONDS = 7 * 86400
+
+PAYROLL_SQL = """
+SELECT s.assigned_driver_id,
+       COALESCE(d.hourly_rate, 0),
+       EXTRACT(EPOCH FROM GREATEST(s.actual_pickup, %(weeks_start)s) - %(weeks_start)s),
+       EXTRACT(EPOCH FROM LEAST(s.actual_delivery, %(weeks_end)s) - %(weeks_start)s),
+       s.actual_delivery >= %(start)s AND s.actual_delivery < %(end)s
+FROM shipments s
+JOIN drivers d ON d.id = s.assigned_driver_id
+WHERE s.actual_pickup IS NOT NULL
+  AND s.actual_delivery > s.actual_pickup
+  AND s.actual_pickup < %(weeks_end)s AND s.actual_delivery > %(weeks_start)s
+ORDER BY 1, 3
+"""
+
+
+def _bounds(period_start, period_end):
+    """UTC datetime range covering the inclusive period"""
+    start = datetime.combine(period_start, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(period_end + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def _week_bounds(start, end):
+    """Monday-aligned range covering every ISO week the period touches"""
+    weeks_start = start - timedelta(days=start.weekday())
+    weeks_end = end + timedelta(days=(7 - end.weekday()) % 7)
+    return weeks_start, weeks_end
+
+
+def merge_intervals(driver_index, starts, ends, span):
+    """
+    Union of each driver's intervals. Rows must be sorted by driver, then start;
+    times are seconds in [0, span). Returns (driver_index, starts, ends) of the
+    merged intervals.
+    """
+    # Offsetting each driver by a whole span keeps one running maximum from leaking across drivers
+    offset = driver_index * float(span)
+    running_end = np.maximum.accumulate(ends + offset)
+    new_run = np.ones(len(starts), dtype=bool)
+    new_run[1:] = starts[1:] + offset[1:] > running_end[:-1]
+    # One driver's interval ending at the window end touches the next driver's starting at 0
+    new_run[1:] |= driver_index[1:] != driver_index[:-1]
+    run_starts = np.flatnonzero(new_run)
+    merged_ends = np.maximum.reduceat(running_end, run_starts) - offset[run_starts]
+    return driver_index[run_starts], starts[run_starts], merged_ends
+
+
+def weekly_hours(driver_count, driver_index, starts, ends, boundaries):
+    """Hours each driver was busy in each segment between consecutive boundaries (seconds)"""
+    overlap = np.minimum(ends[:, None], boundaries[1:]) - np.maximum(starts[:, None], boundaries[:-1])
+    hours = np.zeros((driver_count, len(boundaries) - 1))
+    np.add.at(hours, driver_index, np.clip(overlap, 0, None) / 3600)
+    return hours
+
+
+def overtime_hours(hours, segment_weeks, threshold):
+    """
+    Overtime in each segment: the part of its hours past the weekly threshold,
+    counting the week's earlier segments first.
+    """
+    week_first = np.searchsorted(segment_weeks, segment_weeks)
+    before = np.cumsum(hours, axis=1) - hours
+    before = before - before[:, week_first]
+    return np.maximum(before + hours - threshold, 0) - np.maximum(before - threshold, 0)
+
+
+def compute_pay(rows, period_seconds, weeks_seconds, threshold, multiplier):
+    """
+    Per-driver pay arrays from PAYROLL_SQL rows. period_seconds is the period
+    as (start, end) seconds after the first week's Monday.
+    """
+    driver_ids, rates, starts, ends, delivered = zip(*rows)
+    drivers, driver_index = np.unique(np.array(driver_ids, dtype=np.int64), return_inverse=True)
+    rate = np.zeros(len(drivers))
+    rate[driver_index] = np.array(rates, dtype=float)
+    shipment_count = np.bincount(driver_index, weights=np.array(delivered, dtype=float), minlength=len(drivers))
+
+    merged = merge_intervals(
+        driver_index, np.array(starts, dtype=float), np.array(ends, dtype=float), weeks_seconds
+    )
+    boundaries = np.union1d(np.arange(0, weeks_seconds + 1, WEEK_SECONDS), period_seconds).astype(float)
+    hours = weekly_hours(len(drivers), *merged, boundaries)
+    overtime = overtime_hours(hours, (boundaries[:-1] // WEEK_SECONDS).astype(np.int64), threshold)
+
+    in_period = (boundaries[:-1] >= period_seconds[0]) & (boundaries[1:] <= period_seconds[1])
+    hours_worked = np.round(hours[:, in_period].sum(axis=1), 2)
+    overtime_worked = np.round(overtime[:, in_period].sum(axis=1), 2)
+    regular_worked = np.round(hours_worked - overtime_worked, 2)
+    regular_pay = np.round(rate * regular_worked, 2)
+    overtime_pay = np.round(rate * multiplier * overtime_worked, 2)
+
+    paid = (hours_worked > 0) | (shipment_count > 0)
+    return {
+        'driver_id': drivers[paid],
+        'shipment_count': shipment_count[paid].astype(np.int64),
+        'hours_worked': hours_worked[paid],
+        'regular_hours': regular_worked[paid],
+        'overtime_hours': overtime_worked[paid],
+        'hourly_rate': rate[paid],
+        'regular_pay': regular_pay[paid],
+        'overtime_pay': overtime_pay[paid],
+    }
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+def run_payroll(period_start, period_end):
+    """
+    Compute and store every driver's pay for the inclusive period. Returns the
+    number of summaries written.
+    """
+    start, end = _bounds(period_start, period_end)
+    weeks_start, weeks_end = _week_bounds(start, end)
+    with connection.cursor() as cursor:
+        cursor.execute(PAYROLL_SQL, {'start': start, 'end': end, 'weeks_start': weeks_start, 'weeks_end': weeks_end})
+        rows = cursor.fetchall()
+
+    summaries = []
+    if rows:
+        pay = compute_pay(
+            rows,
+            ((start - weeks_start).total_seconds(), (end - weeks_start).total_seconds()),
+            (weeks_end - weeks_start).total_seconds(),
+            DriverPayrollSummary.OVERTIME_WEEKLY_THRESHOLD,
+            float(DriverPayrollSummary.OVERTIME_MULTIPLIER),
+        )
+        for values in zip(*pay.values()):
+            row = dict(zip(pay, values))
+            regular_pay, overtime_pay = _money(row['regular_pay']), _money(row['overtime_pay'])
+            summaries.append(DriverPayrollSummary(
+                driver_id=int(row['driver_id']), period_start=period_start, period_end=period_end,
+                shipment_count=int(row['shipment_count']), hours_worked=_money(row['hours_worked']),
+                regular_hours=_money(row['regular_hours']), overtime_hours=_money(row['overtime_hours']),
+                hourly_rate=_money(row['hourly_rate']), regular_pay=regular_pay,
+                overtime_pay=overtime_pay, total_pay=regular_pay + overtime_pay,
+            ))
+
+    with transaction.atomic():
+        DriverPayrollSummary.objects.filter(period_start=period_start, period_end=period_end).delete()
+        DriverPayrollSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
@@ -0,0 +1,160 @@
+"""
+Driver safety scores.
+
+A driver's penalty is the sum of their violations' severity weights, each
+decayed exponentially by the violation's age. Decay is multiplicative, so the
+stored penalty is simply re-decayed to today before a violation's own decayed
+weight is added or removed: one upsert per change, however long the history.
+
+Fleets take the average current score of their active drivers as their
+safety_rating.
+"""
+import math
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from fleetflow.apps.fleet.models import FleetDriverAssignment, FleetPerformanceMetrics
+
+from .models import DriverSafetyScore, DriverViolation
+
+APPLY_SQL = """
+INSERT INTO driver_safety_scores (driver_id, penalty, penalty_date, violation_count, updated_at)
+VALUES (%(driver_id)s, %(penalty)s, %(today)s, %(count)s, NOW())
+ON CONFLICT (driver_id) DO UPDATE SET
+    penalty = GREATEST(
+        driver_safety_scores.penalty * EXP(-%(rate)s * (EXCLUDED.penalty_date - driver_safety_scores.penalty_date))
+        + EXCLUDED.penalty,
+        0
+    ),
+    penalty_date = EXCLUDED.penalty_date,
+    violation_count = driver_safety_scores.violation_count + EXCLUDED.violation_count,
+    updated_at = NOW()
+"""
+
+WEIGHT_SQL = """
+(CASE severity {cases} ELSE 0 END)
+* (CASE WHEN is_resolved THEN %(resolved_factor)s ELSE 1 END)
+* EXP(-%(rate)s * (%(today)s - violation_date))
+"""
+
+RECOMPUTE_SQL = """
+INSERT INTO driver_safety_scores (driver_id, penalty, penalty_date, violation_count, updated_at)
+SELECT driver_id, SUM({weight}), %(today)s, COUNT(*), NOW()
+FROM driver_violations
+{where}
+GROUP BY driver_id
+ON CONFLICT (driver_id) DO UPDATE SET
+    penalty = EXCLUDED.penalty,
+    penalty_date = EXCLUDED.penalty_date,
+    violation_count = EXCLUDED.violation_count,
+    updated_at = NOW()
+"""
+
+FLEET_RATING_SQL = """
+SELECT a.fleet_id,
+       AVG(%(max_score)s * EXP(-GREATEST(
+           COALESCE(s.penalty * EXP(-%(rate)s * (%(today)s - s.penalty_date)), 0), 0
+       ) / %(scale)s))
+FROM fleet_driver_assignments a
+LEFT JOIN driver_safety_scores s ON s.driver_id = a.driver_id
+WHERE a.is_active {fleet_filter}
+GROUP BY a.fleet_id
+"""
+
+
+def violation_weight(violation):
+    """Undecayed penalty weight of a violation (a dict of its fields)"""
+    weight = DriverSafetyScore.SEVERITY_WEIGHTS.get(violation['severity'], 0)
+    if violation['is_resolved']:
+        weight *= DriverSafetyScore.RESOLVED_FACTOR
+    return weight
+
+
+def apply_violation(violation, sign=1, today=None):
+    """Add (sign=1) or remove (sign=-1) a violation's decayed weight"""
+    today = today or timezone.now().date()
+    rate = DriverSafetyScore.decay_rate()
+    age = (today - violation['violation_date']).days
+    with connection.cursor() as cursor:
+        cursor.execute(APPLY_SQL, {
+            'driver_id': violation['driver_id'],
+            'penalty': sign * violation_weight(violation) * math.exp(-rate * age),
+            'today': today,
+            'count': sign,
+            'rate': rate,
+        })
+
+
+def recompute(driver_ids=None, today=None):
+    """
+    Rebuild scores from the full violation history, for the given drivers or
+    all of them. Returns the number of drivers with violations.
+    """
+    today = today or timezone.now().date()
+    params = {
+        'today': today,
+        'rate': DriverSafetyScore.decay_rate(),
+        'resolved_factor': DriverSafetyScore.RESOLVED_FACTOR,
+    }
+    cases = []
+    for position, (severity, weight) in enumerate(DriverSafetyScore.SEVERITY_WEIGHTS.items()):
+        cases.append(f'WHEN %(severity_{position})s THEN %(weight_{position})s')
+        params[f'severity_{position}'] = severity
+        params[f'weight_{position}'] = weight
+    weight_sql = WEIGHT_SQL.format(cases=' '.join(cases))
+
+    scores = DriverSafetyScore.objects.all()
+    where = ''
+    if driver_ids is not None:
+        driver_ids = list(driver_ids)
+        scores = scores.filter(driver_id__in=driver_ids)
+        where = 'WHERE driver_id = ANY(%(driver_ids)s)'
+        params['driver_ids'] = driver_ids
+
+    with transaction.atomic():
+        scored = DriverViolation.objects.all()
+        if driver_ids is not None:
+            scored = scored.filter(driver_id__in=driver_ids)
+        scores.exclude(driver_id__in=scored.values('driver_id')).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(RECOMPUTE_SQL.format(weight=weight_sql, where=where), params)
+            return cursor.rowcount
+
+
+def refresh_fleet_ratings(fleet_ids=None, today=None):
+    """Set each fleet's safety_rating to its active drivers' average score"""
+    params = {
+        'today': today or timezone.now().date(),
+        'rate': DriverSafetyScore.decay_rate(),
+        'max_score': DriverSafetyScore.MAX_SCORE,
+        'scale': DriverSafetyScore.PENALTY_SCALE,
+    }
+    fleet_filter = ''
+    if fleet_ids is not None:
+        fleet_filter = 'AND a.fleet_id = ANY(%(fleet_ids)s)'
+        params['fleet_ids'] = list(fleet_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(FLEET_RATING_SQL.format(fleet_filter=fleet_filter), params)
+        ratings = cursor.fetchall()
+    if fleet_ids is not None:
+        # Fleets left without active drivers fall back to the default rating
+        rated = {fleet_id for fleet_id, _ in ratings}
+        FleetPerformanceMetrics.objects.filter(fleet_id__in=params['fleet_ids']).exclude(fleet_id__in=rated).update(
+            safety_rating=DriverSafetyScore.MAX_SCORE
+        )
+    for fleet_id, rating in ratings:
+        FleetPerformanceMetrics.objects.update_or_create(
+            fleet_id=fleet_id, defaults={'safety_rating': Decimal(rating).quantize(Decimal('0.01'))}
+        )
+    return len(ratings)
+
+
+def refresh_driver_fleets(driver_ids):
+    """Refresh the ratings of the fleets the drivers are active in"""
+    fleet_ids = set(
+        FleetDriverAssignment.objects.filter(driver_id__in=driver_ids, is_active=True).values_list('fleet_id', flat=True)
+    )
+    if fleet_ids:
+        refresh_fleet_ratings(fleet_ids)
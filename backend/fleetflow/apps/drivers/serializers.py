@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Driver, DriverViolation, DriverTraining
+
+from fleetflow.apps.common.computed import ComputedField
+
+from .models import Driver, DriverViolation, DriverTraining, DriverCompliance, DriverPayrollSummary
 
 
 class DriverViolationSerializer(serializers.ModelSerializer):
@@ -22,8 +25,9 @@ class DriverTrainingSerializer(serializers.ModelSerializer):
 class DriverSerializer(serializers.ModelSerializer):
     violations = DriverViolationSerializer(many=True, read_only=True)
     trainings = DriverTrainingSerializer(many=True, read_only=True)
-    is_available = serializers.SerializerMethodField()
+    is_available = ComputedField()
     is_license_valid = serializers.SerializerMethodField()
+    safety_score = serializers.SerializerMethodField()
     age = serializers.SerializerMethodField()
 
     class Meta:
@@ -34,24 +38,25 @@ class DriverSerializer(serializers.ModelSerializer):
             'license_issue_date', 'license_expiry_date', 'license_status',
             'employment_date', 'status', 'hourly_rate', 'medical_cert_expiry',
             'training_cert_expiry', 'background_check_date', 'background_check_status',
-            'is_available', 'is_license_valid', 'age',
+            'is_available', 'is_license_valid', 'safety_score', 'age',
             'violations', 'trainings', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-    def get_is_available(self, obj):
-        return obj.is_available()
-
     def get_is_license_valid(self, obj):
         return obj.is_license_valid()
 
+    def get_safety_score(self, obj):
+        return obj.get_safety_score()
+
     def get_age(self, obj):
         return obj.get_age()
 
 
 class DriverListSerializer(serializers.ModelSerializer):
-    is_available = serializers.SerializerMethodField()
-    is_license_valid = serializers.SerializerMethodField()
+    """Expects a queryset with with_computed()"""
+    is_available = ComputedField()
+    is_license_valid = ComputedField()
 
     class Meta:
         model = Driver
@@ -60,8 +65,23 @@ class DriverListSerializer(serializers.ModelSerializer):
             'license_status', 'status', 'is_available', 'is_license_valid', 'created_at'
         ]
 
-    def get_is_available(self, obj):
-        return obj.is_available()
 
-    def get_is_license_valid(self, obj):
-        return obj.is_license_valid()
+class DriverComplianceSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='driver.name', read_only=True)
+    license_number = serializers.CharField(source='driver.license_number', read_only=True)
+    status = serializers.CharField(source='driver.status', read_only=True)
+
+    class Meta:
+        model = DriverCompliance
+        fields = [
+            'driver', 'name', 'license_number', 'status', 'next_event_date',
+            'next_event_type', 'lapsed', 'scanned_at'
+        ]
+
+
+class DriverPayrollSummarySerializer(serializers.ModelSerializer):
+    driver_name = serializers.CharField(source='driver.name', read_only=True)
+
+    class Meta:
+        model = DriverPayrollSummary
+        fields = '__all__'
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from fleetflow.apps.logistics.models import Shipment
+
+from . import compliance, hours, safety
+from .availability import invalidate_available_drivers
+from .models import Driver, DriverTraining, DriverViolation
+
+VIOLATION_SCORE_FIELDS = ['driver_id', 'violation_date', 'severity', 'is_resolved']
+SHIPMENT_DUTY_FIELDS = ['assigned_driver_id', 'actual_pickup', 'actual_delivery']
+
+
+def _snapshot(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+@receiver(post_save, sender=Driver)
+def driver_saved(sender, instance, **kwargs):
+    """License and certificate dates feed the compliance row and availability"""
+    compliance.scan([instance.pk])
+    invalidate_available_drivers()
+
+
+@receiver(post_delete, sender=Driver)
+def driver_deleted(sender, instance, **kwargs):
+    invalidate_available_drivers()
+
+
+@receiver([post_save, post_delete], sender=Shipment)
+def shipment_changed(sender, instance, **kwargs):
+    """Shipment assignment and status changes commit or release drivers"""
+    invalidate_available_drivers()
+
+
+@receiver(pre_save, sender=Shipment)
+def shipment_saving(sender, instance, **kwargs):
+    """Remember the stored pickup and delivery times to detect transitions"""
+    instance._duty_previous = None
+    if instance.pk is not None:
+        instance._duty_previous = sender.objects.filter(pk=instance.pk).values(*SHIPMENT_DUTY_FIELDS).first()
+
+
+@receiver(post_save, sender=Shipment)
+def shipment_duty_changed(sender, instance, **kwargs):
+    """Pickup opens the driver's duty period, delivery records the hours driven"""
+    if instance.assigned_driver_id is None or instance.actual_pickup is None:
+        return
+    previous = getattr(instance, '_duty_previous', None) or {}
+    if instance.actual_delivery is not None and previous.get('actual_delivery') is None:
+        hours.end_duty(instance.assigned_driver_id, instance.actual_pickup, instance.actual_delivery)
+    elif instance.actual_delivery is None and previous.get('actual_pickup') is None:
+        hours.start_duty(instance.assigned_driver_id, instance.actual_pickup)
+
+
+@receiver([post_save, post_delete], sender=DriverTraining)
+def training_changed(sender, instance, origin=None, **kwargs):
+    """Skip the rescan when the whole driver is being deleted"""
+    if isinstance(origin, Driver):
+        return
+    compliance.scan([instance.driver_id])
+
+
+@receiver(pre_save, sender=DriverViolation)
+def violation_saving(sender, instance, **kwargs):
+    """Remember the stored values of an edited violation so its weight can be reversed"""
+    instance._score_previous = None
+    if instance.pk is not None:
+        instance._score_previous = sender.objects.filter(pk=instance.pk).values(*VIOLATION_SCORE_FIELDS).first()
+
+
+@receiver(post_save, sender=DriverViolation)
+def violation_saved(sender, instance, **kwargs):
+    """New, edited and resolved violations move the driver's score and fleet ratings"""
+    previous = getattr(instance, '_score_previous', None)
+    current = _snapshot(instance, VIOLATION_SCORE_FIELDS)
+    if previous == current:
+        return
+    if previous:
+        safety.apply_violation(previous, -1)
+    safety.apply_violation(current)
+    safety.refresh_driver_fleets({instance.driver_id, previous['driver_id']} if previous else {instance.driver_id})
+
+
+@receiver(post_delete, sender=DriverViolation)
+def violation_deleted(sender, instance, origin=None, **kwargs):
+    """Skip the score update when the whole driver is being deleted"""
+    if isinstance(origin, Driver):
+        return
+    safety.apply_violation(_snapshot(instance, VIOLATION_SCORE_FIELDS), -1)
+    safety.refresh_driver_fleets([instance.driver_id])
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from . import payroll
+from .availability import available_driver_ids, eligible_driver_ids
+from .models import Driver, DriverHoursOfService
+
+
+class ComputePayTests(SimpleTestCase):
+    """Payroll arithmetic on PAYROLL_SQL-shaped rows"""
+
+    week = payroll.WEEK_SECONDS
+
+    def _pay(self, rows, threshold=40):
+        pay = payroll.compute_pay(rows, (0, self.week), self.week, threshold, 1.5)
+        return {int(driver): hours for driver, hours in zip(pay['driver_id'], pay['hours_worked'])}
+
+    def test_drivers_meeting_at_the_window_edge_are_not_merged(self):
+        # Driver 1 works up to the window end, driver 2 from the window start
+        hours = self._pay([(1, 10, 100.0, float(self.week), True), (2, 20, 0.0, 18000.0, True)])
+
+        self.assertEqual(hours, {1: round((self.week - 100) / 3600, 2), 2: 5.0})
+
+    def test_overlapping_shipments_are_paid_once(self):
+        hours = self._pay([(1, 10, 0.0, 7200.0, True), (1, 10, 3600.0, 10800.0, True)])
+
+        self.assertEqual(hours, {1: 3.0})
+
+
+class AvailableDriversCacheTests(TestCase):
+    """Hours-of-service limits apply live on top of the cached eligible list"""
+
+    def setUp(self):
+        cache.clear()
+        self.driver = Driver.objects.create(
+            name='Ada Driver', email='ada@example.com', phone_number='+15550100', license_number='L-1',
+            license_issue_date=date(2020, 1, 1), license_expiry_date=timezone.now().date() + timedelta(days=365),
+            employment_date=date(2020, 1, 1),
+        )
+
+    def test_duty_running_past_the_limit_is_seen_without_invalidation(self):
+        self.assertEqual(available_driver_ids(), [self.driver.id])
+
+        # The open duty period accrues by the clock; no signal fires for it
+        now = timezone.now()
+        DriverHoursOfService.objects.create(
+            driver=self.driver, on_duty_since=now - timedelta(hours=DriverHoursOfService.DAILY_LIMIT_HOURS + 1)
+        )
+
+        self.assertEqual(eligible_driver_ids(now), [self.driver.id])
+        self.assertEqual(available_driver_ids(now), [])
@@ -0,0 +1,109 @@
+"""
+Driver activity timeline.
+
+Violations, trainings and shipments are merged newest first. Each source is
+read through its own (driver, date, id) index in descending order, starting
+just past the page cursor and limited to one page, and the sorted streams
+are k-way merged. Every page therefore costs the same, however deep it is.
+
+Events are ordered by (moment, kind, id). Date-only sources are placed at
+midnight UTC, and ties at the same moment are broken by kind so the cursor
+is unambiguous across sources.
+"""
+import heapq
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import models
+from django.utils.dateparse import parse_datetime
+
+from fleetflow.apps.common.pagination import RowValue
+from fleetflow.apps.logistics.models import Shipment
+
+from .models import DriverTraining, DriverViolation
+
+
+class Source:
+    """One stream of timeline events for a driver"""
+
+    def __init__(self, kind, rank, queryset, driver_field, moment_field):
+        self.kind = kind
+        self.rank = rank
+        self.queryset = queryset
+        self.driver_field = driver_field
+        self.moment_field = moment_field
+        self.is_date = not isinstance(queryset.model._meta.get_field(moment_field), models.DateTimeField)
+
+    def moment(self, obj):
+        value = getattr(obj, self.moment_field)
+        if self.is_date:
+            return datetime.combine(value, time.min, tzinfo=dt_timezone.utc)
+        return value
+
+    def _bound(self, moment, inclusive):
+        """The moment field's bound equivalent to moment <(=) cursor"""
+        if not self.is_date:
+            return moment
+        moment = moment.astimezone(dt_timezone.utc)
+        day = moment.date()
+        if inclusive or moment.time() == time.min:
+            return day
+        return day + timedelta(days=1)
+
+    def after(self, queryset, cursor):
+        """Events strictly after the cursor in descending timeline order"""
+        moment, kind, object_id = cursor
+        cursor_rank = SOURCE_RANKS[kind]
+        if self.rank < cursor_rank:
+            return queryset.filter(**{f'{self.moment_field}__lte': self._bound(moment, inclusive=True)})
+        if self.rank > cursor_rank:
+            return queryset.filter(**{f'{self.moment_field}__lt': self._bound(moment, inclusive=False)})
+        return queryset.alias(
+            keyset=RowValue(models.F(self.moment_field), models.F('id'))
+        ).filter(keyset__lt=RowValue(models.Value(self._bound(moment, inclusive=True)), models.Value(object_id)))
+
+    def fetch(self, driver_id, cursor, limit):
+        queryset = self.queryset.filter(**{self.driver_field: driver_id})
+        if cursor is not None:
+            queryset = self.after(queryset, cursor)
+        rows = queryset.order_by(f'-{self.moment_field}', '-id')[:limit]
+        return [(self.moment(obj), self.rank, obj.id, self.kind, obj) for obj in rows]
+
+
+SOURCES = [
+    Source('training', 0, DriverTraining.objects.all(), 'driver', 'training_date'),
+    Source('violation', 1, DriverViolation.objects.all(), 'driver', 'violation_date'),
+    Source('shipment', 2, Shipment.objects.select_related('assigned_vehicle', 'assigned_driver'), 'assigned_driver', 'scheduled_pickup'),
+]
+SOURCE_RANKS = {source.kind: source.rank for source in SOURCES}
+
+
+def parse_cursor(values):
+    """(moment, kind, id) from decoded cursor values, or None if malformed"""
+    try:
+        moment, kind, object_id = values
+        # Well-formed but out-of-range values such as month 13 raise ValueError
+        moment = parse_datetime(moment) if isinstance(moment, str) else None
+    except (TypeError, ValueError):
+        return None
+    if moment is None or moment.tzinfo is None or not isinstance(kind, str) or kind not in SOURCE_RANKS:
+        return None
+    if not isinstance(object_id, int):
+        return None
+    return moment, kind, object_id
+
+
+def page(driver_id, cursor, page_size):
+    """
+    One page of events after the cursor as (moment, kind, obj) tuples, and
+    the cursor values for the next page (None on the last page).
+    """
+    streams = [source.fetch(driver_id, cursor, page_size + 1) for source in SOURCES]
+    merged = heapq.merge(*streams, key=lambda event: event[:3], reverse=True)
+    events = [event for _, event in zip(range(page_size + 1), merged)]
+
+    next_cursor = None
+    if len(events) > page_size:
+        events = events[:page_size]
+        moment, _, object_id, kind, _ = events[-1]
+        next_cursor = [moment.isoformat(), kind, object_id]
+    return [(moment, kind, obj) for moment, _, _, kind, obj in events], next_cursor
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DriverViewSet, DriverViolationViewSet, DriverTrainingViewSet
+from .views import DriverViewSet, DriverViolationViewSet, DriverTrainingViewSet, DriverPayrollSummaryViewSet
 
 app_name = 'drivers'
 
 router = DefaultRouter()
+# Registered ahead of the driver routes so 'payroll' isn't read as a driver ID
+router.register(r'payroll', DriverPayrollSummaryViewSet, basename='payroll')
 router.register(r'', DriverViewSet, basename='driver')
 router.register(r'violations', DriverViolationViewSet, basename='violation')
 router.register(r'trainings', DriverTrainingViewSet, basename='training')
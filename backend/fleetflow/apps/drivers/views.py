@@ -3,10 +3,24 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Count, Sum
+from django.utils import timezone
 
-from .models import Driver, DriverViolation, DriverTraining
-from .serializers import DriverSerializer, DriverListSerializer, DriverViolationSerializer, DriverTrainingSerializer
+from fleetflow.apps.common.filters import TrigramSearchFilter
+from fleetflow.apps.common.pagination import KeysetPagination
+from fleetflow.apps.logistics.serializers import ShipmentListSerializer
+
+from . import compliance, timeline
+from .availability import available_driver_ids
+from .filters import DriverFilter
+from .models import Driver, DriverViolation, DriverTraining, DriverHoursOfService, DriverPayrollSummary
+from .serializers import (
+    DriverSerializer, DriverListSerializer, DriverViolationSerializer, DriverTrainingSerializer,
+    DriverComplianceSerializer, DriverPayrollSummarySerializer,
+)
 
 
 class DriverViewSet(viewsets.ModelViewSet):
@@ -14,22 +28,35 @@ class DriverViewSet(viewsets.ModelViewSet):
     ViewSet for managing drivers.
     
     Available endpoints:
-    - GET /api/drivers/ - List all drivers
+    - GET /api/drivers/ - List all drivers (?is_available=, ?is_license_valid=)
     - GET /api/drivers/{id}/ - Get driver details
     - POST /api/drivers/ - Create new driver
     - PUT /api/drivers/{id}/ - Update driver
     - DELETE /api/drivers/{id}/ - Delete driver
     - GET /api/drivers/available/ - Get available drivers
+    - GET /api/drivers/expiring/?days=N - Drivers with a compliance item expiring within N days
+    - GET /api/drivers/{id}/timeline/ - Violations, trainings and shipments, newest first (?cursor=)
+    - GET /api/drivers/{id}/hours/ - Hours driven and remaining in the trailing 24h and 7d
     """
     queryset = Driver.objects.all()
     serializer_class = DriverSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['status', 'license_status', 'license_class']
+    filter_backends = [DjangoFilterBackend, OrderingFilter, TrigramSearchFilter]
+    filterset_class = DriverFilter
     search_fields = ['name', 'email', 'license_number', 'phone_number']
     ordering_fields = ['created_at', 'name', 'license_expiry_date']
     ordering = ['-created_at']
 
+    max_expiring_days = 3660
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.with_computed()
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('safety_score').with_computed('is_available')
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return DriverListSerializer
@@ -37,10 +64,28 @@ class DriverViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """Get all available drivers"""
-        available_drivers = self.queryset.filter(status='active', license_status='valid')
-        serializer = DriverSerializer(available_drivers, many=True)
-        return Response(serializer.data)
+        """Get available drivers, by name"""
+        page_ids = self.paginate_queryset(available_driver_ids())
+        drivers = Driver.objects.with_computed().in_bulk(page_ids)
+        page = [drivers[driver_id] for driver_id in page_ids if driver_id in drivers]
+        serializer = DriverListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """Get drivers whose next compliance event is within N days"""
+        try:
+            days = int(request.query_params.get('days', 30))
+            if days < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'days must be a non-negative number'}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(days, self.max_expiring_days)
+
+        rows = compliance.expiring(days).select_related('driver').order_by('next_event_date', 'driver_id')
+        page = self.paginate_queryset(rows)
+        serializer = DriverComplianceSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def add_violation(self, request, pk=None):
@@ -78,6 +123,53 @@ class DriverViewSet(viewsets.ModelViewSet):
         serializer = DriverTrainingSerializer(trainings, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def hours(self, request, pk=None):
+        """Get hours driven and remaining under the hours-of-service limits"""
+        driver = self.get_object()
+        now = timezone.now()
+        row = DriverHoursOfService.objects.filter(driver=driver).first() or DriverHoursOfService(driver=driver)
+        return Response({
+            'driver': driver.id,
+            'on_duty_since': row.on_duty_since,
+            'driven_hours': {
+                name: round(row.get_driven_hours(window_hours, now), 2)
+                for name, window_hours, _ in DriverHoursOfService.WINDOWS
+            },
+            'remaining_hours': row.get_remaining_hours(now),
+        })
+
+    timeline_serializers = {
+        'violation': DriverViolationSerializer,
+        'training': DriverTrainingSerializer,
+        'shipment': ShipmentListSerializer,
+    }
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Get the driver's merged activity timeline, keyset paginated"""
+        driver = self.get_object()
+        paginator = KeysetPagination()
+        page_size = paginator.get_page_size(request)
+
+        cursor = request.query_params.get(paginator.cursor_query_param)
+        if cursor:
+            cursor = timeline.parse_cursor(paginator.decode_values(cursor, 3))
+            if cursor is None:
+                raise NotFound(paginator.invalid_cursor_message)
+
+        events, next_cursor = timeline.page(driver.id, cursor or None, page_size)
+        results = [
+            {'type': kind, 'timestamp': moment, 'data': self.timeline_serializers[kind](obj).data}
+            for moment, kind, obj in events
+        ]
+        next_link = None
+        if next_cursor is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), paginator.cursor_query_param, paginator.encode_cursor(next_cursor)
+            )
+        return Response({'next': next_link, 'results': results})
+
 
 class DriverViolationViewSet(viewsets.ModelViewSet):
     """ViewSet for driver violations"""
@@ -99,3 +191,39 @@ class DriverTrainingViewSet(viewsets.ModelViewSet):
     filterset_fields = ['driver', 'training_type']
     ordering_fields = ['training_date', 'expiry_date']
     ordering = ['-training_date']
+
+
+class DriverPayrollSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only payroll period summaries, written by the run_payroll command.
+
+    - GET /api/drivers/payroll/?period_start=&driver= - List summaries
+    - GET /api/drivers/payroll/totals/?period_start=YYYY-MM-DD - Totals per period
+    """
+    queryset = DriverPayrollSummary.objects.select_related('driver')
+    serializer_class = DriverPayrollSummarySerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['driver', 'period_start', 'period_end']
+    ordering_fields = ['period_start', 'total_pay', 'hours_worked']
+    ordering = ['-period_start', 'driver']
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        """Get pay and hours totals per payroll period"""
+        totals = (
+            self.filter_queryset(self.get_queryset())
+            .order_by('-period_start', '-period_end')
+            .values('period_start', 'period_end')
+            .annotate(
+                driver_count=Count('id'),
+                shipment_count=Sum('shipment_count'),
+                hours_worked=Sum('hours_worked'),
+                overtime_hours=Sum('overtime_hours'),
+                regular_pay=Sum('regular_pay'),
+                overtime_pay=Sum('overtime_pay'),
+                total_pay=Sum('total_pay'),
+            )
+        )
+        page = self.paginate_queryset(totals)
+        return self.get_paginated_response(page)
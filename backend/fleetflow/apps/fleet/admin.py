@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Fleet, FleetVehicleAssignment, FleetDriverAssignment, FleetPerformanceMetrics
+from .models import Fleet, FleetVehicleAssignment, FleetDriverAssignment, FleetPerformanceMetrics, FleetMetricsSnapshot
 
 
 @admin.register(Fleet)
@@ -7,7 +7,7 @@ class FleetAdmin(admin.ModelAdmin):
     list_display = ['name', 'status', 'total_vehicles', 'total_drivers', 'manager_name', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['name', 'manager_name', 'headquarters']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['total_vehicles', 'total_drivers', 'created_at', 'updated_at']
 
 
 @admin.register(FleetVehicleAssignment)
@@ -30,3 +30,10 @@ class FleetPerformanceMetricsAdmin(admin.ModelAdmin):
     list_filter = ['last_updated']
     search_fields = ['fleet__name']
     readonly_fields = ['last_updated']
+
+
+@admin.register(FleetMetricsSnapshot)
+class FleetMetricsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['fleet', 'snapshot_date', 'total_vehicles', 'total_drivers', 'total_trips', 'safety_rating']
+    list_filter = ['snapshot_date']
+    search_fields = ['fleet__name']
@@ -5,3 +5,6 @@ class FleetConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fleetflow.apps.fleet'
     verbose_name = 'Fleet Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,138 @@
+"""
+Bulk fleet membership changes.
+
+Assigning or removing a list of vehicles or drivers costs a fixed handful of
+queries however long the list is: one lookup of the records and their
+existing assignments, one UPDATE to reactivate or deactivate, and one
+INSERT ... ON CONFLICT DO NOTHING against the (fleet, member)
+unique_together. The INSERT returns the members it actually added, so rows a
+concurrent single assignment created first aren't counted twice. Every ID
+gets its own outcome in the result.
+
+Fleets store their active assignment counts in total_vehicles and
+total_drivers. Single saves and deletes adjust them from the assignment
+signals; bulk writes skip those signals, so they lock the fleet row, apply
+the net change with one F() update, move the members' contribution to the
+performance metrics in one pass and refresh the safety rating once when
+drivers changed.
+"""
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from fleetflow.apps.drivers import safety
+
+from . import metrics
+from .models import Fleet, FleetDriverAssignment, FleetVehicleAssignment
+
+MEMBERS = {
+    'vehicle': (FleetVehicleAssignment, 'vehicles.Vehicle'),
+    'driver': (FleetDriverAssignment, 'drivers.Driver'),
+}
+
+INSERT_SQL = """
+INSERT INTO {table} (fleet_id, {field}, assignment_date, is_active)
+SELECT %s, member_id, %s, TRUE FROM unnest(%s::bigint[]) AS member_id
+ON CONFLICT (fleet_id, {field}) DO NOTHING
+RETURNING {field}
+"""
+
+TOTAL_FIELDS = {
+    FleetVehicleAssignment: 'total_vehicles',
+    FleetDriverAssignment: 'total_drivers',
+}
+
+
+def adjust_total(assignment_model, fleet_id, delta):
+    """Move a fleet's stored total for an assignment type by `delta`"""
+    if delta:
+        field = TOTAL_FIELDS[assignment_model]
+        Fleet.objects.filter(pk=fleet_id).update(**{field: F(field) + delta})
+
+
+def _lock_fleet(fleet):
+    """Serialize bulk changes to one fleet so their counts stay exact"""
+    Fleet.objects.select_for_update().filter(pk=fleet.pk).values_list('pk', flat=True).first()
+
+
+def _insert(fleet, assignment_model, field, member_ids):
+    """Create active assignments, skipping existing ones. Returns the member IDs inserted"""
+    sql = INSERT_SQL.format(table=assignment_model._meta.db_table, field=field)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [fleet.id, timezone.now().date(), member_ids])
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _after_change(fleet, kind, assignment_model, member_ids, sign):
+    adjust_total(assignment_model, fleet.id, sign * len(member_ids))
+    metrics.apply_membership(fleet.id, kind, member_ids, sign)
+    if kind == 'driver':
+        safety.refresh_fleet_ratings([fleet.id])
+
+
+def assign(fleet, kind, ids):
+    """
+    Assign records of `kind` to the fleet. Returns {id: outcome}, where the
+    outcome is 'assigned', 'reactivated', 'already_assigned' or 'not_found'.
+    A record assigned concurrently between the lookup and the insert counts
+    as 'already_assigned'.
+    """
+    assignment_model, member_label = MEMBERS[kind]
+    field = f'{kind}_id'
+    ids = list(dict.fromkeys(ids))
+
+    with transaction.atomic():
+        _lock_fleet(fleet)
+        found = set(apps.get_model(member_label).objects.filter(id__in=ids).values_list('id', flat=True))
+        existing = dict(
+            assignment_model.objects.filter(fleet=fleet, **{f'{field}__in': found}).values_list(field, 'is_active')
+        )
+        inactive = [member_id for member_id, is_active in existing.items() if not is_active]
+        new = [member_id for member_id in ids if member_id in found and member_id not in existing]
+
+        if inactive:
+            assignment_model.objects.filter(fleet=fleet, **{f'{field}__in': inactive}).update(
+                is_active=True, removal_date=None
+            )
+        # Single assign endpoints don't take the fleet lock, so some of `new` may exist by now
+        inserted = _insert(fleet, assignment_model, field, new) if new else set()
+        added = inactive + [member_id for member_id in new if member_id in inserted]
+        if added:
+            _after_change(fleet, kind, assignment_model, added, 1)
+
+    outcomes = {}
+    for member_id in ids:
+        if member_id not in found:
+            outcomes[member_id] = 'not_found'
+        elif member_id not in existing:
+            outcomes[member_id] = 'assigned' if member_id in inserted else 'already_assigned'
+        elif existing[member_id]:
+            outcomes[member_id] = 'already_assigned'
+        else:
+            outcomes[member_id] = 'reactivated'
+    return outcomes
+
+
+def remove(fleet, kind, ids):
+    """
+    Deactivate the fleet's assignments of records of `kind`, stamping their
+    removal_date. Returns {id: outcome}: 'removed' or 'not_assigned'.
+    """
+    assignment_model, _ = MEMBERS[kind]
+    field = f'{kind}_id'
+    ids = list(dict.fromkeys(ids))
+
+    with transaction.atomic():
+        _lock_fleet(fleet)
+        active = assignment_model.objects.select_for_update().filter(
+            fleet=fleet, is_active=True, **{f'{field}__in': ids}
+        )
+        removed = set(active.values_list(field, flat=True))
+        if removed:
+            assignment_model.objects.filter(fleet=fleet, is_active=True, **{f'{field}__in': removed}).update(
+                is_active=False, removal_date=timezone.now().date()
+            )
+            _after_change(fleet, kind, assignment_model, removed, -1)
+
+    return {member_id: 'removed' if member_id in removed else 'not_assigned' for member_id in ids}
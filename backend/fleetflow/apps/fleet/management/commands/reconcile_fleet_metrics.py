@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.fleet.metrics import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute fleet performance metrics from the source tables and report drift from the stored totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Overwrite drifted totals with the recomputed values")
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=options['fix'])
+        for fleet_id, differences in sorted(drift.items()):
+            if not differences:
+                self.stdout.write(f"Fleet {fleet_id}: metrics row missing")
+            for field, (stored, expected) in differences.items():
+                self.stdout.write(f"Fleet {fleet_id}: {field} stored {stored}, expected {expected}")
+        verb = "Fixed" if options['fix'] else "Found"
+        self.stdout.write(self.style.SUCCESS(f"{verb} drift in {len(drift)} fleets"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.fleet.models import Fleet
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored fleet vehicle and driver totals from the assignment tables"
+
+    def handle(self, *args, **options):
+        fleets = Fleet.objects.recount_totals()
+        self.stdout.write(self.style.SUCCESS(f"Recounted totals for {fleets} fleets"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.fleet.metrics import UTILIZATION_WINDOW_DAYS, refresh_utilization
+
+
+class Command(BaseCommand):
+    help = "Recompute each fleet's average vehicle utilization over a trailing window; run daily"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=UTILIZATION_WINDOW_DAYS, help="Window length in days")
+
+    def handle(self, *args, **options):
+        fleets = refresh_utilization(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Updated utilization for {fleets} fleets"))
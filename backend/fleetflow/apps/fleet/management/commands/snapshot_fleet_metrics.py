@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from fleetflow.apps.fleet.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Snapshot every fleet's performance metrics for a day (today by default); run daily"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Snapshot date as YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+        rows = take_snapshot(day)
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted metrics for {rows} fleets"))
@@ -0,0 +1,243 @@
+"""
+Fleet performance metrics.
+
+A fleet's FleetPerformanceMetrics totals cover its active members: trips,
+revenue, distance, fuel and maintenance of its vehicles, and violations and
+accidents of its drivers. They are kept current with deltas:
+
+- source row changes (delivered shipments, invoices, fuel and maintenance
+  logs, odometer distance, violations) add their signed contribution to the
+  fleets their vehicle or driver is active in
+- assignment changes add or remove the member's whole contribution
+
+Every delta is one F() UPDATE of the affected metrics rows. `reconcile()`
+recomputes every fleet's totals from the source tables in one set-based
+query and reports (and optionally repairs) any drift.
+
+average_utilization_rate is not a sum, so it is refreshed separately by
+`refresh_utilization()`: the mean busy percentage of each fleet's active
+vehicles over a trailing window.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from fleetflow.apps.vehicles import utilization
+
+from .models import Fleet, FleetDriverAssignment, FleetPerformanceMetrics, FleetVehicleAssignment
+
+UTILIZATION_WINDOW_DAYS = 30
+
+# Invoice statuses that count as revenue
+REVENUE_STATUSES = ['issued', 'paid', 'overdue']
+
+VEHICLE_FIELDS = (
+    'total_trips', 'total_km_traveled', 'total_fuel_consumed',
+    'total_revenue', 'total_fuel_cost', 'total_maintenance_cost',
+)
+DRIVER_FIELDS = ('total_violations', 'total_accidents')
+METRIC_FIELDS = VEHICLE_FIELDS + DRIVER_FIELDS
+
+MEMBERS = {
+    'vehicle': (FleetVehicleAssignment, VEHICLE_FIELDS),
+    'driver': (FleetDriverAssignment, DRIVER_FIELDS),
+}
+
+TOTALS_SQL = """
+WITH vehicle_members AS ({vehicle_members}),
+driver_members AS ({driver_members}),
+trips AS (
+    SELECT assigned_vehicle_id AS vehicle_id, COUNT(*) AS total_trips
+    FROM shipments
+    WHERE status = 'delivered' AND assigned_vehicle_id IN (SELECT vehicle_id FROM vehicle_members)
+    GROUP BY 1
+),
+revenue AS (
+    SELECT s.assigned_vehicle_id AS vehicle_id, SUM(i.total_amount) AS total_revenue
+    FROM invoices i
+    JOIN shipments s ON s.id = i.shipment_id
+    WHERE i.status = ANY(%(revenue_statuses)s) AND s.assigned_vehicle_id IN (SELECT vehicle_id FROM vehicle_members)
+    GROUP BY 1
+),
+fuel AS (
+    SELECT vehicle_id, SUM(fuel_amount) AS total_fuel_consumed, SUM(cost) AS total_fuel_cost
+    FROM vehicle_fuel_logs
+    WHERE vehicle_id IN (SELECT vehicle_id FROM vehicle_members)
+    GROUP BY 1
+),
+maintenance AS (
+    SELECT vehicle_id, SUM(cost) AS total_maintenance_cost
+    FROM vehicle_maintenance_logs
+    WHERE vehicle_id IN (SELECT vehicle_id FROM vehicle_members)
+    GROUP BY 1
+),
+distance AS (
+    SELECT vehicle_id, SUM(km_driven) AS total_km_traveled
+    FROM vehicle_cost_rollups
+    WHERE vehicle_id IN (SELECT vehicle_id FROM vehicle_members)
+    GROUP BY 1
+),
+vehicle_side AS (
+    SELECT m.fleet_id,
+           COALESCE(SUM(t.total_trips), 0) AS total_trips,
+           COALESCE(SUM(d.total_km_traveled), 0) AS total_km_traveled,
+           COALESCE(SUM(f.total_fuel_consumed), 0) AS total_fuel_consumed,
+           COALESCE(SUM(r.total_revenue), 0) AS total_revenue,
+           COALESCE(SUM(f.total_fuel_cost), 0) AS total_fuel_cost,
+           COALESCE(SUM(mt.total_maintenance_cost), 0) AS total_maintenance_cost
+    FROM vehicle_members m
+    LEFT JOIN trips t USING (vehicle_id)
+    LEFT JOIN revenue r USING (vehicle_id)
+    LEFT JOIN fuel f USING (vehicle_id)
+    LEFT JOIN maintenance mt USING (vehicle_id)
+    LEFT JOIN distance d USING (vehicle_id)
+    GROUP BY m.fleet_id
+),
+driver_side AS (
+    SELECT m.fleet_id,
+           COUNT(v.id) AS total_violations,
+           COUNT(v.id) FILTER (WHERE v.violation_type = 'accident') AS total_accidents
+    FROM driver_members m
+    LEFT JOIN driver_violations v ON v.driver_id = m.driver_id
+    GROUP BY m.fleet_id
+)
+SELECT COALESCE(vs.fleet_id, ds.fleet_id),
+       COALESCE(vs.total_trips, 0), COALESCE(vs.total_km_traveled, 0), COALESCE(vs.total_fuel_consumed, 0),
+       COALESCE(vs.total_revenue, 0), COALESCE(vs.total_fuel_cost, 0), COALESCE(vs.total_maintenance_cost, 0),
+       COALESCE(ds.total_violations, 0), COALESCE(ds.total_accidents, 0)
+FROM vehicle_side vs
+FULL JOIN driver_side ds ON ds.fleet_id = vs.fleet_id
+"""
+
+ACTIVE_MEMBERS_SQL = 'SELECT fleet_id, {member}_id FROM {table} WHERE is_active'
+GIVEN_MEMBERS_SQL = 'SELECT 0 AS fleet_id, unnest(%({member}_ids)s::bigint[]) AS {member}_id'
+NO_MEMBERS_SQL = 'SELECT NULL::bigint AS fleet_id, NULL::bigint AS {member}_id WHERE FALSE'
+
+
+def _totals(vehicle_members, driver_members, params):
+    """Run TOTALS_SQL, returning {fleet_id: {field: total}}"""
+    sql = TOTALS_SQL.format(vehicle_members=vehicle_members, driver_members=driver_members)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'revenue_statuses': REVENUE_STATUSES, **params})
+        return {row[0]: dict(zip(METRIC_FIELDS, row[1:])) for row in cursor.fetchall()}
+
+
+def member_totals(kind, member_ids):
+    """Combined contribution of the given vehicles or drivers to a fleet's metrics"""
+    members = {
+        'vehicle': NO_MEMBERS_SQL.format(member='vehicle'),
+        'driver': NO_MEMBERS_SQL.format(member='driver'),
+    }
+    members[kind] = GIVEN_MEMBERS_SQL.format(member=kind)
+    totals = _totals(members['vehicle'], members['driver'], {f'{kind}_ids': list(member_ids)})
+    return totals.get(0, {})
+
+
+def _apply(metrics, deltas, sign=1):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    metrics.update(
+        last_updated=timezone.now(),
+        **{field: F(field) + sign * value for field, value in deltas.items()},
+    )
+
+
+def apply_member_delta(kind, member_id, **deltas):
+    """Add signed deltas to the metrics of every fleet a vehicle or driver is active in"""
+    if member_id is None:
+        return
+    assignment_model, fields = MEMBERS[kind]
+    unknown = set(deltas) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown {kind} metric fields: {', '.join(sorted(unknown))}")
+    fleets = assignment_model.objects.filter(is_active=True, **{f'{kind}_id': member_id}).values('fleet_id')
+    _apply(FleetPerformanceMetrics.objects.filter(fleet_id__in=fleets), deltas)
+
+
+def apply_membership(fleet_id, kind, member_ids, sign=1):
+    """Add (sign=1) or remove (sign=-1) members' whole contribution to a fleet"""
+    member_ids = list(member_ids)
+    if member_ids:
+        _apply(FleetPerformanceMetrics.objects.filter(fleet_id=fleet_id), member_totals(kind, member_ids), sign)
+
+
+def remove_member(kind, member_id):
+    """Take a vehicle or driver about to be deleted out of its fleets' metrics"""
+    assignment_model, _ = MEMBERS[kind]
+    fleet_ids = list(
+        assignment_model.objects.filter(is_active=True, **{f'{kind}_id': member_id}).values_list('fleet_id', flat=True)
+    )
+    if fleet_ids:
+        _apply(FleetPerformanceMetrics.objects.filter(fleet_id__in=fleet_ids), member_totals(kind, [member_id]), -1)
+
+
+def reconcile(fix=False):
+    """
+    Recompute every fleet's metrics from the source tables and compare them
+    with the stored totals. Returns {fleet_id: {field: (stored, expected)}}
+    for the fleets that drifted; with fix=True the stored rows are corrected
+    (and missing rows created).
+    """
+    zero = {field: 0 for field in METRIC_FIELDS}
+
+    with transaction.atomic():
+        # Locking the metrics rows first holds back deltas until the comparison is done
+        stored = {metrics.fleet_id: metrics for metrics in FleetPerformanceMetrics.objects.select_for_update()}
+        expected = _totals(
+            ACTIVE_MEMBERS_SQL.format(member='vehicle', table=FleetVehicleAssignment._meta.db_table),
+            ACTIVE_MEMBERS_SQL.format(member='driver', table=FleetDriverAssignment._meta.db_table),
+            {},
+        )
+        drift, changed, missing = {}, [], []
+        for fleet_id in Fleet.objects.values_list('id', flat=True):
+            totals = expected.get(fleet_id, zero)
+            metrics = stored.get(fleet_id)
+            if metrics is None:
+                metrics = FleetPerformanceMetrics(fleet_id=fleet_id)
+                missing.append(metrics)
+            differences = {
+                field: (getattr(metrics, field), totals[field])
+                for field in METRIC_FIELDS
+                if Decimal(getattr(metrics, field)) != Decimal(totals[field])
+            }
+            if differences or metrics.pk is None:
+                drift[fleet_id] = differences
+                for field, (_, value) in differences.items():
+                    setattr(metrics, field, value)
+                if metrics.pk is not None:
+                    changed.append(metrics)
+
+        if fix:
+            now = timezone.now()
+            for metrics in changed:
+                metrics.last_updated = now
+            FleetPerformanceMetrics.objects.bulk_update(changed, [*METRIC_FIELDS, 'last_updated'])
+            FleetPerformanceMetrics.objects.bulk_create(missing)
+    return drift
+
+
+def refresh_utilization(days=UTILIZATION_WINDOW_DAYS, now=None):
+    """
+    Set every fleet's average_utilization_rate to its active vehicles' mean
+    busy percentage over the last `days` days. Returns the number of fleets.
+    """
+    now = now or timezone.now()
+    members = {}
+    for fleet_id, vehicle_id in FleetVehicleAssignment.objects.filter(is_active=True).values_list('fleet_id', 'vehicle_id'):
+        members.setdefault(fleet_id, []).append(vehicle_id)
+    rates = utilization.utilization(
+        {vehicle_id for vehicle_ids in members.values() for vehicle_id in vehicle_ids}, now - timedelta(days=days), now, now
+    )
+
+    fleets = list(FleetPerformanceMetrics.objects.all())
+    for metrics in fleets:
+        vehicle_ids = members.get(metrics.fleet_id, [])
+        average = sum(rates[vehicle_id] for vehicle_id in vehicle_ids) / len(vehicle_ids) if vehicle_ids else 0
+        metrics.average_utilization_rate = Decimal(100 * average).quantize(Decimal('0.01'))
+        metrics.last_updated = now
+    FleetPerformanceMetrics.objects.bulk_update(fleets, ['average_utilization_rate', 'last_updated'])
+    return len(fleets)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:50
+
+from django.db import migrations
+
+BACKFILL_SQL = """
+UPDATE fleets f SET
+    total_vehicles = (SELECT COUNT(*) FROM fleet_vehicle_assignments a WHERE a.fleet_id = f.id AND a.is_active),
+    total_drivers = (SELECT COUNT(*) FROM fleet_driver_assignments a WHERE a.fleet_id = f.id AND a.is_active)
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
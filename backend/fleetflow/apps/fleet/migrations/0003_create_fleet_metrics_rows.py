@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:53
+
+from django.db import migrations
+
+# Metrics rows are created with their fleets from now on; give existing fleets
+# one too. `manage.py reconcile_fleet_metrics --fix` then fills in the totals.
+CREATE_SQL = """
+INSERT INTO fleet_performance_metrics (
+    fleet_id, total_trips, total_km_traveled, total_fuel_consumed, total_revenue, total_fuel_cost,
+    total_maintenance_cost, total_violations, total_accidents, safety_rating,
+    average_utilization_rate, on_time_delivery_rate, last_updated
+)
+SELECT f.id, 0, 0, 0, 0, 0, 0, 0, 0, 5, 0, 100, NOW()
+FROM fleets f
+WHERE NOT EXISTS (SELECT 1 FROM fleet_performance_metrics m WHERE m.fleet_id = f.id)
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0002_backfill_fleet_totals'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, migrations.RunSQL.noop),
+    ]
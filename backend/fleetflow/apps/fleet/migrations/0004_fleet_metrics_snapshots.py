@@ -0,0 +1,69 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+# Partitions are range-partitioned by month and created on demand by
+# fleet.snapshots.ensure_partition. Primary and unique keys must include the
+# partition key.
+CREATE_SQL = """
+CREATE TABLE fleet_metrics_snapshots (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    fleet_id bigint NOT NULL REFERENCES fleets (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    snapshot_date date NOT NULL,
+    total_vehicles integer NOT NULL DEFAULT 0,
+    total_drivers integer NOT NULL DEFAULT 0,
+    total_trips integer NOT NULL DEFAULT 0,
+    total_km_traveled numeric(12, 2) NOT NULL DEFAULT 0,
+    total_fuel_consumed numeric(10, 2) NOT NULL DEFAULT 0,
+    total_revenue numeric(12, 2) NOT NULL DEFAULT 0,
+    total_fuel_cost numeric(12, 2) NOT NULL DEFAULT 0,
+    total_maintenance_cost numeric(12, 2) NOT NULL DEFAULT 0,
+    total_violations integer NOT NULL DEFAULT 0,
+    total_accidents integer NOT NULL DEFAULT 0,
+    safety_rating numeric(3, 2) NOT NULL DEFAULT 5,
+    average_utilization_rate numeric(5, 2) NOT NULL DEFAULT 0,
+    on_time_delivery_rate numeric(5, 2) NOT NULL DEFAULT 100,
+    created_at timestamp with time zone NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, snapshot_date),
+    UNIQUE (fleet_id, snapshot_date)
+) PARTITION BY RANGE (snapshot_date)
+"""
+
+DROP_SQL = 'DROP TABLE fleet_metrics_snapshots'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0003_create_fleet_metrics_rows'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+        migrations.CreateModel(
+            name='FleetMetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('total_vehicles', models.IntegerField(default=0)),
+                ('total_drivers', models.IntegerField(default=0)),
+                ('total_trips', models.IntegerField(default=0)),
+                ('total_km_traveled', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_fuel_consumed', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_fuel_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_maintenance_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_violations', models.IntegerField(default=0)),
+                ('total_accidents', models.IntegerField(default=0)),
+                ('safety_rating', models.DecimalField(decimal_places=2, default=5, max_digits=3)),
+                ('average_utilization_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('on_time_delivery_rate', models.DecimalField(decimal_places=2, default=100, max_digits=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'fleet_metrics_snapshots',
+                'ordering': ['snapshot_date'],
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,6 +1,42 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 
+from fleetflow.apps.common.computed import ComputedFieldsQuerySet
+
+
+def _assignment_count(assignment_model, **conditions):
+    """Correlated subquery counting a fleet's active assignments"""
+    return Coalesce(
+        Subquery(
+            assignment_model.objects.filter(fleet=OuterRef('pk'), is_active=True, **conditions)
+            .order_by()
+            .values('fleet')
+            .annotate(value=Count('id'))
+            .values('value'),
+            output_field=models.IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+class FleetQuerySet(ComputedFieldsQuerySet):
+    """
+    Query helpers for fleet representations.
+    """
+    computed_fields = {
+        'active_vehicles_count': lambda: _assignment_count(FleetVehicleAssignment, vehicle__status='active'),
+        'active_drivers_count': lambda: _assignment_count(FleetDriverAssignment, driver__status='active'),
+    }
+
+    def recount_totals(self):
+        """Rebuild the stored total_vehicles/total_drivers from the assignment tables"""
+        return self.update(
+            total_vehicles=_assignment_count(FleetVehicleAssignment),
+            total_drivers=_assignment_count(FleetDriverAssignment),
+        )
+
 
 class Fleet(models.Model):
     """
@@ -22,7 +58,7 @@ class Fleet(models.Model):
     manager_email = models.EmailField(null=True, blank=True)
     manager_phone = models.CharField(max_length=20, null=True, blank=True)
 
-    # Statistics
+    # Statistics: active assignments, maintained by the assignment signals
     total_vehicles = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     total_drivers = models.IntegerField(default=0, validators=[MinValueValidator(0)])
 
@@ -30,6 +66,8 @@ class Fleet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FleetQuerySet.as_manager()
+
     class Meta:
         db_table = 'fleets'
         ordering = ['-created_at']
@@ -37,13 +75,13 @@ class Fleet(models.Model):
     def __str__(self):
         return self.name
 
-    def get_active_vehicles_count(self):
-        """Get count of active vehicles in fleet"""
-        return self.vehicles.filter(status='active').count()
+    def active_vehicles_count(self):
+        """Count of active vehicles in fleet (see FleetQuerySet.computed_fields)"""
+        return self.vehicle_assignments.filter(is_active=True, vehicle__status='active').count()
 
-    def get_active_drivers_count(self):
-        """Get count of active drivers in fleet"""
-        return self.drivers.filter(status='active').count()
+    def active_drivers_count(self):
+        """Count of active drivers in fleet (see FleetQuerySet.computed_fields)"""
+        return self.driver_assignments.filter(is_active=True, driver__status='active').count()
 
 
 class FleetVehicleAssignment(models.Model):
@@ -122,3 +160,39 @@ class FleetPerformanceMetrics(models.Model):
         if self.total_km_traveled > 0:
             return self.total_fuel_consumed / self.total_km_traveled
         return 0
+
+
+class FleetMetricsSnapshot(models.Model):
+    """
+    Daily copy of a fleet's counts and performance metrics, for trend queries.
+
+    The table is range-partitioned by month on snapshot_date (see migration
+    0004 and fleet.snapshots), so it is not managed by Django.
+    """
+    # The database cascades fleet deletes to the snapshots
+    fleet = models.ForeignKey(Fleet, on_delete=models.DO_NOTHING, related_name='metrics_snapshots')
+    snapshot_date = models.DateField()
+
+    total_vehicles = models.IntegerField(default=0)
+    total_drivers = models.IntegerField(default=0)
+    total_trips = models.IntegerField(default=0)
+    total_km_traveled = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_fuel_consumed = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_fuel_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_maintenance_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_violations = models.IntegerField(default=0)
+    total_accidents = models.IntegerField(default=0)
+    safety_rating = models.DecimalField(max_digits=3, decimal_places=2, default=5)
+    average_utilization_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    on_time_delivery_rate = models.DecimalField(max_digits=5, decimal_places=2, default=100)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        managed = False
+        db_table = 'fleet_metrics_snapshots'
+        ordering = ['snapshot_date']
+
+    def __str__(self):
+        return f"{self.fleet.name} metrics on {self.snapshot_date}"
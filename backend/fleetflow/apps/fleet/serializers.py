@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Fleet, FleetVehicleAssignment, FleetDriverAssignment, FleetPerformanceMetrics
+
+from fleetflow.apps.common.computed import ComputedField
+
+from .models import Fleet, FleetVehicleAssignment, FleetDriverAssignment, FleetPerformanceMetrics, FleetMetricsSnapshot
 
 
 class FleetPerformanceMetricsSerializer(serializers.ModelSerializer):
@@ -13,6 +16,14 @@ class FleetPerformanceMetricsSerializer(serializers.ModelSerializer):
         return obj.get_avg_fuel_consumption()
 
 
+class FleetMetricsSnapshotSerializer(serializers.ModelSerializer):
+    period = serializers.DateField(read_only=True)
+
+    class Meta:
+        model = FleetMetricsSnapshot
+        exclude = ['id', 'fleet', 'created_at']
+
+
 class FleetVehicleAssignmentSerializer(serializers.ModelSerializer):
     vehicle_info = serializers.SerializerMethodField()
 
@@ -39,8 +50,8 @@ class FleetSerializer(serializers.ModelSerializer):
     vehicle_assignments = FleetVehicleAssignmentSerializer(many=True, read_only=True)
     driver_assignments = FleetDriverAssignmentSerializer(many=True, read_only=True)
     performance_metrics = FleetPerformanceMetricsSerializer(read_only=True)
-    active_vehicles_count = serializers.SerializerMethodField()
-    active_drivers_count = serializers.SerializerMethodField()
+    active_vehicles_count = ComputedField()
+    active_drivers_count = ComputedField()
 
     class Meta:
         model = Fleet
@@ -51,18 +62,12 @@ class FleetSerializer(serializers.ModelSerializer):
             'active_drivers_count', 'vehicle_assignments', 'driver_assignments',
             'performance_metrics', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
-
-    def get_active_vehicles_count(self, obj):
-        return obj.get_active_vehicles_count()
-
-    def get_active_drivers_count(self, obj):
-        return obj.get_active_drivers_count()
+        read_only_fields = ['total_vehicles', 'total_drivers', 'created_at', 'updated_at']
 
 
 class FleetListSerializer(serializers.ModelSerializer):
-    active_vehicles_count = serializers.SerializerMethodField()
-    active_drivers_count = serializers.SerializerMethodField()
+    active_vehicles_count = ComputedField()
+    active_drivers_count = ComputedField()
 
     class Meta:
         model = Fleet
@@ -70,9 +75,3 @@ class FleetListSerializer(serializers.ModelSerializer):
             'id', 'name', 'status', 'total_vehicles', 'total_drivers',
             'active_vehicles_count', 'active_drivers_count', 'created_at'
         ]
-
-    def get_active_vehicles_count(self, obj):
-        return obj.get_active_vehicles_count()
-
-    def get_active_drivers_count(self, obj):
-        return obj.get_active_drivers_count()
@@ -0,0 +1,251 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from fleetflow.apps.drivers import safety
+from fleetflow.apps.drivers.models import Driver, DriverViolation
+from fleetflow.apps.logistics.models import Invoice, Shipment
+from fleetflow.apps.vehicles.models import Vehicle, VehicleFuelLog, VehicleMaintenanceLog
+
+from . import metrics
+from .assignments import adjust_total
+from .models import Fleet, FleetDriverAssignment, FleetPerformanceMetrics, FleetVehicleAssignment
+
+ASSIGNMENT_KINDS = {FleetVehicleAssignment: 'vehicle', FleetDriverAssignment: 'driver'}
+
+SHIPMENT_METRIC_FIELDS = ['assigned_vehicle_id', 'status']
+INVOICE_METRIC_FIELDS = ['shipment_id', 'status', 'total_amount']
+FUEL_LOG_METRIC_FIELDS = ['vehicle_id', 'fuel_amount', 'cost']
+MAINTENANCE_LOG_METRIC_FIELDS = ['vehicle_id', 'cost']
+VIOLATION_METRIC_FIELDS = ['driver_id', 'violation_type']
+
+
+def _snapshot(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _stash_previous(sender, instance, fields):
+    """Remember the stored values of an edited row so its contribution can be reversed"""
+    instance._metrics_previous = None
+    if instance.pk is not None:
+        instance._metrics_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _changes(instance, fields):
+    """(previous, current) snapshots, or None when nothing tracked changed"""
+    previous = getattr(instance, '_metrics_previous', None)
+    current = _snapshot(instance, fields)
+    if previous == current:
+        return None
+    return previous, current
+
+
+@receiver(post_save, sender=Fleet)
+def fleet_saved(sender, instance, created, **kwargs):
+    """Every fleet has a metrics row for deltas to land in"""
+    if created:
+        FleetPerformanceMetrics.objects.get_or_create(fleet=instance)
+
+
+@receiver([post_save, post_delete], sender=FleetDriverAssignment)
+def driver_assignment_changed(sender, instance, origin=None, **kwargs):
+    """The fleet's safety rating averages its active drivers"""
+    if isinstance(origin, Fleet):
+        return
+    safety.refresh_fleet_ratings([instance.fleet_id])
+
+
+@receiver(pre_save, sender=FleetVehicleAssignment)
+@receiver(pre_save, sender=FleetDriverAssignment)
+def assignment_saving(sender, instance, **kwargs):
+    """Remember an edited assignment's stored fleet and state so the totals can be moved"""
+    instance._total_previous = None
+    if instance.pk is not None:
+        instance._total_previous = sender.objects.filter(pk=instance.pk).values('fleet_id', 'is_active').first()
+
+
+@receiver(post_save, sender=FleetVehicleAssignment)
+@receiver(post_save, sender=FleetDriverAssignment)
+def assignment_saved(sender, instance, **kwargs):
+    """Keep the fleet's stored total of active assignments in step"""
+    previous = getattr(instance, '_total_previous', None)
+    if previous == {'fleet_id': instance.fleet_id, 'is_active': instance.is_active}:
+        return
+    kind = ASSIGNMENT_KINDS[sender]
+    member_id = getattr(instance, f'{kind}_id')
+    if previous and previous['is_active']:
+        adjust_total(sender, previous['fleet_id'], -1)
+        metrics.apply_membership(previous['fleet_id'], kind, [member_id], -1)
+    if instance.is_active:
+        adjust_total(sender, instance.fleet_id, 1)
+        metrics.apply_membership(instance.fleet_id, kind, [member_id])
+
+
+@receiver(post_delete, sender=FleetVehicleAssignment)
+@receiver(post_delete, sender=FleetDriverAssignment)
+def assignment_deleted(sender, instance, origin=None, **kwargs):
+    """Skip the count when the whole fleet is being deleted"""
+    if isinstance(origin, Fleet) or not instance.is_active:
+        return
+    adjust_total(sender, instance.fleet_id, -1)
+    # A deleted member's contribution was already taken out by member_deleting
+    if not isinstance(origin, (Vehicle, Driver)):
+        kind = ASSIGNMENT_KINDS[sender]
+        metrics.apply_membership(instance.fleet_id, kind, [getattr(instance, f'{kind}_id')], -1)
+
+
+@receiver(pre_delete, sender=Vehicle)
+@receiver(pre_delete, sender=Driver)
+def member_deleting(sender, instance, **kwargs):
+    """Take the member's whole contribution out before its rows cascade away"""
+    metrics.remove_member('vehicle' if sender is Vehicle else 'driver', instance.pk)
+
+
+def _invoice_revenue(invoice):
+    """An invoice's revenue contribution and the vehicle it is credited to"""
+    vehicle_id = Shipment.objects.filter(pk=invoice['shipment_id']).values_list('assigned_vehicle_id', flat=True).first()
+    revenue = invoice['total_amount'] if invoice['status'] in metrics.REVENUE_STATUSES else 0
+    return vehicle_id, revenue
+
+
+@receiver(pre_save, sender=Shipment)
+def shipment_metrics_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, SHIPMENT_METRIC_FIELDS)
+
+
+@receiver(post_save, sender=Shipment)
+def shipment_metrics_saved(sender, instance, **kwargs):
+    """Deliveries count as trips; reassigning the vehicle moves the invoice's revenue with it"""
+    changes = _changes(instance, SHIPMENT_METRIC_FIELDS)
+    if changes is None:
+        return
+    previous, current = changes
+    revenue = 0
+    if previous and previous['assigned_vehicle_id'] != current['assigned_vehicle_id']:
+        invoice = Invoice.objects.filter(shipment_id=instance.pk).values(*INVOICE_METRIC_FIELDS).first()
+        if invoice:
+            _, revenue = _invoice_revenue(invoice)
+    if previous:
+        metrics.apply_member_delta(
+            'vehicle', previous['assigned_vehicle_id'],
+            total_trips=-int(previous['status'] == 'delivered'), total_revenue=-revenue,
+        )
+    metrics.apply_member_delta(
+        'vehicle', current['assigned_vehicle_id'],
+        total_trips=int(current['status'] == 'delivered'), total_revenue=revenue,
+    )
+
+
+@receiver(post_delete, sender=Shipment)
+def shipment_metrics_deleted(sender, instance, **kwargs):
+    if instance.status == 'delivered':
+        metrics.apply_member_delta('vehicle', instance.assigned_vehicle_id, total_trips=-1)
+
+
+@receiver(pre_save, sender=Invoice)
+def invoice_metrics_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, INVOICE_METRIC_FIELDS)
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_metrics_saved(sender, instance, **kwargs):
+    """Issued, paid and overdue invoices count as revenue"""
+    changes = _changes(instance, INVOICE_METRIC_FIELDS)
+    if changes is None:
+        return
+    previous, current = changes
+    if previous:
+        vehicle_id, revenue = _invoice_revenue(previous)
+        metrics.apply_member_delta('vehicle', vehicle_id, total_revenue=-revenue)
+    vehicle_id, revenue = _invoice_revenue(current)
+    metrics.apply_member_delta('vehicle', vehicle_id, total_revenue=revenue)
+
+
+@receiver(post_delete, sender=Invoice)
+def invoice_metrics_deleted(sender, instance, **kwargs):
+    """Also runs when the shipment is deleted, before the shipment row goes"""
+    vehicle_id, revenue = _invoice_revenue(_snapshot(instance, INVOICE_METRIC_FIELDS))
+    metrics.apply_member_delta('vehicle', vehicle_id, total_revenue=-revenue)
+
+
+def _fuel_log_delta(fuel_log, sign=1):
+    return {'total_fuel_consumed': sign * fuel_log['fuel_amount'], 'total_fuel_cost': sign * fuel_log['cost']}
+
+
+@receiver(pre_save, sender=VehicleFuelLog)
+def fuel_log_metrics_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, FUEL_LOG_METRIC_FIELDS)
+
+
+@receiver(post_save, sender=VehicleFuelLog)
+def fuel_log_metrics_saved(sender, instance, **kwargs):
+    changes = _changes(instance, FUEL_LOG_METRIC_FIELDS)
+    if changes is None:
+        return
+    previous, current = changes
+    if previous:
+        metrics.apply_member_delta('vehicle', previous['vehicle_id'], **_fuel_log_delta(previous, -1))
+    metrics.apply_member_delta('vehicle', current['vehicle_id'], **_fuel_log_delta(current))
+
+
+@receiver(post_delete, sender=VehicleFuelLog)
+def fuel_log_metrics_deleted(sender, instance, origin=None, **kwargs):
+    """Skip per-log updates when the whole vehicle is being deleted"""
+    if isinstance(origin, Vehicle):
+        return
+    metrics.apply_member_delta(
+        'vehicle', instance.vehicle_id, **_fuel_log_delta(_snapshot(instance, FUEL_LOG_METRIC_FIELDS), -1)
+    )
+
+
+@receiver(pre_save, sender=VehicleMaintenanceLog)
+def maintenance_log_metrics_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, MAINTENANCE_LOG_METRIC_FIELDS)
+
+
+@receiver(post_save, sender=VehicleMaintenanceLog)
+def maintenance_log_metrics_saved(sender, instance, **kwargs):
+    changes = _changes(instance, MAINTENANCE_LOG_METRIC_FIELDS)
+    if changes is None:
+        return
+    previous, current = changes
+    if previous:
+        metrics.apply_member_delta('vehicle', previous['vehicle_id'], total_maintenance_cost=-previous['cost'])
+    metrics.apply_member_delta('vehicle', current['vehicle_id'], total_maintenance_cost=current['cost'])
+
+
+@receiver(post_delete, sender=VehicleMaintenanceLog)
+def maintenance_log_metrics_deleted(sender, instance, origin=None, **kwargs):
+    """Skip per-log updates when the whole vehicle is being deleted"""
+    if isinstance(origin, Vehicle):
+        return
+    metrics.apply_member_delta('vehicle', instance.vehicle_id, total_maintenance_cost=-instance.cost)
+
+
+def _violation_delta(violation, sign=1):
+    return {'total_violations': sign, 'total_accidents': sign * int(violation['violation_type'] == 'accident')}
+
+
+@receiver(pre_save, sender=DriverViolation)
+def violation_metrics_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, VIOLATION_METRIC_FIELDS)
+
+
+@receiver(post_save, sender=DriverViolation)
+def violation_metrics_saved(sender, instance, **kwargs):
+    changes = _changes(instance, VIOLATION_METRIC_FIELDS)
+    if changes is None:
+        return
+    previous, current = changes
+    if previous:
+        metrics.apply_member_delta('driver', previous['driver_id'], **_violation_delta(previous, -1))
+    metrics.apply_member_delta('driver', current['driver_id'], **_violation_delta(current))
+
+
+@receiver(post_delete, sender=DriverViolation)
+def violation_metrics_deleted(sender, instance, origin=None, **kwargs):
+    """Skip per-violation updates when the whole driver is being deleted"""
+    if isinstance(origin, Driver):
+        return
+    metrics.apply_member_delta(
+        'driver', instance.driver_id, **_violation_delta(_snapshot(instance, VIOLATION_METRIC_FIELDS), -1)
+    )
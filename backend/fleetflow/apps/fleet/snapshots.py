@@ -0,0 +1,89 @@
+"""
+Daily fleet metrics snapshots.
+
+`take_snapshot()` copies every fleet's counts and performance metrics into
+fleet_metrics_snapshots with one INSERT ... SELECT, creating the month's
+partition first. Re-running it for the same day overwrites that day's rows.
+
+History is read straight from the snapshots. Every total is cumulative, so
+a week or month bucket reports the last snapshot within it; a date range
+filter only touches the partitions it covers.
+"""
+from django.db import connection, transaction
+from django.db.models import DateField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import FleetMetricsSnapshot
+
+BUCKETS = ('day', 'week', 'month')
+
+SNAPSHOT_FIELDS = (
+    'total_vehicles', 'total_drivers',
+    'total_trips', 'total_km_traveled', 'total_fuel_consumed',
+    'total_revenue', 'total_fuel_cost', 'total_maintenance_cost',
+    'total_violations', 'total_accidents',
+    'safety_rating', 'average_utilization_rate', 'on_time_delivery_rate',
+)
+
+PARTITION_SQL = """
+CREATE TABLE IF NOT EXISTS {partition} PARTITION OF fleet_metrics_snapshots
+FOR VALUES FROM (%s) TO (%s)
+"""
+
+SNAPSHOT_SQL = """
+INSERT INTO fleet_metrics_snapshots (fleet_id, snapshot_date, {columns}, created_at)
+SELECT f.id, %(day)s,
+       f.total_vehicles, f.total_drivers,
+       COALESCE(m.total_trips, 0), COALESCE(m.total_km_traveled, 0), COALESCE(m.total_fuel_consumed, 0),
+       COALESCE(m.total_revenue, 0), COALESCE(m.total_fuel_cost, 0), COALESCE(m.total_maintenance_cost, 0),
+       COALESCE(m.total_violations, 0), COALESCE(m.total_accidents, 0),
+       COALESCE(m.safety_rating, 5), COALESCE(m.average_utilization_rate, 0), COALESCE(m.on_time_delivery_rate, 100),
+       NOW()
+FROM fleets f
+LEFT JOIN fleet_performance_metrics m ON m.fleet_id = f.id
+ON CONFLICT (fleet_id, snapshot_date) DO UPDATE SET {updates}, created_at = NOW()
+"""
+
+
+def month_bounds(day):
+    """First day of the month containing `day` and of the month after"""
+    start = day.replace(day=1)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+
+def ensure_partition(day):
+    """Create the monthly partition holding `day` if it doesn't exist yet"""
+    start, end = month_bounds(day)
+    partition = f'{FleetMetricsSnapshot._meta.db_table}_{start:%Y_%m}'
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITION_SQL.format(partition=connection.ops.quote_name(partition)), [start, end])
+
+
+def take_snapshot(day=None):
+    """Snapshot every fleet's metrics for `day` (today by default). Returns the number of rows written."""
+    day = day or timezone.now().date()
+    sql = SNAPSHOT_SQL.format(
+        columns=', '.join(SNAPSHOT_FIELDS),
+        updates=', '.join(f'{field} = EXCLUDED.{field}' for field in SNAPSHOT_FIELDS),
+    )
+    with transaction.atomic():
+        ensure_partition(day)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'day': day})
+            return cursor.rowcount
+
+
+def history(fleet_id, start, end, bucket='day'):
+    """
+    A fleet's snapshots between `start` and `end` inclusive, one per bucket:
+    the last snapshot of each day, week or month, annotated with the
+    bucket's start as `period`.
+    """
+    return (
+        FleetMetricsSnapshot.objects.filter(fleet_id=fleet_id, snapshot_date__range=(start, end))
+        .annotate(period=Trunc('snapshot_date', bucket, output_field=DateField()))
+        .order_by('period', '-snapshot_date')
+        .distinct('period')
+    )
@@ -1,18 +1,36 @@
+from datetime import timedelta
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
+from . import assignments, snapshots
 from .models import Fleet, FleetVehicleAssignment, FleetDriverAssignment, FleetPerformanceMetrics
-from .serializers import FleetSerializer, FleetListSerializer, FleetVehicleAssignmentSerializer, FleetDriverAssignmentSerializer
+from .serializers import (
+    FleetSerializer, FleetListSerializer, FleetVehicleAssignmentSerializer, FleetDriverAssignmentSerializer,
+    FleetMetricsSnapshotSerializer,
+)
 
 
 class FleetViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing fleets.
+
+    Bulk membership changes take a list of IDs and report an outcome per ID:
+    POST /{id}/assign_vehicles/ and /{id}/remove_vehicles/ with {"vehicle_ids": [...]}
+    POST /{id}/assign_drivers/ and /{id}/remove_drivers/ with {"driver_ids": [...]}
+
+    Metrics trends come from the daily snapshots:
+    GET /{id}/metrics/history/?start=YYYY-MM-DD&end=YYYY-MM-DD&bucket=day|week|month
     """
+    MAX_BULK_IDS = 1000
+    DEFAULT_HISTORY_DAYS = 90
+    MAX_HISTORY_DAYS = 366 * 5
     queryset = Fleet.objects.all()
     serializer_class = FleetSerializer
     permission_classes = [IsAuthenticated]
@@ -22,6 +40,12 @@ class FleetViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_computed()
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return FleetListSerializer
@@ -65,11 +89,80 @@ class FleetViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    def _bulk(self, request, kind, operation):
+        """Apply a bulk membership operation to the IDs under `{kind}_ids`"""
+        fleet = self.get_object()
+        key = f'{kind}_ids'
+        ids = request.data.get(key)
+
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': f'{key} must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.MAX_BULK_IDS:
+            return Response({'error': f'At most {self.MAX_BULK_IDS} {key} per request'}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+            return Response({'error': f'{key} must contain integer IDs'}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = operation(fleet, kind, ids)
+        return Response({
+            'results': [{'id': member_id, 'outcome': outcome} for member_id, outcome in outcomes.items()],
+        })
+
+    @action(detail=True, methods=['post'])
+    def assign_vehicles(self, request, pk=None):
+        """Assign a list of vehicles to fleet"""
+        return self._bulk(request, 'vehicle', assignments.assign)
+
+    @action(detail=True, methods=['post'])
+    def remove_vehicles(self, request, pk=None):
+        """Remove a list of vehicles from fleet"""
+        return self._bulk(request, 'vehicle', assignments.remove)
+
+    @action(detail=True, methods=['post'])
+    def assign_drivers(self, request, pk=None):
+        """Assign a list of drivers to fleet"""
+        return self._bulk(request, 'driver', assignments.assign)
+
+    @action(detail=True, methods=['post'])
+    def remove_drivers(self, request, pk=None):
+        """Remove a list of drivers from fleet"""
+        return self._bulk(request, 'driver', assignments.remove)
+
     @action(detail=True, methods=['get'])
     def metrics(self, request, pk=None):
         """Get performance metrics for fleet"""
         fleet = self.get_object()
-        metrics = fleet.performance_metrics
+        metrics, _ = FleetPerformanceMetrics.objects.get_or_create(fleet=fleet)
         from .serializers import FleetPerformanceMetricsSerializer
         serializer = FleetPerformanceMetricsSerializer(metrics)
         return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='metrics/history', url_name='metrics-history')
+    def metrics_history(self, request, pk=None):
+        """Get daily metrics snapshots, or the last one per week or month, over a date range"""
+        fleet = self.get_object()
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in snapshots.BUCKETS:
+            return Response({'error': f"bucket must be one of: {', '.join(snapshots.BUCKETS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        end = timezone.now().date()
+        start = end - timedelta(days=self.DEFAULT_HISTORY_DAYS)
+        try:
+            if request.query_params.get('end'):
+                end = parse_date(request.query_params['end'])
+            if request.query_params.get('start'):
+                start = parse_date(request.query_params['start'])
+        except ValueError:
+            start = end = None
+        if start is None or end is None or end < start:
+            return Response({'error': 'start and end must be YYYY-MM-DD dates with start <= end'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days > self.MAX_HISTORY_DAYS:
+            return Response({'error': f'The range can span at most {self.MAX_HISTORY_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = FleetMetricsSnapshotSerializer(snapshots.history(fleet.pk, start, end, bucket), many=True)
+        return Response({
+            'fleet': fleet.pk,
+            'start': start,
+            'end': end,
+            'bucket': bucket,
+            'results': serializer.data,
+        })
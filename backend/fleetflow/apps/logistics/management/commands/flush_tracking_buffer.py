@@ -0,0 +1,76 @@
+import logging
+import math
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from fleetflow.apps.logistics import tracking_buffer
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.1
+# Kept under the usual 10s stop grace period; whatever is left stays queued in Redis
+SHUTDOWN_DRAIN_SECONDS = 8
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the tracking write-behind buffer into the database whenever a full batch "
+        "is queued or the flush interval has passed; on SIGTERM/SIGINT, flushes what it "
+        "can within a few seconds and exits"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the pings queued now and exit")
+        parser.add_argument(
+            '--requeue-dead-letters', action='store_true', help="Move dead-lettered pings back onto the buffer and exit"
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_dead_letters']:
+            moved = tracking_buffer.requeue_dead_letters()
+            self.stdout.write(self.style.SUCCESS(f"Requeued {moved} dead-lettered tracking pings"))
+            return
+
+        if options['once']:
+            # Bounded by what is queued now, so sustained ingest can't keep it running
+            batches = math.ceil(tracking_buffer.depth() / settings.TRACKING_FLUSH_BATCH_SIZE)
+            flushed = tracking_buffer.flush(max_batches=batches) if batches else 0
+            self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} tracking pings"))
+            return
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        flushed = 0
+        while not self.stopping:
+            # One batch per pass, so a stop request is seen between batches
+            count = self._flush_batch() if tracking_buffer.flush_due() else 0
+            flushed += count
+            if not count:
+                time.sleep(min(POLL_SECONDS, settings.TRACKING_FLUSH_INTERVAL))
+
+        # Write out what was accepted before the shutdown, within the grace period
+        deadline = time.monotonic() + SHUTDOWN_DRAIN_SECONDS
+        while time.monotonic() < deadline:
+            count = self._flush_batch()
+            if not count:
+                break
+            flushed += count
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} tracking pings; {tracking_buffer.depth()} left queued"))
+
+    def _flush_batch(self):
+        """Flush one batch; database errors are logged and retried on the next pass"""
+        close_old_connections()
+        try:
+            return tracking_buffer.flush(max_batches=1)
+        except Exception:
+            logger.exception("Tracking buffer flush failed")
+            return 0
+
+    def _stop(self, signum, frame):
+        self.stopping = True
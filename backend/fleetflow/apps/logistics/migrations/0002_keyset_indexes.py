@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipmenttracking',
+            index=models.Index(fields=['-timestamp', '-id'], name='shipment_tr_timesta_ec9691_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipmenttracking',
+            index=models.Index(fields=['shipment', '-timestamp', '-id'], name='shipment_tr_shipmen_7639b7_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['assigned_driver', '-scheduled_pickup', '-id'], name='shipments_assigne_91239a_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0003_shipment_driver_timeline_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['assigned_vehicle', 'actual_pickup'], name='shipments_assigne_052caa_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0004_shipment_vehicle_pickup_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shipmenttracking',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -16,6 +16,9 @@ class Shipment(models.Model):
         ('on_hold', 'On Hold'),
     ]
 
+    # Statuses in which the assigned vehicle and driver are committed
+    IN_FLIGHT_STATUSES = ['assigned', 'in_transit']
+
     PRIORITY_CHOICES = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -64,6 +67,8 @@ class Shipment(models.Model):
         indexes = [
             models.Index(fields=['status', 'created_date']),
             models.Index(fields=['shipment_id']),
+            models.Index(fields=['assigned_driver', '-scheduled_pickup', '-id']),
+            models.Index(fields=['assigned_vehicle', 'actual_pickup']),
         ]
 
     def __str__(self):
@@ -102,11 +107,16 @@ class ShipmentTracking(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES)
     notes = models.TextField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Stamped by the server for single updates; batch ingestion keeps the device time
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
         db_table = 'shipment_tracking'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id']),
+            models.Index(fields=['shipment', '-timestamp', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.shipment.shipment_id} - {self.get_status_display()} at {self.timestamp}"
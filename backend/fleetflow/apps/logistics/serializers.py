@@ -6,6 +6,7 @@ class ShipmentTrackingSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShipmentTracking
         fields = '__all__'
+        read_only_fields = ['timestamp']
 
 
 class DeliveryRouteSerializer(serializers.ModelSerializer):
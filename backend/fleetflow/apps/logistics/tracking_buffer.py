@@ -0,0 +1,258 @@
+"""
+Write-behind buffer for tracking pings.
+
+With TRACKING_WRITE_BEHIND on, the batch endpoint validates pings and pushes
+them onto a bounded Redis list instead of writing them; every web worker
+shares the list, so it survives worker restarts. The flush_tracking_buffer
+worker drains it into the database in large batches once the list holds a
+full batch or the oldest ping has waited out the flush interval.
+
+- Backpressure: a push that would exceed TRACKING_BUFFER_MAX_SIZE is refused
+  as a whole (the endpoint answers 503), never partially applied.
+- Delivery is at least once: a batch is read, written, and only then
+  trimmed off the list, under a lock so one flusher drains at a time.
+- Each ping's vehicle is resolved again from its shipment at flush time, so
+  reassigned shipments and deleted vehicles are honoured.
+- A batch that fails to write is retried per vehicle; pings that still fail
+  move to a dead-letter list (requeue_dead_letters puts them back) instead
+  of blocking the queue. Database connection errors are raised, leaving the
+  batch queued for the next attempt.
+- Queue depth, rejected pushes and flush size and latency are kept in a
+  stats hash for the buffer endpoint.
+"""
+import json
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import tracking_ingest
+from .models import Shipment, ShipmentTracking
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'tracking:buffer'
+DEAD_LETTER_KEY = 'tracking:buffer:dead'
+STATS_KEY = 'tracking:buffer:stats'
+LOCK_KEY = 'tracking:buffer:flush-lock'
+LOCK_TIMEOUT = 120
+
+# Push every item or none: ARGV[1] is the capacity, the rest are the items
+PUSH_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) + #ARGV - 1 > tonumber(ARGV[1]) then
+    return -1
+end
+for i = 2, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+_client = None
+
+
+class BufferFull(Exception):
+    """The buffer can't take the batch; the caller should retry later"""
+
+
+def enabled():
+    return settings.TRACKING_WRITE_BEHIND
+
+
+def client():
+    """Shared Redis connection for the buffer"""
+    global _client
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(settings.TRACKING_BUFFER_URL)
+    return _client
+
+
+def _encode(event):
+    return json.dumps({
+        'shipment': event.shipment_id,
+        'lat': str(event.latitude),
+        'lon': str(event.longitude),
+        'status': event.status,
+        'notes': event.notes,
+        'ts': event.timestamp.isoformat(),
+        'queued_at': time.time(),
+    })
+
+
+def _decode(item):
+    data = json.loads(item)
+    event = ShipmentTracking(
+        shipment_id=data['shipment'],
+        latitude=Decimal(data['lat']),
+        longitude=Decimal(data['lon']),
+        status=data['status'],
+        notes=data['notes'],
+        timestamp=parse_datetime(data['ts']),
+    )
+    return event, data['queued_at']
+
+
+def enqueue(events):
+    """Queue validated pings for the flusher; raises BufferFull if they don't fit"""
+    if not events:
+        return depth()
+    redis_client = client()
+    items = [_encode(event) for event in events]
+    queued = redis_client.eval(PUSH_SCRIPT, 1, QUEUE_KEY, settings.TRACKING_BUFFER_MAX_SIZE, *items)
+    if queued < 0:
+        redis_client.hincrby(STATS_KEY, 'rejected_pings', len(items))
+        raise BufferFull(f"Tracking buffer is full ({settings.TRACKING_BUFFER_MAX_SIZE} pings)")
+    return queued
+
+
+def depth():
+    return client().llen(QUEUE_KEY)
+
+
+def oldest_age():
+    """Seconds the oldest queued ping has waited, or None when empty"""
+    head = client().lindex(QUEUE_KEY, 0)
+    if head is None:
+        return None
+    return time.time() - json.loads(head)['queued_at']
+
+
+def flush_due():
+    """Whether a full batch is waiting or the oldest ping has waited out the interval"""
+    if depth() >= settings.TRACKING_FLUSH_BATCH_SIZE:
+        return True
+    age = oldest_age()
+    return age is not None and age >= settings.TRACKING_FLUSH_INTERVAL
+
+
+def _write(pings, vehicles):
+    events = [event for _, event in pings]
+    tracking_ingest.write(events, [vehicles[event.shipment_id] for event in events])
+
+
+def _write_or_isolate(pings, vehicles):
+    """
+    Write pings as one batch; if that fails, write them per vehicle and return
+    the queued items of the vehicles that still fail.
+    """
+    try:
+        _write(pings, vehicles)
+        return []
+    except (OperationalError, InterfaceError):
+        raise
+    except Exception:
+        logger.exception("Tracking buffer batch of %s pings failed; retrying per vehicle", len(pings))
+
+    by_vehicle = {}
+    for item, event in pings:
+        by_vehicle.setdefault(vehicles[event.shipment_id], []).append((item, event))
+    dead = []
+    for vehicle_id, vehicle_pings in by_vehicle.items():
+        try:
+            _write(vehicle_pings, vehicles)
+        except (OperationalError, InterfaceError):
+            raise
+        except Exception:
+            logger.exception(
+                "Moving %s tracking pings of vehicle %s to the dead-letter list", len(vehicle_pings), vehicle_id
+            )
+            dead.extend(item for item, _ in vehicle_pings)
+    return dead
+
+
+def _flush_batch(redis_client, batch_size):
+    items = redis_client.lrange(QUEUE_KEY, 0, batch_size - 1)
+    if not items:
+        return 0
+    started = time.monotonic()
+    decoded = [(item, *_decode(item)) for item in items]
+
+    # Resolved now rather than at enqueue time: shipments may have been reassigned
+    # or deleted, and vehicles deleted (SET_NULL) while their pings were queued
+    vehicles = dict(
+        Shipment.objects.filter(id__in={event.shipment_id for _, event, _ in decoded}).values_list(
+            'id', 'assigned_vehicle_id'
+        )
+    )
+    pings = [(item, event) for item, event, _ in decoded if event.shipment_id in vehicles]
+    dead = _write_or_isolate(pings, vehicles) if pings else []
+
+    elapsed = time.monotonic() - started
+    pipeline = redis_client.pipeline()
+    if dead:
+        pipeline.rpush(DEAD_LETTER_KEY, *dead)
+    pipeline.ltrim(QUEUE_KEY, len(items), -1)
+    pipeline.hincrby(STATS_KEY, 'flushed_pings', len(pings) - len(dead))
+    pipeline.hincrby(STATS_KEY, 'dropped_pings', len(items) - len(pings))
+    pipeline.hincrby(STATS_KEY, 'dead_lettered_pings', len(dead))
+    pipeline.hincrby(STATS_KEY, 'flushes', 1)
+    pipeline.hset(STATS_KEY, mapping={
+        'last_flush_size': len(items),
+        'last_flush_seconds': round(elapsed, 4),
+        'last_flush_lag_seconds': round(time.time() - min(queued_at for _, _, queued_at in decoded), 4),
+        'last_flush_at': timezone.now().isoformat(),
+    })
+    pipeline.execute()
+    return len(items)
+
+
+def flush(max_batches=None):
+    """
+    Drain the buffer in batches of TRACKING_FLUSH_BATCH_SIZE until it is empty
+    (or max_batches have been written). Returns the number of pings taken
+    off the buffer; 0 if another flusher holds the lock.
+    """
+    redis_client = client()
+    lock = redis_client.lock(LOCK_KEY, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+    flushed = batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            count = _flush_batch(redis_client, settings.TRACKING_FLUSH_BATCH_SIZE)
+            if not count:
+                break
+            flushed += count
+            batches += 1
+            lock.reacquire()
+    finally:
+        lock.release()
+    return flushed
+
+
+def requeue_dead_letters():
+    """Move dead-lettered pings back onto the queue. Returns how many were moved"""
+    redis_client = client()
+    moved = 0
+    while redis_client.lmove(DEAD_LETTER_KEY, QUEUE_KEY, 'LEFT', 'RIGHT') is not None:
+        moved += 1
+    return moved
+
+
+def stats():
+    """Queue depth and flush metrics"""
+    redis_client = client()
+    recorded = {key.decode(): value.decode() for key, value in redis_client.hgetall(STATS_KEY).items()}
+    return {
+        'enabled': enabled(),
+        'depth': redis_client.llen(QUEUE_KEY),
+        'dead_letter_depth': redis_client.llen(DEAD_LETTER_KEY),
+        'max_size': settings.TRACKING_BUFFER_MAX_SIZE,
+        'oldest_age_seconds': oldest_age(),
+        'flushes': int(recorded.get('flushes', 0)),
+        'flushed_pings': int(recorded.get('flushed_pings', 0)),
+        'dropped_pings': int(recorded.get('dropped_pings', 0)),
+        'rejected_pings': int(recorded.get('rejected_pings', 0)),
+        'dead_lettered_pings': int(recorded.get('dead_lettered_pings', 0)),
+        'last_flush_size': int(recorded['last_flush_size']) if 'last_flush_size' in recorded else None,
+        'last_flush_seconds': float(recorded['last_flush_seconds']) if 'last_flush_seconds' in recorded else None,
+        'last_flush_lag_seconds': (
+            float(recorded['last_flush_lag_seconds']) if 'last_flush_lag_seconds' in recorded else None
+        ),
+        'last_flush_at': recorded.get('last_flush_at'),
+    }
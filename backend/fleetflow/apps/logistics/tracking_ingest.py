@@ -0,0 +1,156 @@
+"""
+Batch GPS tracking ingestion.
+
+A telematics gateway posts batches of pings, each with shipment_id (the
+shipment's business ID), lat, lon, status and ts. A batch is validated in
+bulk, resolving all its shipments with one query, and the valid pings are
+written with a single bulk_create in one transaction. Invalid pings are
+reported by position and don't hold up the rest of the batch. Pings stamped
+more than MAX_CLOCK_SKEW in the future are invalid: a skewed device clock
+would otherwise move the vehicle's odometer series head past every real ping.
+
+bulk_create bypasses the tracking post_save handler, so the odometer series
+of each assigned vehicle is extended once per batch with its pings in time
+order.
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from fleetflow.apps.vehicles import odometer
+
+from .models import Shipment, ShipmentTracking
+
+MAX_BATCH_SIZE = 10000
+MAX_REPORTED_ERRORS = 500
+REQUIRED_FIELDS = ['shipment_id', 'lat', 'lon', 'status', 'ts']
+STATUSES = dict(ShipmentTracking.STATUS_CHOICES)
+COORDINATE_LIMITS = {'lat': Decimal(90), 'lon': Decimal(180)}
+COORDINATE_PLACES = Decimal('0.000001')
+# Device clock skew tolerated on ts; later pings would push the odometer series head into the future
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _parse_coordinate(value, field):
+    number = Decimal(str(value).strip())
+    if not number.is_finite() or abs(number) > COORDINATE_LIMITS[field]:
+        raise ValueError(f"Must be between -{COORDINATE_LIMITS[field]} and {COORDINATE_LIMITS[field]}.")
+    return number.quantize(COORDINATE_PLACES)
+
+
+def _parse_timestamp(value, now):
+    moment = parse_datetime(value) if isinstance(value, str) else None
+    if moment is None:
+        raise ValueError("Datetime has wrong format. Use ISO 8601.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    if moment > now + MAX_CLOCK_SKEW:
+        raise ValueError("Datetime is in the future.")
+    return moment
+
+
+def validate_batch(records):
+    """
+    Validate a batch of ping records (None for malformed ones).
+
+    Returns the ShipmentTracking instances to insert, the vehicle each one
+    belongs to (None if the shipment has no vehicle) and the per-ping errors.
+    """
+    codes = {
+        str(record.get('shipment_id', '')).strip()
+        for record in records
+        if record is not None
+    }
+    shipments = {
+        code: (shipment_pk, vehicle_id)
+        for code, shipment_pk, vehicle_id in Shipment.objects.filter(shipment_id__in=codes).values_list(
+            'shipment_id', 'id', 'assigned_vehicle_id'
+        )
+    }
+
+    now = timezone.now()
+    events, vehicle_ids, errors = [], [], []
+    for index, record in enumerate(records):
+        if record is None:
+            errors.append({'index': index, 'errors': {'non_field_errors': ["Malformed record."]}})
+            continue
+
+        ping_errors = {}
+        for field in REQUIRED_FIELDS:
+            if record.get(field) in (None, ''):
+                ping_errors[field] = ["This field is required."]
+
+        values = {}
+        for field in COORDINATE_LIMITS:
+            if field in ping_errors:
+                continue
+            try:
+                values[field] = _parse_coordinate(record[field], field)
+            except (InvalidOperation, ValueError) as e:
+                ping_errors[field] = [str(e) if isinstance(e, ValueError) else "A valid number is required."]
+
+        if 'ts' not in ping_errors:
+            try:
+                values['ts'] = _parse_timestamp(record['ts'], now)
+            except ValueError as e:
+                ping_errors['ts'] = [str(e)]
+
+        if 'status' not in ping_errors and (not isinstance(record['status'], str) or record['status'] not in STATUSES):
+            ping_errors['status'] = [f"\"{record['status']}\" is not a valid choice."]
+
+        if 'shipment_id' not in ping_errors:
+            shipment = shipments.get(str(record['shipment_id']).strip())
+            if shipment is None:
+                ping_errors['shipment_id'] = ["Unknown shipment."]
+
+        if ping_errors:
+            errors.append({'index': index, 'errors': ping_errors})
+            continue
+        shipment_pk, vehicle_id = shipment
+        events.append(ShipmentTracking(
+            shipment_id=shipment_pk,
+            latitude=values['lat'],
+            longitude=values['lon'],
+            status=record['status'],
+            notes=str(record['notes']) if record.get('notes') else None,
+            timestamp=values['ts'],
+        ))
+        vehicle_ids.append(vehicle_id)
+
+    return events, vehicle_ids, errors
+
+
+def write(events, vehicle_ids):
+    """Insert validated pings and extend their vehicles' odometer series"""
+    positions = {}
+    for event, vehicle_id in zip(events, vehicle_ids):
+        if vehicle_id is not None:
+            positions.setdefault(vehicle_id, []).append((event.timestamp, event.latitude, event.longitude))
+
+    with transaction.atomic():
+        ShipmentTracking.objects.bulk_create(events, batch_size=MAX_BATCH_SIZE)
+        # bulk_create bypasses the post_save handler that feeds the odometer.
+        # Series heads are locked in vehicle order so concurrent batches can't deadlock.
+        for vehicle_id, vehicle_positions in sorted(positions.items()):
+            odometer.record_positions(vehicle_id, vehicle_positions)
+
+
+def acknowledgement(records, events, errors):
+    """Per-batch acknowledgement: accepted and rejected counts and the first errors"""
+    return {
+        'received': len(records),
+        'accepted': len(events),
+        'rejected': len(errors),
+        'errors': errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+def ingest(records):
+    """Validate and store a batch of pings, returning its acknowledgement"""
+    events, vehicle_ids, errors = validate_batch(records)
+    if events:
+        write(events, vehicle_ids)
+    return acknowledgement(records, events, errors)
@@ -4,8 +4,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.parsers import JSONParser
+from django.conf import settings
 from django.utils import timezone
 
+from fleetflow.apps.common.pagination import OptionalKeysetPagination
+from fleetflow.apps.common.parsers import NDJSONParser
+
+from . import tracking_buffer, tracking_ingest
 from .models import Shipment, ShipmentTracking, DeliveryRoute, Invoice
 from .serializers import ShipmentSerializer, ShipmentListSerializer, ShipmentTrackingSerializer, DeliveryRouteSerializer, InvoiceSerializer
 
@@ -98,15 +104,64 @@ class ShipmentViewSet(viewsets.ModelViewSet):
 
 
 class ShipmentTrackingViewSet(viewsets.ModelViewSet):
-    """ViewSet for shipment tracking events"""
+    """
+    ViewSet for shipment tracking events
+
+    - GET /api/logistics/tracking/?pagination=cursor - Keyset pagination on (timestamp, id)
+    - POST /api/logistics/tracking/batch/ - Ingest a batch of GPS pings, as a JSON array or
+      NDJSON (application/x-ndjson) of {shipment_id, lat, lon, status, ts}. With
+      TRACKING_WRITE_BEHIND on, valid pings are queued (202) for flush_tracking_buffer,
+      and a full buffer answers 503 with Retry-After
+    - GET /api/logistics/tracking/buffer/ - Write-behind queue depth and flush metrics
+    """
     queryset = ShipmentTracking.objects.all()
     serializer_class = ShipmentTrackingSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['shipment', 'status']
     ordering_fields = ['timestamp']
     ordering = ['-timestamp']
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def batch(self, request):
+        """Validate a batch of GPS pings and store (or queue) the valid ones"""
+        records = request.data
+        if not isinstance(records, list) or not records:
+            return Response({'error': 'Expected a non-empty array of pings'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > tracking_ingest.MAX_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {tracking_ingest.MAX_BATCH_SIZE} pings per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        records = [record if isinstance(record, dict) else None for record in records]
+        if not tracking_buffer.enabled():
+            result = tracking_ingest.ingest(records)
+            return Response(result, status=status.HTTP_201_CREATED if result['accepted'] else status.HTTP_400_BAD_REQUEST)
+
+        events, _, errors = tracking_ingest.validate_batch(records)
+        result = tracking_ingest.acknowledgement(records, events, errors)
+        if not events:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tracking_buffer.enqueue(events)
+        except tracking_buffer.BufferFull as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(max(1, round(settings.TRACKING_FLUSH_INTERVAL)))}
+            )
+        return Response(result, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'])
+    def buffer(self, request):
+        """Write-behind queue depth and flush metrics"""
+        if not tracking_buffer.enabled():
+            return Response({'enabled': False})
+        return Response(tracking_buffer.stats())
+
 
 class DeliveryRouteViewSet(viewsets.ModelViewSet):
     """ViewSet for delivery routes"""
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog
+from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog, VehicleFuelEfficiency, FuelImport, VehicleOdometerSeries, VehicleCostRollup, VehicleDriverAssignment, VehicleUtilizationDay
 
 
 @admin.register(Vehicle)
@@ -7,7 +7,7 @@ class VehicleAdmin(admin.ModelAdmin):
     list_display = ['license_plate', 'make', 'model', 'status', 'assigned_driver', 'created_at']
     list_filter = ['status', 'vehicle_type', 'fuel_type', 'created_at']
     search_fields = ['license_plate', 'vin', 'make', 'model']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'next_service_date', 'next_service_odometer', 'next_service_type']
     fieldsets = (
         ('Basic Information', {
             'fields': ('license_plate', 'vin', 'make', 'model', 'year', 'vehicle_type')
@@ -21,6 +21,9 @@ class VehicleAdmin(admin.ModelAdmin):
         ('Dates', {
             'fields': ('registration_date', 'last_service_date', 'insurance_expiry')
         }),
+        ('Maintenance Forecast', {
+            'fields': ('next_service_date', 'next_service_odometer', 'next_service_type')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -42,3 +45,46 @@ class VehicleFuelLogAdmin(admin.ModelAdmin):
     list_filter = ['fuel_date', 'vehicle']
     search_fields = ['vehicle__license_plate']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(VehicleFuelEfficiency)
+class VehicleFuelEfficiencyAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'interval_count', 'total_km', 'total_litres', 'last_odometer', 'updated_at']
+    search_fields = ['vehicle__license_plate']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(FuelImport)
+class FuelImportAdmin(admin.ModelAdmin):
+    list_display = ['source_name', 'file_format', 'status', 'total_rows', 'imported_rows', 'error_rows', 'created_at']
+    list_filter = ['status', 'file_format', 'created_at']
+    search_fields = ['source_name', 'idempotency_key']
+    readonly_fields = ['created_at', 'completed_at']
+
+
+@admin.register(VehicleOdometerSeries)
+class VehicleOdometerSeriesAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'last_timestamp', 'last_reading', 'point_count', 'updated_at']
+    search_fields = ['vehicle__license_plate']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(VehicleCostRollup)
+class VehicleCostRollupAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'month', 'fuel_cost', 'maintenance_cost', 'km_driven', 'updated_at']
+    list_filter = ['month']
+    search_fields = ['vehicle__license_plate']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(VehicleUtilizationDay)
+class VehicleUtilizationDayAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'day', 'busy_seconds']
+    list_filter = ['day']
+    search_fields = ['vehicle__license_plate']
+
+
+@admin.register(VehicleDriverAssignment)
+class VehicleDriverAssignmentAdmin(admin.ModelAdmin):
+    list_display = ['vehicle', 'driver', 'period']
+    search_fields = ['vehicle__license_plate', 'driver__name']
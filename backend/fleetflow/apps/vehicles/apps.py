@@ -5,3 +5,6 @@ class VehiclesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fleetflow.apps.vehicles'
     verbose_name = 'Vehicles Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
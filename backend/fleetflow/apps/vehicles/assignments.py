@@ -0,0 +1,45 @@
+"""
+Driver-vehicle assignment history.
+
+Every change of Vehicle.assigned_driver closes the vehicle's open
+VehicleDriverAssignment at the moment of the change and opens one for the
+new driver, so "who drove vehicle X at time T" (and the reverse) is a
+range-containment probe on a GiST index rather than a shipment scan.
+"""
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+
+from .models import VehicleDriverAssignment
+
+
+def reassign(vehicle_id, driver_id, moment=None):
+    """Close the vehicle's open assignment and open one for `driver_id`"""
+    moment = moment or timezone.now()
+    for assignment in VehicleDriverAssignment.objects.filter(vehicle_id=vehicle_id, period__upper_inf=True):
+        if assignment.period.lower is not None and assignment.period.lower >= moment:
+            assignment.delete()
+            continue
+        assignment.period = DateTimeTZRange(assignment.period.lower, moment)
+        assignment.save(update_fields=['period'])
+    if driver_id is not None:
+        VehicleDriverAssignment.objects.create(
+            vehicle_id=vehicle_id, driver_id=driver_id, period=DateTimeTZRange(moment, None)
+        )
+
+
+def driver_at(vehicle_id, moment):
+    """The vehicle's assignment in force at a moment, or None"""
+    return (
+        VehicleDriverAssignment.objects.select_related('driver')
+        .filter(vehicle_id=vehicle_id, period__contains=moment)
+        .first()
+    )
+
+
+def vehicle_at(driver_id, moment):
+    """The driver's vehicle assignment in force at a moment, or None"""
+    return (
+        VehicleDriverAssignment.objects.select_related('vehicle')
+        .filter(driver_id=driver_id, period__contains=moment)
+        .first()
+    )
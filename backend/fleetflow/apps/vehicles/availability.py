@@ -0,0 +1,76 @@
+"""
+Cached index of vehicles available for dispatch.
+
+The index maps each vehicle type to a list of ``(capacity, id)`` pairs sorted by
+capacity, so type and minimum-capacity filters are a dict lookup plus a bisect
+instead of a table scan. It is rebuilt lazily from a single query.
+
+The cache key carries a generation number that the signal handlers bump
+whenever vehicles or shipment assignments change. A rebuild reads the
+generation before it queries, so an index built from rows read before a
+commit is stored under the old key and never served after that commit.
+"""
+import heapq
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Vehicle
+
+AVAILABLE_INDEX_CACHE_KEY = 'vehicles:available-index:{generation}'
+AVAILABLE_INDEX_GENERATION_KEY = 'vehicles:available-index:generation'
+AVAILABLE_INDEX_TIMEOUT = 60 * 15
+
+
+def build_available_index():
+    """Build the availability index from the database"""
+    index = {}
+    rows = (
+        Vehicle.objects.available()
+        .order_by('capacity', 'id')
+        .values_list('vehicle_type', 'capacity', 'id')
+    )
+    for vehicle_type, capacity, vehicle_id in rows:
+        index.setdefault(vehicle_type, []).append((capacity, vehicle_id))
+    return index
+
+
+def get_available_index():
+    """Return the cached availability index, rebuilding it on a miss"""
+    key = AVAILABLE_INDEX_CACHE_KEY.format(generation=cache.get_or_set(AVAILABLE_INDEX_GENERATION_KEY, 0, None))
+    index = cache.get(key)
+    if index is None:
+        index = build_available_index()
+        cache.set(key, index, AVAILABLE_INDEX_TIMEOUT)
+    return index
+
+
+def _bump_generation():
+    try:
+        cache.incr(AVAILABLE_INDEX_GENERATION_KEY)
+    except ValueError:
+        cache.add(AVAILABLE_INDEX_GENERATION_KEY, 1, None)
+
+
+def invalidate_available_index():
+    """Retire the cached index once the current transaction commits"""
+    transaction.on_commit(_bump_generation)
+
+
+def available_vehicle_ids(vehicle_type=None, min_capacity=None):
+    """
+    IDs of available vehicles, smallest sufficient capacity first.
+    """
+    index = get_available_index()
+    if vehicle_type is not None:
+        buckets = [index.get(vehicle_type, [])]
+    else:
+        buckets = list(index.values())
+
+    if min_capacity is not None:
+        buckets = [bucket[bisect_left(bucket, (min_capacity,)):] for bucket in buckets]
+
+    if len(buckets) == 1:
+        return [vehicle_id for _, vehicle_id in buckets[0]]
+    return [vehicle_id for _, vehicle_id in heapq.merge(*buckets)]
@@ -0,0 +1,125 @@
+"""
+Per-vehicle monthly cost rollups.
+
+The Django counterpart of analytics.v_cost_per_vehicle, kept incrementally:
+fuel and maintenance log changes apply signed deltas to their month's row,
+and km driven is added as the odometer series advances. Every delta is one
+INSERT ... ON CONFLICT upsert, so concurrent writers never lose updates.
+"""
+from django.db import connection, transaction
+
+ROLLUP_FIELDS = ('fuel_cost', 'fuel_litres', 'fuel_log_count', 'maintenance_cost', 'maintenance_count', 'km_driven')
+
+UPSERT_SQL = """
+INSERT INTO vehicle_cost_rollups (vehicle_id, month, {columns}, updated_at)
+VALUES (%s, %s, {placeholders}, NOW())
+ON CONFLICT (vehicle_id, month) DO UPDATE SET {updates}, updated_at = NOW()
+"""
+
+REBUILD_SQL = """
+WITH fuel AS (
+    SELECT vehicle_id, date_trunc('month', fuel_date)::date AS month,
+           SUM(cost) AS fuel_cost, SUM(fuel_amount) AS fuel_litres, COUNT(*) AS fuel_log_count
+    FROM vehicle_fuel_logs
+    {where}
+    GROUP BY 1, 2
+),
+maintenance AS (
+    SELECT vehicle_id, date_trunc('month', maintenance_date)::date AS month,
+           SUM(cost) AS maintenance_cost, COUNT(*) AS maintenance_count
+    FROM vehicle_maintenance_logs
+    {where}
+    GROUP BY 1, 2
+),
+odometer_months AS (
+    SELECT vehicle_id, date_trunc('month', day)::date AS month,
+           MIN(readings[1]) AS first_reading,
+           MAX(readings[array_length(readings, 1)]) AS last_reading
+    FROM vehicle_odometer_chunks
+    {where}
+    GROUP BY 1, 2
+),
+distance AS (
+    SELECT vehicle_id, month,
+           last_reading - COALESCE(
+               LAG(last_reading) OVER (PARTITION BY vehicle_id ORDER BY month),
+               MIN(first_reading) OVER (PARTITION BY vehicle_id)
+           ) AS km_driven
+    FROM odometer_months
+),
+buckets AS (
+    SELECT vehicle_id, month FROM fuel
+    UNION SELECT vehicle_id, month FROM maintenance
+    UNION SELECT vehicle_id, month FROM distance
+)
+INSERT INTO vehicle_cost_rollups
+    (vehicle_id, month, fuel_cost, fuel_litres, fuel_log_count,
+     maintenance_cost, maintenance_count, km_driven, updated_at)
+SELECT
+    b.vehicle_id, b.month,
+    COALESCE(f.fuel_cost, 0), COALESCE(f.fuel_litres, 0), COALESCE(f.fuel_log_count, 0),
+    COALESCE(m.maintenance_cost, 0), COALESCE(m.maintenance_count, 0),
+    COALESCE(d.km_driven, 0),
+    NOW()
+FROM buckets b
+LEFT JOIN fuel f USING (vehicle_id, month)
+LEFT JOIN maintenance m USING (vehicle_id, month)
+LEFT JOIN distance d USING (vehicle_id, month)
+"""
+
+
+def month_of(day):
+    """First day of the month containing a date"""
+    return day.replace(day=1)
+
+
+def apply_delta(vehicle_id, day, **deltas):
+    """Add signed deltas to a vehicle's rollup for the month containing `day`"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(ROLLUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown rollup fields: {', '.join(sorted(unknown))}")
+
+    # A new month's row needs every column: the table has no database defaults
+    sql = UPSERT_SQL.format(
+        columns=', '.join(ROLLUP_FIELDS),
+        placeholders=', '.join(['%s'] * len(ROLLUP_FIELDS)),
+        updates=', '.join(f'{field} = vehicle_cost_rollups.{field} + EXCLUDED.{field}' for field in deltas),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [vehicle_id, month_of(day), *(deltas.get(field, 0) for field in ROLLUP_FIELDS)])
+
+
+def fuel_log_delta(fuel_log, sign=1):
+    """Rollup delta for adding (sign=1) or removing (sign=-1) a fuel log"""
+    return {
+        'fuel_cost': sign * fuel_log['cost'],
+        'fuel_litres': sign * fuel_log['fuel_amount'],
+        'fuel_log_count': sign,
+    }
+
+
+def maintenance_log_delta(maintenance_log, sign=1):
+    """Rollup delta for adding (sign=1) or removing (sign=-1) a maintenance log"""
+    return {
+        'maintenance_cost': sign * maintenance_log['cost'],
+        'maintenance_count': sign,
+    }
+
+
+def rebuild(vehicle_ids=None):
+    """
+    Recompute rollups from the source tables in one set-based pass, for the
+    given vehicles or all of them. Returns the number of rollup rows written.
+    """
+    if vehicle_ids is None:
+        where, params = '', []
+    else:
+        where, params = 'WHERE vehicle_id = ANY(%s)', [list(vehicle_ids)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM vehicle_cost_rollups {where}', params)
+        cursor.execute(REBUILD_SQL.format(where=where), params * 3)
+        return cursor.rowcount
@@ -0,0 +1,13 @@
+import django_filters
+
+from fleetflow.apps.common.computed import ComputedFilter
+
+from .models import Vehicle
+
+
+class VehicleFilter(django_filters.FilterSet):
+    is_available = ComputedFilter()
+
+    class Meta:
+        model = Vehicle
+        fields = ['status', 'vehicle_type', 'fuel_type', 'is_available']
@@ -0,0 +1,130 @@
+"""
+Fuel efficiency engine.
+
+Follows analytics.v_fuel_efficiency: fill-ups are ordered by odometer, every
+positive odometer delta between consecutive fills is an interval, and the
+litres of the fill closing the interval are charged to it.
+"""
+from django.db import connection, transaction
+
+from .models import VehicleFuelEfficiency
+
+RECOMPUTE_SQL = """
+WITH ordered_fills AS (
+    SELECT
+        vehicle_id,
+        id,
+        odometer_reading,
+        fuel_amount,
+        LAG(odometer_reading) OVER (
+            PARTITION BY vehicle_id
+            ORDER BY odometer_reading, id
+        ) AS prev_odometer
+    FROM vehicle_fuel_logs
+    {where}
+),
+intervals AS (
+    SELECT
+        vehicle_id,
+        odometer_reading - prev_odometer AS km_driven,
+        fuel_amount AS litres,
+        ROW_NUMBER() OVER (
+            PARTITION BY vehicle_id
+            ORDER BY odometer_reading DESC, id DESC
+        ) AS recency
+    FROM ordered_fills
+    WHERE prev_odometer IS NOT NULL
+      AND odometer_reading - prev_odometer > 0
+),
+last_fills AS (
+    SELECT vehicle_id, MAX(odometer_reading) AS last_odometer
+    FROM ordered_fills
+    GROUP BY vehicle_id
+)
+INSERT INTO vehicle_fuel_efficiency
+    (vehicle_id, interval_count, total_km, total_litres, last_odometer, recent_intervals, updated_at)
+SELECT
+    f.vehicle_id,
+    COUNT(i.km_driven),
+    COALESCE(SUM(i.km_driven), 0),
+    COALESCE(SUM(i.litres), 0),
+    f.last_odometer,
+    COALESCE(
+        jsonb_agg(jsonb_build_array(i.km_driven, i.litres) ORDER BY i.recency DESC)
+            FILTER (WHERE i.recency <= %s),
+        '[]'::jsonb
+    ),
+    NOW()
+FROM last_fills f
+LEFT JOIN intervals i USING (vehicle_id)
+GROUP BY f.vehicle_id, f.last_odometer
+ON CONFLICT (vehicle_id) DO UPDATE SET
+    interval_count = EXCLUDED.interval_count,
+    total_km = EXCLUDED.total_km,
+    total_litres = EXCLUDED.total_litres,
+    last_odometer = EXCLUDED.last_odometer,
+    recent_intervals = EXCLUDED.recent_intervals,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def recompute_all():
+    """Rebuild efficiency for every vehicle in one window-function pass"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(RECOMPUTE_SQL.format(where=''), [VehicleFuelEfficiency.RECENT_INTERVALS])
+        updated = cursor.rowcount
+        cursor.execute(
+            "DELETE FROM vehicle_fuel_efficiency e "
+            "WHERE NOT EXISTS (SELECT 1 FROM vehicle_fuel_logs f WHERE f.vehicle_id = e.vehicle_id)"
+        )
+    return updated
+
+
+def recompute_vehicles(vehicle_ids):
+    """Rebuild efficiency for the given vehicles from their fill-up history"""
+    vehicle_ids = list(vehicle_ids)
+    if not vehicle_ids:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            RECOMPUTE_SQL.format(where='WHERE vehicle_id = ANY(%s)'),
+            [vehicle_ids, VehicleFuelEfficiency.RECENT_INTERVALS],
+        )
+        VehicleFuelEfficiency.objects.filter(vehicle_id__in=vehicle_ids).exclude(
+            vehicle__fuel_logs__isnull=False
+        ).delete()
+
+
+def recompute_vehicle(vehicle_id):
+    """Rebuild efficiency for one vehicle from its fill-up history"""
+    recompute_vehicles([vehicle_id])
+
+
+def record_fill(fuel_log):
+    """
+    Fold a newly inserted fill-up into its vehicle's efficiency row.
+
+    A fill beyond the last odometer reading closes exactly one new interval,
+    so only the running totals change. A fill behind it splits an existing
+    interval and falls back to recomputing that vehicle.
+    """
+    with transaction.atomic():
+        efficiency, created = (
+            VehicleFuelEfficiency.objects.select_for_update()
+            .get_or_create(vehicle_id=fuel_log.vehicle_id)
+        )
+        last_odometer = efficiency.last_odometer
+        if created or (last_odometer is not None and fuel_log.odometer_reading < last_odometer):
+            recompute_vehicle(fuel_log.vehicle_id)
+            return
+
+        if last_odometer is not None and fuel_log.odometer_reading > last_odometer:
+            km_driven = fuel_log.odometer_reading - last_odometer
+            efficiency.interval_count += 1
+            efficiency.total_km += km_driven
+            efficiency.total_litres += fuel_log.fuel_amount
+            efficiency.recent_intervals = (
+                efficiency.recent_intervals + [[float(km_driven), float(fuel_log.fuel_amount)]]
+            )[-VehicleFuelEfficiency.RECENT_INTERVALS:]
+        efficiency.last_odometer = max(fuel_log.odometer_reading, last_odometer or 0)
+        efficiency.save()
@@ -0,0 +1,233 @@
+"""
+Bulk fuel-card import.
+
+Files are read as a stream of records (CSV with a header row, or one JSON
+object per line) and processed in chunks: every chunk resolves its license
+plates with one query, validates its rows one by one (exact Decimal
+parsing, with per-field errors), and writes the valid ones with a single
+bulk_create. The whole file is one transaction, recorded as a FuelImport
+keyed by its idempotency key so a re-upload is a no-op.
+
+The worker holds a row lock on its FuelImport while the file is written. An
+import still 'processing' after STALE_IMPORT_AFTER whose row is not locked
+was left by a worker that died, and the next upload with its key takes it
+over instead of reporting it in progress forever.
+"""
+import csv
+import hashlib
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from fleetflow.apps.fleet import metrics as fleet_metrics
+
+from . import cost_rollups, fuel_efficiency, odometer
+from .models import FuelImport, Vehicle, VehicleFuelLog
+
+CHUNK_SIZE = 5000
+MAX_STORED_ERRORS = 500
+STALE_IMPORT_AFTER = timedelta(minutes=30)
+REQUIRED_FIELDS = ['license_plate', 'fuel_date', 'fuel_amount', 'cost', 'odometer_reading']
+DECIMAL_FIELDS = {
+    'fuel_amount': VehicleFuelLog._meta.get_field('fuel_amount'),
+    'cost': VehicleFuelLog._meta.get_field('cost'),
+    'odometer_reading': VehicleFuelLog._meta.get_field('odometer_reading'),
+}
+
+
+def file_digest(binary_file):
+    """SHA-256 of a binary file, used as the default idempotency key"""
+    digest = hashlib.sha256()
+    for block in iter(lambda: binary_file.read(1024 * 1024), b''):
+        digest.update(block)
+    binary_file.seek(0)
+    return digest.hexdigest()
+
+
+def detect_format(filename):
+    """Guess the file format from its extension"""
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_records(binary_file, file_format):
+    """Yield (row_number, record) pairs without loading the whole file"""
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        for row_number, record in enumerate(csv.DictReader(text), start=2):
+            yield row_number, record
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield row_number, record if isinstance(record, dict) else None
+
+
+def _parse_decimal(value, field):
+    number = Decimal(str(value).strip())
+    if not number.is_finite() or number < 0:
+        raise ValueError("Must be a non-negative number.")
+    number = number.quantize(Decimal(1).scaleb(-field.decimal_places))
+    if len(number.as_tuple().digits) > field.max_digits:
+        raise ValueError(f"Ensure that there are no more than {field.max_digits} digits in total.")
+    return number
+
+
+def validate_chunk(rows):
+    """
+    Validate a chunk of (row_number, record) pairs.
+
+    Returns the VehicleFuelLog instances to insert and the per-row errors.
+    Plates are resolved for the whole chunk in one query.
+    """
+    plates = {
+        str(record.get('license_plate', '')).strip()
+        for _, record in rows
+        if record is not None
+    }
+    vehicle_ids = dict(
+        Vehicle.objects.filter(license_plate__in=plates).values_list('license_plate', 'id')
+    )
+
+    logs, errors = [], []
+    for row_number, record in rows:
+        if record is None:
+            errors.append({'row': row_number, 'errors': {'non_field_errors': ["Malformed record."]}})
+            continue
+
+        row_errors = {}
+        for field in REQUIRED_FIELDS:
+            if record.get(field) in (None, ''):
+                row_errors[field] = ["This field is required."]
+
+        values = {}
+        for field, model_field in DECIMAL_FIELDS.items():
+            if field in row_errors:
+                continue
+            try:
+                values[field] = _parse_decimal(record[field], model_field)
+            except (InvalidOperation, ValueError) as e:
+                row_errors[field] = [str(e) if isinstance(e, ValueError) else "A valid number is required."]
+
+        if 'fuel_date' not in row_errors:
+            try:
+                values['fuel_date'] = date.fromisoformat(str(record['fuel_date']).strip())
+            except ValueError:
+                row_errors['fuel_date'] = ["Date has wrong format. Use YYYY-MM-DD."]
+
+        if 'license_plate' not in row_errors:
+            vehicle_id = vehicle_ids.get(str(record['license_plate']).strip())
+            if vehicle_id is None:
+                row_errors['license_plate'] = ["Unknown license plate."]
+
+        if row_errors:
+            errors.append({'row': row_number, 'errors': row_errors})
+            continue
+        logs.append(VehicleFuelLog(vehicle_id=vehicle_id, **values))
+
+    return logs, errors
+
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _claim_stale(idempotency_key, file_format, source_name):
+    """Take over an abandoned 'processing' import with this key; None if there isn't one"""
+    with transaction.atomic():
+        fuel_import = FuelImport.objects.select_for_update(skip_locked=True).filter(
+            idempotency_key=idempotency_key, status='processing',
+            created_at__lt=timezone.now() - STALE_IMPORT_AFTER,
+        ).first()
+        if fuel_import is None:
+            return None
+        fuel_import.source_name, fuel_import.file_format = source_name, file_format
+        fuel_import.total_rows = fuel_import.imported_rows = fuel_import.error_rows = 0
+        fuel_import.errors = []
+        # created_at doubles as the start of the current attempt
+        fuel_import.created_at = timezone.now()
+        fuel_import.save()
+    return fuel_import
+
+
+def import_fuel_logs(binary_file, file_format, idempotency_key, source_name=None):
+    """
+    Import a fuel-card file.
+
+    Returns ``(fuel_import, created)``; ``created`` is False when a file with
+    the same idempotency key was already imported.
+    """
+    try:
+        with transaction.atomic():
+            fuel_import = FuelImport.objects.create(
+                idempotency_key=idempotency_key,
+                source_name=source_name,
+                file_format=file_format,
+            )
+    except IntegrityError:
+        fuel_import = _claim_stale(idempotency_key, file_format, source_name)
+        if fuel_import is None:
+            return FuelImport.objects.get(idempotency_key=idempotency_key), False
+
+    readings = {}
+    costs = {}
+    try:
+        with transaction.atomic():
+            # Held until the file commits, so a live import is never claimed as stale
+            FuelImport.objects.select_for_update().filter(pk=fuel_import.pk).values_list('pk', flat=True).first()
+            for rows in _chunks(iter_records(binary_file, file_format), CHUNK_SIZE):
+                logs, errors = validate_chunk(rows)
+                VehicleFuelLog.objects.bulk_create(logs, batch_size=CHUNK_SIZE)
+                for log in logs:
+                    readings.setdefault(log.vehicle_id, []).append(
+                        (odometer.fuel_log_timestamp(log.fuel_date), log.odometer_reading)
+                    )
+                    bucket = costs.setdefault((log.vehicle_id, cost_rollups.month_of(log.fuel_date)), {
+                        'fuel_cost': 0, 'fuel_litres': 0, 'fuel_log_count': 0,
+                    })
+                    bucket['fuel_cost'] += log.cost
+                    bucket['fuel_litres'] += log.fuel_amount
+                    bucket['fuel_log_count'] += 1
+
+                fuel_import.total_rows += len(rows)
+                fuel_import.imported_rows += len(logs)
+                fuel_import.error_rows += len(errors)
+                fuel_import.errors.extend(errors[:MAX_STORED_ERRORS - len(fuel_import.errors)])
+
+            # bulk_create bypasses the post_save handlers
+            fuel_efficiency.recompute_vehicles(readings)
+            for vehicle_id, points in readings.items():
+                odometer.record_readings(vehicle_id, points)
+            fleet_totals = {}
+            for (vehicle_id, month), deltas in costs.items():
+                cost_rollups.apply_delta(vehicle_id, month, **deltas)
+                totals = fleet_totals.setdefault(vehicle_id, {'total_fuel_consumed': 0, 'total_fuel_cost': 0})
+                totals['total_fuel_consumed'] += deltas['fuel_litres']
+                totals['total_fuel_cost'] += deltas['fuel_cost']
+            for vehicle_id, totals in fleet_totals.items():
+                fleet_metrics.apply_member_delta('vehicle', vehicle_id, **totals)
+    except Exception:
+        # Release the key so the file can be retried
+        fuel_import.delete()
+        raise
+
+    fuel_import.status = 'completed'
+    fuel_import.completed_at = timezone.now()
+    fuel_import.save()
+    return fuel_import, True
@@ -0,0 +1,130 @@
+"""
+Maintenance due-date forecasting.
+
+For every recurring maintenance type a vehicle has history for, the next
+service is due after the type's day interval or km interval, whichever comes
+first. The km interval is turned into a date with the vehicle's recent
+odometer growth rate (from fuel log readings). The earliest projection across
+types is stored on the vehicle, where the maintenance-due endpoint reads it
+through indexes.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Vehicle, VehicleFuelLog, VehicleMaintenanceLog
+
+GROWTH_WINDOW_DAYS = 180
+MIN_GROWTH_SPAN_DAYS = 7
+# Bounds the km-based projection so a near-zero growth rate can't overflow a date
+MAX_PROJECTION_DAYS = 3660
+BATCH_SIZE = 1000
+
+
+def odometer_growth(vehicle_ids, today):
+    """
+    (km per day, latest reading) per vehicle from fuel log readings in the
+    growth window. The rate is None when the readings span too few days.
+    """
+    queryset = VehicleFuelLog.objects.filter(fuel_date__gte=today - timedelta(days=GROWTH_WINDOW_DAYS))
+    if vehicle_ids is not None:
+        queryset = queryset.filter(vehicle_id__in=vehicle_ids)
+    rows = (
+        queryset.order_by()
+        .values('vehicle_id')
+        .annotate(
+            first_date=Min('fuel_date'), last_date=Max('fuel_date'),
+            min_odometer=Min('odometer_reading'), max_odometer=Max('odometer_reading'),
+        )
+    )
+    growth = {}
+    for row in rows:
+        span = (row['last_date'] - row['first_date']).days
+        rate = (row['max_odometer'] - row['min_odometer']) / span if span >= MIN_GROWTH_SPAN_DAYS else None
+        growth[row['vehicle_id']] = (rate, row['max_odometer'])
+    return growth
+
+
+def latest_services(vehicle_ids):
+    """Latest log per (vehicle, maintenance type), via DISTINCT ON"""
+    queryset = VehicleMaintenanceLog.objects.all()
+    if vehicle_ids is not None:
+        queryset = queryset.filter(vehicle_id__in=vehicle_ids)
+    rows = (
+        queryset.order_by('vehicle_id', 'maintenance_type', '-maintenance_date', '-id')
+        .distinct('vehicle_id', 'maintenance_type')
+        .values('vehicle_id', 'maintenance_type', 'maintenance_date', 'next_service_date')
+    )
+    services = {}
+    for row in rows:
+        services.setdefault(row['vehicle_id'], []).append(row)
+    return services
+
+
+def project_next_service(services, odometer, rate, today):
+    """
+    Earliest (due_date, due_odometer, maintenance_type) across the vehicle's
+    recurring services, or None when nothing recurring is on record.
+    """
+    projections = []
+    for service in services:
+        interval = VehicleMaintenanceLog.SERVICE_INTERVALS.get(service['maintenance_type'])
+        if interval is None:
+            continue
+        interval_days, interval_km = interval
+
+        due_date = service['maintenance_date'] + timedelta(days=interval_days)
+        if service['next_service_date']:
+            due_date = min(due_date, service['next_service_date'])
+
+        due_odometer = None
+        if interval_km is not None and rate:
+            days_since = (today - service['maintenance_date']).days
+            odometer_at_service = max(odometer - rate * days_since, Decimal(0))
+            due_odometer = (odometer_at_service + interval_km).quantize(Decimal('0.01'))
+            days_to_due = max(-MAX_PROJECTION_DAYS, min(int((due_odometer - odometer) / rate), MAX_PROJECTION_DAYS))
+            due_date = min(due_date, today + timedelta(days=days_to_due))
+
+        projections.append((due_date, due_odometer, service['maintenance_type']))
+
+    return min(projections, key=lambda projection: projection[0], default=None)
+
+
+def forecast_vehicles(vehicle_ids=None, today=None):
+    """
+    Recompute the maintenance forecast for the given vehicles, or for all of
+    them. Returns the number of vehicles updated.
+    """
+    today = today or timezone.now().date()
+    if vehicle_ids is not None:
+        vehicle_ids = list(vehicle_ids)
+
+    services = latest_services(vehicle_ids)
+    growth = odometer_growth(vehicle_ids, today)
+
+    vehicles = Vehicle.objects.only('id', 'odometer_reading')
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(id__in=vehicle_ids)
+
+    batch, updated = [], 0
+    for vehicle in vehicles.iterator(chunk_size=BATCH_SIZE):
+        vehicle_services = services.get(vehicle.id, [])
+        rate, latest_reading = growth.get(vehicle.id, (None, 0))
+        odometer = max(vehicle.odometer_reading, latest_reading)
+        projection = project_next_service(vehicle_services, odometer, rate, today)
+
+        vehicle.next_service_date, vehicle.next_service_odometer, vehicle.next_service_type = projection or (None, None, None)
+        batch.append(vehicle)
+
+        if len(batch) >= BATCH_SIZE:
+            updated += _save_forecasts(batch)
+            batch = []
+    return updated + _save_forecasts(batch)
+
+
+def _save_forecasts(vehicles):
+    # Only the forecast fields: the odometer moves concurrently with fuel logs and GPS pings
+    Vehicle.objects.bulk_update(vehicles, ['next_service_date', 'next_service_odometer', 'next_service_type'])
+    return len(vehicles)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.vehicles.fuel_efficiency import recompute_all, recompute_vehicle
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-vehicle fuel efficiency from the full fuel log history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicle', type=int, help="Only rebuild this vehicle ID")
+
+    def handle(self, *args, **options):
+        if options['vehicle']:
+            recompute_vehicle(options['vehicle'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt fuel efficiency for vehicle {options['vehicle']}"))
+            return
+
+        updated = recompute_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt fuel efficiency for {updated} vehicles"))
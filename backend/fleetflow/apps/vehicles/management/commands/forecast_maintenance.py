@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.vehicles.maintenance_forecast import forecast_vehicles
+
+
+class Command(BaseCommand):
+    help = "Project each vehicle's next service date and odometer from its maintenance history"
+
+    def handle(self, *args, **options):
+        updated = forecast_vehicles()
+        self.stdout.write(self.style.SUCCESS(f"Forecast next service for {updated} vehicles"))
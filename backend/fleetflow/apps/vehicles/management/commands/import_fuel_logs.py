@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fleetflow.apps.vehicles.fuel_import import detect_format, file_digest, import_fuel_logs
+
+
+class Command(BaseCommand):
+    help = "Bulk import fuel-card transactions from a CSV or JSON-lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON-lines file")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--key', help="Idempotency key, defaults to the file's SHA-256")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            binary_file = open(path, 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with binary_file:
+            key = options['key'] or file_digest(binary_file)
+            file_format = options['format'] or detect_format(path)
+            fuel_import, created = import_fuel_logs(binary_file, file_format, key, source_name=path)
+
+        if not created:
+            self.stdout.write(self.style.WARNING(f"Already imported as #{fuel_import.pk}, nothing to do"))
+            return
+
+        for error in fuel_import.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {fuel_import.imported_rows} of {fuel_import.total_rows} rows "
+            f"({fuel_import.error_rows} rejected)"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fleetflow.apps.vehicles.cost_rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute per-vehicle monthly cost rollups from fuel logs, maintenance logs and odometer series"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicle', type=int, action='append', help="Only rebuild this vehicle ID (repeatable)")
+
+    def handle(self, *args, **options):
+        written = rebuild(options['vehicle'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} cost rollup rows"))
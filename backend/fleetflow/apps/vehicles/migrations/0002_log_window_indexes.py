@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclefuellog',
+            index=models.Index(fields=['vehicle', '-fuel_date'], name='vehicle_fue_vehicle_f5b7a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemaintenancelog',
+            index=models.Index(fields=['vehicle', '-maintenance_date'], name='vehicle_mai_vehicle_f9d034_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:30
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_log_window_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleFuelEfficiency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('total_km', models.DecimalField(decimal_places=2, default=0, max_digits=14, validators=[django.core.validators.MinValueValidator(0)])),
+                ('total_litres', models.DecimalField(decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)])),
+                ('last_odometer', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('recent_intervals', models.JSONField(default=list, help_text='Latest [km, litres] fill-up intervals, oldest first')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Vehicle fuel efficiency',
+                'db_table': 'vehicle_fuel_efficiency',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='vehiclefuellog',
+            index=models.Index(fields=['vehicle', 'odometer_reading'], name='vehicle_fue_vehicle_5c8e52_idx'),
+        ),
+        migrations.AddField(
+            model_name='vehiclefuelefficiency',
+            name='vehicle',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fuel_efficiency', to='vehicles.vehicle'),
+        ),
+    ]
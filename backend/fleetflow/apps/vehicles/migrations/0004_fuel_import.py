@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:31
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_vehicle_fuel_efficiency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FuelImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=128, unique=True)),
+                ('source_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], max_length=10)),
+                ('status', models.CharField(choices=[('processing', 'Processing'), ('completed', 'Completed')], default='processing', max_length=20)),
+                ('total_rows', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('imported_rows', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('error_rows', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('errors', models.JSONField(blank=True, default=list, help_text='Per-row errors, capped at the first few hundred')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'vehicle_fuel_imports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
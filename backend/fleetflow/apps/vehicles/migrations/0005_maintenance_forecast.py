@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:33
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_fuel_import'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='next_service_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='next_service_odometer',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='next_service_type',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('next_service_odometer'), '-', models.F('odometer_reading')), name='vehicles_km_to_service_idx'),
+        ),
+    ]
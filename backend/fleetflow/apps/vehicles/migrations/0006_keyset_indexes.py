@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_maintenance_forecast'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclefuellog',
+            index=models.Index(fields=['-fuel_date', '-id'], name='vehicle_fue_fuel_da_072a02_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:34
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['license_plate'], name='vehicles_plate_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['make'], name='vehicles_make_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['model'], name='vehicles_model_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vin'], name='vehicles_vin_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
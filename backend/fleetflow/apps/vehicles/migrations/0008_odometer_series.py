@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:36
+
+import django.contrib.postgres.fields
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0007_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleOdometerSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_reading', models.DecimalField(decimal_places=2, max_digits=12, validators=[django.core.validators.MinValueValidator(0)])),
+                ('last_latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('last_longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('point_count', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='odometer_series', to='vehicles.vehicle')),
+            ],
+            options={
+                'db_table': 'vehicle_odometer_series',
+            },
+        ),
+        migrations.CreateModel(
+            name='VehicleOdometerChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('timestamps', django.contrib.postgres.fields.ArrayField(base_field=models.DateTimeField(), default=list, size=None)),
+                ('readings', django.contrib.postgres.fields.ArrayField(base_field=models.DecimalField(decimal_places=2, max_digits=12), default=list, size=None)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odometer_chunks', to='vehicles.vehicle')),
+            ],
+            options={
+                'db_table': 'vehicle_odometer_chunks',
+                'ordering': ['vehicle', 'day'],
+                'unique_together': {('vehicle', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0008_odometer_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleCostRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('fuel_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fuel_litres', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fuel_log_count', models.IntegerField(default=0)),
+                ('maintenance_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('maintenance_count', models.IntegerField(default=0)),
+                ('km_driven', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_rollups', to='vehicles.vehicle')),
+            ],
+            options={
+                'db_table': 'vehicle_cost_rollups',
+                'ordering': ['vehicle', 'month'],
+                'unique_together': {('vehicle', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:46
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+import django.db.models.deletion
+
+
+def seed_current_assignments(apps, schema_editor):
+    """Open a history row for every vehicle's current driver, from its last update"""
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    VehicleDriverAssignment = apps.get_model('vehicles', 'VehicleDriverAssignment')
+    VehicleDriverAssignment.objects.bulk_create(
+        VehicleDriverAssignment(
+            vehicle_id=vehicle_id, driver_id=driver_id, period=DateTimeTZRange(updated_at, None)
+        )
+        for vehicle_id, driver_id, updated_at in Vehicle.objects.filter(assigned_driver__isnull=False)
+        .values_list('id', 'assigned_driver_id', 'updated_at')
+        .iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0007_driver_payroll_summaries'),
+        ('vehicles', '0009_cost_rollups'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='VehicleDriverAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vehicle_assignments', to='drivers.driver')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='driver_assignments', to='vehicles.vehicle')),
+            ],
+            options={
+                'db_table': 'vehicle_driver_assignments',
+                'ordering': ['-period'],
+                'indexes': [django.contrib.postgres.indexes.GistIndex(fields=['driver', 'period'], name='vehicle_assignment_driver_gist')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vehicledriverassignment',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('vehicle', '='), ('period', '&&')], name='vehicle_assignment_no_overlap'),
+        ),
+        migrations.RunPython(seed_current_assignments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.10 on 2026-10-16 22:55
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0010_driver_assignment_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleUtilizationDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('busy_seconds', models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)])),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='utilization_days', to='vehicles.vehicle')),
+            ],
+            options={
+                'db_table': 'vehicle_utilization_days',
+                'ordering': ['day'],
+                'unique_together': {('vehicle', 'day')},
+            },
+        ),
+    ]
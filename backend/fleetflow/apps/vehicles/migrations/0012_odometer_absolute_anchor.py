@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0011_vehicle_utilization_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleodometerseries',
+            name='last_absolute_reading',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicleodometerseries',
+            name='last_absolute_timestamp',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
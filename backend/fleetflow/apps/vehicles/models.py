@@ -1,7 +1,96 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import ArrayField, DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex, GistIndex
 from django.db import models
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from fleetflow.apps.common.computed import ComputedFieldsQuerySet, flag
+
+
+def _log_aggregate(model, expression, output_field):
+    """Correlated subquery computing one aggregate over a vehicle's logs"""
+    return Subquery(
+        model.objects.filter(vehicle=OuterRef('pk'))
+        .order_by()
+        .values('vehicle')
+        .annotate(value=expression)
+        .values('value'),
+        output_field=output_field,
+    )
+
+
+def available_condition():
+    """Active, unassigned and not committed to an in-flight shipment"""
+    from fleetflow.apps.logistics.models import Shipment
+
+    in_flight = Shipment.objects.filter(assigned_vehicle=OuterRef('pk'), status__in=Shipment.IN_FLIGHT_STATUSES)
+    return models.Q(status='active', assigned_driver__isnull=True) & ~Exists(in_flight)
+
+
+class VehicleQuerySet(ComputedFieldsQuerySet):
+    """
+    Query helpers for vehicle representations.
+    """
+    computed_fields = {
+        'is_available': lambda: flag(available_condition()),
+    }
+
+    def available(self):
+        """Vehicles available for dispatch, matching the is_available computed field"""
+        return self.filter(available_condition())
+
+    def with_km_to_service(self):
+        """Annotate km left until the forecast service, matching the expression index"""
+        return self.annotate(km_to_service=F('next_service_odometer') - F('odometer_reading'))
+
+    def maintenance_due(self, until_date=None, within_km=None):
+        """Vehicles whose forecast service falls before a date or within a distance"""
+        queryset = self.with_km_to_service()
+        due = models.Q()
+        if until_date is not None:
+            due |= models.Q(next_service_date__lte=until_date)
+        if within_km is not None:
+            due |= models.Q(km_to_service__lte=within_km)
+        return queryset.filter(due)
+
+    def with_log_summary(self):
+        """Annotate count, total cost and last date of maintenance and fuel logs"""
+        cost_field = models.DecimalField(max_digits=14, decimal_places=2)
+        return self.annotate(
+            maintenance_count=Coalesce(
+                _log_aggregate(VehicleMaintenanceLog, Count('id'), models.IntegerField()), Value(0)
+            ),
+            maintenance_total_cost=Coalesce(
+                _log_aggregate(VehicleMaintenanceLog, Sum('cost'), cost_field), Value(0), output_field=cost_field
+            ),
+            last_maintenance_date=_log_aggregate(VehicleMaintenanceLog, Max('maintenance_date'), models.DateField()),
+            fuel_log_count=Coalesce(
+                _log_aggregate(VehicleFuelLog, Count('id'), models.IntegerField()), Value(0)
+            ),
+            fuel_total_cost=Coalesce(
+                _log_aggregate(VehicleFuelLog, Sum('cost'), cost_field), Value(0), output_field=cost_field
+            ),
+            last_fuel_date=_log_aggregate(VehicleFuelLog, Max('fuel_date'), models.DateField()),
+        )
+
+    def with_recent_logs(self, limit):
+        """Prefetch only the latest `limit` maintenance and fuel logs per vehicle"""
+        return self.prefetch_related(
+            Prefetch(
+                'maintenance_logs',
+                queryset=VehicleMaintenanceLog.objects.order_by('-maintenance_date', '-id')[:limit],
+                to_attr='recent_maintenance_logs',
+            ),
+            Prefetch(
+                'fuel_logs',
+                queryset=VehicleFuelLog.objects.order_by('-fuel_date', '-id')[:limit],
+                to_attr='recent_fuel_logs',
+            ),
+        )
+
 
 class Vehicle(models.Model):
     """
@@ -50,20 +139,36 @@ class Vehicle(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintenance forecast, written by the forecast_maintenance job
+    next_service_date = models.DateField(null=True, blank=True, db_index=True)
+    next_service_odometer = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    next_service_type = models.CharField(max_length=50, null=True, blank=True)
+
+    objects = VehicleQuerySet.as_manager()
+
     class Meta:
         db_table = 'vehicles'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['license_plate']),
+            models.Index(F('next_service_odometer') - F('odometer_reading'), name='vehicles_km_to_service_idx'),
+            GinIndex(fields=['license_plate'], name='vehicles_plate_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['make'], name='vehicles_make_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['model'], name='vehicles_model_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['vin'], name='vehicles_vin_trgm_idx', opclasses=['gin_trgm_ops']),
         ]
 
     def __str__(self):
         return f"{self.make} {self.model} ({self.license_plate})"
 
     def is_available(self):
-        """Check if vehicle is available for use"""
-        return self.status == 'active' and self.assigned_driver is None
+        """Check if vehicle is available for use (see available_condition)"""
+        from fleetflow.apps.logistics.models import Shipment
+
+        if self.status != 'active' or self.assigned_driver_id is not None:
+            return False
+        return not self.shipments.filter(status__in=Shipment.IN_FLIGHT_STATUSES).exists()
 
     def get_vehicle_age(self):
         """Calculate vehicle age in years"""
@@ -85,6 +190,14 @@ class VehicleMaintenanceLog(models.Model):
         ('other', 'Other'),
     ]
 
+    # Recurring service intervals as (days, km); one-off work has no interval
+    SERVICE_INTERVALS = {
+        'oil_change': (180, 10000),
+        'tire_rotation': (180, 10000),
+        'brake_service': (365, 40000),
+        'inspection': (365, None),
+    }
+
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='maintenance_logs')
     maintenance_type = models.CharField(max_length=50, choices=MAINTENANCE_TYPE_CHOICES)
     description = models.TextField()
@@ -99,6 +212,9 @@ class VehicleMaintenanceLog(models.Model):
     class Meta:
         db_table = 'vehicle_maintenance_logs'
         ordering = ['-maintenance_date']
+        indexes = [
+            models.Index(fields=['vehicle', '-maintenance_date']),
+        ]
 
     def __str__(self):
         return f"{self.vehicle.license_plate} - {self.get_maintenance_type_display()} on {self.maintenance_date}"
@@ -120,11 +236,232 @@ class VehicleFuelLog(models.Model):
     class Meta:
         db_table = 'vehicle_fuel_logs'
         ordering = ['-fuel_date']
+        indexes = [
+            models.Index(fields=['vehicle', '-fuel_date']),
+            models.Index(fields=['vehicle', 'odometer_reading']),
+            models.Index(fields=['-fuel_date', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.vehicle.license_plate} - {self.fuel_amount}L on {self.fuel_date}"
 
     def get_fuel_consumption(self):
-        """Calculate fuel consumption (L/km)"""
-        # This would need to compare with previous fuel log
+        """Calculate fuel consumption (L/km) since the previous fill-up"""
+        previous_odometer = (
+            VehicleFuelLog.objects.filter(vehicle_id=self.vehicle_id, odometer_reading__lt=self.odometer_reading)
+            .order_by('-odometer_reading')
+            .values_list('odometer_reading', flat=True)
+            .first()
+        )
+        if previous_odometer is None:
+            return None
+        return self.fuel_amount / (self.odometer_reading - previous_odometer)
+
+
+class VehicleFuelEfficiency(models.Model):
+    """
+    Rolling fuel efficiency per vehicle, derived from odometer deltas between
+    consecutive fill-ups. Maintained incrementally as fuel logs arrive.
+    """
+    RECENT_INTERVALS = 10
+
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, related_name='fuel_efficiency')
+    interval_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    total_km = models.DecimalField(max_digits=14, decimal_places=2, default=0, validators=[MinValueValidator(0)])
+    total_litres = models.DecimalField(max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)])
+    last_odometer = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    recent_intervals = models.JSONField(default=list, help_text="Latest [km, litres] fill-up intervals, oldest first")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vehicle_fuel_efficiency'
+        verbose_name_plural = 'Vehicle fuel efficiency'
+
+    def __str__(self):
+        return f"Fuel efficiency for {self.vehicle.license_plate}"
+
+    def get_km_per_litre(self):
+        """Lifetime km driven per litre"""
+        if self.total_litres > 0:
+            return self.total_km / self.total_litres
+        return None
+
+    def get_litres_per_100km(self):
+        """Lifetime litres consumed per 100 km"""
+        if self.total_km > 0:
+            return 100 * self.total_litres / self.total_km
+        return None
+
+    def get_recent_km_per_litre(self):
+        """km per litre over the latest RECENT_INTERVALS fill-up intervals"""
+        litres = sum(interval[1] for interval in self.recent_intervals)
+        if litres > 0:
+            return sum(interval[0] for interval in self.recent_intervals) / litres
+        return None
+
+
+class VehicleOdometerSeries(models.Model):
+    """
+    Head of a vehicle's append-only odometer series: the latest point, used to
+    validate that new points are monotonic and to extend GPS-derived readings.
+    """
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, related_name='odometer_series')
+    last_timestamp = models.DateTimeField()
+    last_reading = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
+    last_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    last_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Latest absolute (fuel log) reading; GPS-derived points after it can be re-anchored
+    last_absolute_timestamp = models.DateTimeField(null=True, blank=True)
+    last_absolute_reading = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    point_count = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vehicle_odometer_series'
+
+    def __str__(self):
+        return f"Odometer series for {self.vehicle.license_plate}"
+
+
+class VehicleOdometerChunk(models.Model):
+    """
+    One day of a vehicle's odometer series, stored as parallel arrays sorted
+    by timestamp so a range lookup is an index probe plus a binary search.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='odometer_chunks')
+    day = models.DateField()
+    timestamps = ArrayField(models.DateTimeField(), default=list)
+    readings = ArrayField(models.DecimalField(max_digits=12, decimal_places=2), default=list)
+
+    class Meta:
+        db_table = 'vehicle_odometer_chunks'
+        unique_together = [['vehicle', 'day']]
+        ordering = ['vehicle', 'day']
+
+    def __str__(self):
+        return f"{self.vehicle.license_plate} odometer on {self.day}"
+
+
+class VehicleCostRollup(models.Model):
+    """
+    Per-vehicle, per-month cost and distance totals, kept up to date with
+    deltas as fuel logs, maintenance logs and odometer points change.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='cost_rollups')
+    month = models.DateField(help_text="First day of the month")
+    fuel_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fuel_litres = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fuel_log_count = models.IntegerField(default=0)
+    maintenance_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    maintenance_count = models.IntegerField(default=0)
+    km_driven = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'vehicle_cost_rollups'
+        unique_together = [['vehicle', 'month']]
+        ordering = ['vehicle', 'month']
+
+    def __str__(self):
+        return f"{self.vehicle.license_plate} costs for {self.month:%Y-%m}"
+
+    def get_total_cost(self):
+        """Fuel plus maintenance cost"""
+        return self.fuel_cost + self.maintenance_cost
+
+    def get_cost_per_km(self):
+        """Total cost per km driven"""
+        if self.km_driven > 0:
+            return self.get_total_cost() / self.km_driven
         return None
+
+
+class VehicleUtilizationDay(models.Model):
+    """
+    Seconds a vehicle spent on shipments during one closed (UTC) day, cached
+    by the utilization engine so past days are never recomputed. Shipment
+    changes delete the days they touch.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='utilization_days')
+    day = models.DateField()
+    busy_seconds = models.FloatField(default=0, validators=[MinValueValidator(0)])
+
+    class Meta:
+        db_table = 'vehicle_utilization_days'
+        unique_together = [['vehicle', 'day']]
+        ordering = ['day']
+
+    def __str__(self):
+        return f"{self.vehicle.license_plate} utilization on {self.day}"
+
+    def get_utilization(self):
+        """Fraction of the day the vehicle was busy"""
+        return self.busy_seconds / 86400
+
+
+class VehicleDriverAssignment(models.Model):
+    """
+    Driver-vehicle assignment history.
+
+    Each row is one stretch of `Vehicle.assigned_driver`, valid over `period`
+    (open-ended while current). An exclusion constraint keeps a vehicle's
+    periods from overlapping, and its GiST index, together with the one on
+    (driver, period), makes point-in-time lookups index probes.
+    """
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='driver_assignments')
+    driver = models.ForeignKey('drivers.Driver', on_delete=models.CASCADE, related_name='vehicle_assignments')
+    period = DateTimeRangeField()
+
+    class Meta:
+        db_table = 'vehicle_driver_assignments'
+        ordering = ['-period']
+        indexes = [
+            GistIndex(fields=['driver', 'period'], name='vehicle_assignment_driver_gist'),
+        ]
+        constraints = [
+            ExclusionConstraint(
+                name='vehicle_assignment_no_overlap',
+                expressions=[('vehicle', RangeOperators.EQUAL), ('period', RangeOperators.OVERLAPS)],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id} driven by {self.driver_id} during {self.period}"
+
+
+class FuelImport(models.Model):
+    """
+    One bulk fuel-card import file. The idempotency key makes re-uploads of
+    the same file no-ops.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+
+    idempotency_key = models.CharField(max_length=128, unique=True)
+    source_name = models.CharField(max_length=255, null=True, blank=True)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    total_rows = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    imported_rows = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    error_rows = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    errors = models.JSONField(default=list, blank=True, help_text="Per-row errors, capped at the first few hundred")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'vehicle_fuel_imports'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.source_name or self.idempotency_key} ({self.get_status_display()})"
@@ -0,0 +1,369 @@
+"""
+Per-vehicle odometer time series.
+
+Fuel logs contribute absolute odometer readings; GPS tracking pings extend the
+series by the great-circle distance from the vehicle's previous position.
+Points are appended to one array chunk per vehicle per day, and the series
+head row is locked while appending so points stay monotonic in both time and
+reading.
+
+An absolute reading that lands behind or below GPS-derived points (a fuel log
+is stamped at midnight of its day, usually before that day's pings) re-anchors
+the series instead of being dropped: it is inserted at its timestamp, later
+points are shifted so the GPS increments continue from it, and earlier
+GPS-derived points are capped at it. Only readings older than, or below, the
+latest absolute reading are rejected.
+
+Distance over a window is the difference of the readings at its two ends.
+Each end is found by probing the (vehicle, day) index for the nearest chunk
+and bisecting its timestamps, interpolating between neighbouring points.
+"""
+import math
+from bisect import bisect_right
+from datetime import datetime, time, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from fleetflow.apps.fleet import metrics as fleet_metrics
+
+from . import cost_rollups
+from .models import Vehicle, VehicleOdometerChunk, VehicleOdometerSeries
+
+EARTH_RADIUS_KM = 6371.0088
+
+APPEND_SQL = """
+INSERT INTO vehicle_odometer_chunks (vehicle_id, day, timestamps, readings)
+VALUES (%s, %s, %s::timestamptz[], %s::numeric[])
+ON CONFLICT (vehicle_id, day) DO UPDATE SET
+    timestamps = vehicle_odometer_chunks.timestamps || EXCLUDED.timestamps,
+    readings = vehicle_odometer_chunks.readings || EXCLUDED.readings
+"""
+
+# Latest chunk before the day of `timestamp` that lies wholly at or below `reading`:
+# re-anchoring leaves it and everything before it unchanged
+ANCHOR_DAY_SQL = """
+SELECT MAX(day) FROM vehicle_odometer_chunks
+WHERE vehicle_id = %s AND day < %s AND readings[array_length(readings, 1)] <= %s
+"""
+
+REPLACE_SQL = """
+INSERT INTO vehicle_odometer_chunks (vehicle_id, day, timestamps, readings)
+VALUES (%s, %s, %s::timestamptz[], %s::numeric[])
+ON CONFLICT (vehicle_id, day) DO UPDATE SET
+    timestamps = EXCLUDED.timestamps,
+    readings = EXCLUDED.readings
+"""
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two coordinates in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, map(float, (lat1, lon1, lat2, lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def fuel_log_timestamp(fuel_date):
+    """Fuel logs carry a date only; place the reading at midnight"""
+    return datetime.combine(fuel_date, time.min, tzinfo=dt_timezone.utc)
+
+
+def _lock_head(vehicle_id):
+    return VehicleOdometerSeries.objects.select_for_update().filter(vehicle_id=vehicle_id).first()
+
+
+def _day(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).date()
+
+
+def _check_monotonic(head, timestamp, reading):
+    if head is None:
+        return
+    if timestamp < head.last_timestamp:
+        raise ValidationError(f"Odometer point at {timestamp} is older than the series head {head.last_timestamp}.")
+    if reading < head.last_reading:
+        raise ValidationError(f"Odometer reading {reading} is below the series head {head.last_reading}.")
+
+
+def _check_absolute(head, timestamp, reading):
+    """Absolute readings only have to follow the latest absolute reading"""
+    if head is None or head.last_absolute_timestamp is None:
+        return
+    if timestamp < head.last_absolute_timestamp:
+        raise ValidationError(
+            f"Odometer reading at {timestamp} is older than the latest absolute reading at {head.last_absolute_timestamp}."
+        )
+    if reading < head.last_absolute_reading:
+        raise ValidationError(
+            f"Odometer reading {reading} is below the latest absolute reading {head.last_absolute_reading}."
+        )
+
+
+def _km_by_month(points, previous_reading=None):
+    """km between consecutive points, credited to the month of the later one"""
+    km_by_month = {}
+    for timestamp, reading in points:
+        if previous_reading is not None:
+            month = cost_rollups.month_of(_day(timestamp))
+            km_by_month[month] = km_by_month.get(month, 0) + reading - previous_reading
+        previous_reading = reading
+    return km_by_month
+
+
+def _apply_km(vehicle_id, km_by_month):
+    for month, km in km_by_month.items():
+        if not km:
+            continue
+        cost_rollups.apply_delta(vehicle_id, month, km_driven=km)
+        # Per month, so fleet totals round exactly like the rollups they reconcile against
+        fleet_metrics.apply_member_delta('vehicle', vehicle_id, total_km_traveled=km)
+
+
+def _write(vehicle_id, head, points, latitude=None, longitude=None, absolute=False):
+    """Append validated (timestamp, reading) points and move the head"""
+    by_day = {}
+    for timestamp, reading in points:
+        by_day.setdefault(_day(timestamp), []).append((timestamp, reading))
+
+    with connection.cursor() as cursor:
+        for day, day_points in by_day.items():
+            cursor.execute(APPEND_SQL, [
+                vehicle_id, day,
+                [timestamp for timestamp, _ in day_points],
+                [reading for _, reading in day_points],
+            ])
+
+    last_timestamp, last_reading = points[-1]
+    previous_reading = head.last_reading if head is not None else None
+    if head is None:
+        head = VehicleOdometerSeries(vehicle_id=vehicle_id)
+    head.last_timestamp = last_timestamp
+    head.last_reading = last_reading
+    if latitude is not None:
+        head.last_latitude, head.last_longitude = latitude, longitude
+    if absolute:
+        head.last_absolute_timestamp, head.last_absolute_reading = last_timestamp, last_reading
+    head.point_count += len(points)
+    head.save()
+
+    Vehicle.objects.filter(pk=vehicle_id, odometer_reading__lt=last_reading).update(odometer_reading=last_reading)
+    _apply_km(vehicle_id, _km_by_month(points, previous_reading))
+    return head
+
+
+def _reanchor(vehicle_id, head, timestamp, reading):
+    """
+    Insert an absolute reading that is behind or below the GPS-derived head.
+
+    Points after it are shifted by its difference from the series' interpolated
+    reading at that moment; GPS-derived points before it are capped at it, so
+    the series stays monotonic. The rewritten days and the km credited to
+    each month are adjusted accordingly.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(ANCHOR_DAY_SQL, [vehicle_id, _day(timestamp), reading])
+        anchor_day = cursor.fetchone()[0]
+    chunks = VehicleOdometerChunk.objects.filter(vehicle_id=vehicle_id).order_by('day')
+    if anchor_day is not None:
+        # The anchor chunk's last point stays put: it seeds the interpolation and the km deltas
+        chunks = chunks.filter(day__gte=anchor_day)
+    if head.last_absolute_timestamp is not None:
+        # Everything before the latest absolute reading is already anchored
+        chunks = chunks.filter(day__gte=_day(head.last_absolute_timestamp))
+    old_by_day = {chunk.day: list(zip(chunk.timestamps, chunk.readings)) for chunk in chunks}
+    old = [point for day_points in old_by_day.values() for point in day_points]
+
+    position = bisect_right([point_timestamp for point_timestamp, _ in old], timestamp)
+    before, after = old[:position], old[position:]
+    current = _interpolate(before[-1] if before else None, after[0] if after else None, timestamp)
+    offset = reading - current
+
+    new = (
+        [(point_timestamp, min(point_reading, reading)) for point_timestamp, point_reading in before]
+        + [(timestamp, reading)]
+        + [(point_timestamp, point_reading + offset) for point_timestamp, point_reading in after]
+    )
+    new_by_day = {}
+    for point in new:
+        new_by_day.setdefault(_day(point[0]), []).append(point)
+
+    with connection.cursor() as cursor:
+        for day, day_points in new_by_day.items():
+            if old_by_day.get(day) == day_points:
+                continue
+            cursor.execute(REPLACE_SQL, [
+                vehicle_id, day,
+                [point_timestamp for point_timestamp, _ in day_points],
+                [point_reading for _, point_reading in day_points],
+            ])
+
+    head.last_timestamp, head.last_reading = new[-1]
+    head.last_absolute_timestamp, head.last_absolute_reading = timestamp, reading
+    head.point_count += 1
+    head.save()
+
+    # The corrected head is the vehicle's true odometer, even if that is lower
+    Vehicle.objects.filter(pk=vehicle_id).update(odometer_reading=head.last_reading)
+    old_km, new_km = _km_by_month(old), _km_by_month(new)
+    _apply_km(vehicle_id, {
+        month: new_km.get(month, 0) - old_km.get(month, 0) for month in set(old_km) | set(new_km)
+    })
+    return head
+
+
+def _record_absolute(vehicle_id, head, timestamp, reading):
+    """Append or re-anchor one absolute reading under the head lock"""
+    _check_absolute(head, timestamp, reading)
+    if head is None or (timestamp >= head.last_timestamp and reading >= head.last_reading):
+        return _write(vehicle_id, head, [(timestamp, reading)], absolute=True)
+    return _reanchor(vehicle_id, head, timestamp, reading)
+
+
+def record_readings(vehicle_id, points):
+    """
+    Record absolute (timestamp, reading) points in time order.
+
+    Points older than, or below, the latest absolute reading are skipped.
+    Returns the number of points accepted and rejected.
+    """
+    points = sorted(points)
+    accepted = 0
+    with transaction.atomic():
+        head = _lock_head(vehicle_id)
+        appended = []
+        for timestamp, reading in points:
+            reading = Decimal(reading)
+            tail = appended[-1] if appended else (head.last_timestamp, head.last_reading) if head else None
+            if tail is None or (timestamp >= tail[0] and reading >= tail[1]):
+                # Plain appends are written together
+                appended.append((timestamp, reading))
+                accepted += 1
+                continue
+            if appended:
+                head = _write(vehicle_id, head, appended, absolute=True)
+                appended = []
+            try:
+                head = _record_absolute(vehicle_id, head, timestamp, reading)
+            except ValidationError:
+                continue
+            accepted += 1
+        if appended:
+            _write(vehicle_id, head, appended, absolute=True)
+    return accepted, len(points) - accepted
+
+
+def record_reading(vehicle_id, timestamp, reading):
+    """Record one absolute reading; raises ValidationError if it precedes or undercuts the latest one"""
+    with transaction.atomic():
+        _record_absolute(vehicle_id, _lock_head(vehicle_id), timestamp, Decimal(reading))
+
+
+def record_position(vehicle_id, timestamp, latitude, longitude):
+    """
+    Extend the series by the distance from the vehicle's previous position.
+    The first position only anchors the series at the current reading.
+    """
+    with transaction.atomic():
+        head = _lock_head(vehicle_id)
+        if head is None:
+            reading = Vehicle.objects.values_list('odometer_reading', flat=True).get(pk=vehicle_id)
+        elif head.last_latitude is None:
+            reading = head.last_reading
+        else:
+            km = haversine_km(head.last_latitude, head.last_longitude, latitude, longitude)
+            reading = head.last_reading + Decimal(km).quantize(Decimal('0.01'))
+        _check_monotonic(head, timestamp, reading)
+        _write(vehicle_id, head, [(timestamp, reading)], latitude=latitude, longitude=longitude)
+
+
+def record_positions(vehicle_id, positions):
+    """
+    Extend the series by a batch of (timestamp, latitude, longitude) positions
+    in time order, as record_position would one by one. Positions older than
+    the series head are skipped. Returns the number accepted and rejected.
+    """
+    positions = sorted(positions)
+    with transaction.atomic():
+        head = _lock_head(vehicle_id)
+        if head is None:
+            last_timestamp, previous = None, None
+            reading = Vehicle.objects.values_list('odometer_reading', flat=True).get(pk=vehicle_id)
+        else:
+            last_timestamp, reading = head.last_timestamp, head.last_reading
+            previous = (head.last_latitude, head.last_longitude) if head.last_latitude is not None else None
+
+        points = []
+        for timestamp, latitude, longitude in positions:
+            if last_timestamp is not None and timestamp < last_timestamp:
+                continue
+            if previous is not None:
+                km = haversine_km(previous[0], previous[1], latitude, longitude)
+                reading += Decimal(km).quantize(Decimal('0.01'))
+            points.append((timestamp, reading))
+            last_timestamp, previous = timestamp, (latitude, longitude)
+        if points:
+            _write(vehicle_id, head, points, latitude=previous[0], longitude=previous[1])
+    return len(points), len(positions) - len(points)
+
+
+def _bracket(vehicle_id, moment):
+    """The series points immediately at-or-before and after a moment"""
+    day = moment.astimezone(dt_timezone.utc).date()
+    chunks = VehicleOdometerChunk.objects.filter(vehicle_id=vehicle_id)
+    before = after = None
+
+    chunk = chunks.filter(day__lte=day).order_by('-day').first()
+    if chunk is not None:
+        position = bisect_right(chunk.timestamps, moment)
+        if position > 0:
+            before = (chunk.timestamps[position - 1], chunk.readings[position - 1])
+        else:
+            previous = chunks.filter(day__lt=chunk.day).order_by('-day').first()
+            if previous is not None:
+                before = (previous.timestamps[-1], previous.readings[-1])
+        if position < len(chunk.timestamps):
+            after = (chunk.timestamps[position], chunk.readings[position])
+
+    if after is None:
+        following = chunks.filter(day__gt=day).order_by('day').first()
+        if following is not None:
+            after = (following.timestamps[0], following.readings[0])
+    return before, after
+
+
+def _interpolate(before, after, moment):
+    """Reading at a moment between two (timestamp, reading) points, either of which may be None"""
+    if after is None:
+        return before[1]
+    if before is None:
+        return after[1]
+
+    span = (after[0] - before[0]).total_seconds()
+    if span <= 0:
+        return before[1]
+    fraction = Decimal((moment - before[0]).total_seconds() / span)
+    return (before[1] + (after[1] - before[1]) * fraction).quantize(Decimal('0.01'))
+
+
+def reading_at(vehicle_id, moment):
+    """
+    Odometer reading at a moment, interpolated between the surrounding
+    points and clamped to the ends of the series. None if the series is empty.
+    """
+    before, after = _bracket(vehicle_id, moment)
+    if before is None and after is None:
+        return None
+    return _interpolate(before, after, moment)
+
+
+def distance(vehicle_id, start, end):
+    """
+    km driven between two moments as (start_reading, end_reading, km), or
+    None if the vehicle has no odometer series.
+    """
+    start_reading = reading_at(vehicle_id, start)
+    if start_reading is None:
+        return None
+    end_reading = reading_at(vehicle_id, end)
+    return start_reading, end_reading, end_reading - start_reading
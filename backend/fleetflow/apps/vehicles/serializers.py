@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog
+
+from fleetflow.apps.common.computed import ComputedField
+
+from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog, VehicleFuelEfficiency, FuelImport, VehicleCostRollup, VehicleDriverAssignment
 
 
 class VehicleMaintenanceLogSerializer(serializers.ModelSerializer):
@@ -14,11 +17,64 @@ class VehicleFuelLogSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class FuelImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FuelImport
+        fields = '__all__'
+
+
+class VehicleCostRollupSerializer(serializers.ModelSerializer):
+    total_cost = serializers.SerializerMethodField()
+    cost_per_km = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VehicleCostRollup
+        fields = [
+            'month', 'fuel_cost', 'fuel_litres', 'fuel_log_count', 'maintenance_cost',
+            'maintenance_count', 'km_driven', 'total_cost', 'cost_per_km'
+        ]
+
+    def get_total_cost(self, obj):
+        return obj.get_total_cost()
+
+    def get_cost_per_km(self, obj):
+        return obj.get_cost_per_km()
+
+
+class VehicleDriverAssignmentSerializer(serializers.ModelSerializer):
+    driver_name = serializers.CharField(source='driver.name', read_only=True)
+    start = serializers.DateTimeField(source='period.lower', read_only=True)
+    end = serializers.DateTimeField(source='period.upper', read_only=True)
+
+    class Meta:
+        model = VehicleDriverAssignment
+        fields = ['id', 'vehicle', 'driver', 'driver_name', 'start', 'end']
+
+
+class VehicleFuelEfficiencySerializer(serializers.ModelSerializer):
+    km_per_litre = serializers.SerializerMethodField()
+    litres_per_100km = serializers.SerializerMethodField()
+    recent_km_per_litre = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VehicleFuelEfficiency
+        fields = '__all__'
+
+    def get_km_per_litre(self, obj):
+        return obj.get_km_per_litre()
+
+    def get_litres_per_100km(self, obj):
+        return obj.get_litres_per_100km()
+
+    def get_recent_km_per_litre(self, obj):
+        return obj.get_recent_km_per_litre()
+
+
 class VehicleSerializer(serializers.ModelSerializer):
     maintenance_logs = VehicleMaintenanceLogSerializer(many=True, read_only=True)
     fuel_logs = VehicleFuelLogSerializer(many=True, read_only=True)
     driver_name = serializers.CharField(source='assigned_driver.name', read_only=True)
-    is_available = serializers.SerializerMethodField()
+    is_available = ComputedField()
     vehicle_age = serializers.SerializerMethodField()
 
     class Meta:
@@ -28,20 +84,57 @@ class VehicleSerializer(serializers.ModelSerializer):
             'color', 'capacity', 'fuel_type', 'transmission', 'status',
             'odometer_reading', 'assigned_driver', 'driver_name', 'registration_date',
             'last_service_date', 'insurance_expiry', 'is_available', 'vehicle_age',
+            'next_service_date', 'next_service_odometer', 'next_service_type',
             'maintenance_logs', 'fuel_logs', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at', 'driver_name']
-
-    def get_is_available(self, obj):
-        return obj.is_available()
+        read_only_fields = [
+            'created_at', 'updated_at', 'driver_name',
+            'next_service_date', 'next_service_odometer', 'next_service_type',
+        ]
 
     def get_vehicle_age(self, obj):
         return obj.get_vehicle_age()
 
 
+class VehicleDetailSerializer(VehicleSerializer):
+    """
+    Bounded detail representation.
+
+    Expects a queryset built with `with_log_summary()` and `with_recent_logs()`,
+    so nested logs are limited to the latest window and aggregates come from the DB.
+    """
+    maintenance_logs = VehicleMaintenanceLogSerializer(source='recent_maintenance_logs', many=True, read_only=True)
+    fuel_logs = VehicleFuelLogSerializer(source='recent_fuel_logs', many=True, read_only=True)
+    maintenance_count = serializers.IntegerField(read_only=True)
+    maintenance_total_cost = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    last_maintenance_date = serializers.DateField(read_only=True)
+    fuel_log_count = serializers.IntegerField(read_only=True)
+    fuel_total_cost = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    last_fuel_date = serializers.DateField(read_only=True)
+
+    class Meta(VehicleSerializer.Meta):
+        fields = VehicleSerializer.Meta.fields + [
+            'maintenance_count', 'maintenance_total_cost', 'last_maintenance_date',
+            'fuel_log_count', 'fuel_total_cost', 'last_fuel_date',
+        ]
+
+
+class VehicleMaintenanceDueSerializer(serializers.ModelSerializer):
+    km_to_service = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Vehicle
+        fields = [
+            'id', 'license_plate', 'make', 'model', 'status', 'odometer_reading',
+            'last_service_date', 'next_service_date', 'next_service_odometer',
+            'next_service_type', 'km_to_service'
+        ]
+
+
 class VehicleListSerializer(serializers.ModelSerializer):
+    """Expects a queryset with select_related('assigned_driver') and with_computed()"""
     driver_name = serializers.CharField(source='assigned_driver.name', read_only=True)
-    is_available = serializers.SerializerMethodField()
+    is_available = ComputedField()
 
     class Meta:
         model = Vehicle
@@ -49,6 +142,3 @@ class VehicleListSerializer(serializers.ModelSerializer):
             'id', 'license_plate', 'make', 'model', 'vehicle_type',
             'status', 'assigned_driver', 'driver_name', 'is_available', 'created_at'
         ]
-
-    def get_is_available(self, obj):
-        return obj.is_available()
@@ -0,0 +1,171 @@
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from fleetflow.apps.logistics.models import Shipment, ShipmentTracking
+
+from . import assignments, cost_rollups, fuel_efficiency, maintenance_forecast, odometer, utilization
+from .availability import invalidate_available_index
+from .models import Vehicle, VehicleFuelLog, VehicleMaintenanceLog
+
+logger = logging.getLogger(__name__)
+
+FUEL_LOG_ROLLUP_FIELDS = ['vehicle_id', 'fuel_date', 'cost', 'fuel_amount']
+MAINTENANCE_LOG_ROLLUP_FIELDS = ['vehicle_id', 'maintenance_date', 'cost']
+SHIPMENT_BUSY_FIELDS = ['assigned_vehicle_id', 'actual_pickup', 'actual_delivery']
+
+
+def _snapshot(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _stash_previous(sender, instance, fields):
+    """Remember the stored values of an edited log so rollups can be reversed"""
+    instance._rollup_previous = None
+    if instance.pk is not None:
+        instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    """Availability depends on vehicle status and driver assignment"""
+    invalidate_available_index()
+
+
+@receiver(pre_save, sender=Vehicle)
+def vehicle_saving(sender, instance, **kwargs):
+    """Remember the stored driver so reassignments can be recorded"""
+    instance._previous_driver_id = None
+    if instance.pk is not None:
+        instance._previous_driver_id = (
+            sender.objects.filter(pk=instance.pk).values_list('assigned_driver_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Vehicle)
+def vehicle_saved(sender, instance, **kwargs):
+    """Driver changes close the current assignment and open the next"""
+    if instance.assigned_driver_id != getattr(instance, '_previous_driver_id', None):
+        assignments.reassign(instance.pk, instance.assigned_driver_id)
+
+
+@receiver([post_save, post_delete], sender=Shipment)
+def shipment_changed(sender, instance, **kwargs):
+    """Shipment assignment and status changes commit or release vehicles"""
+    invalidate_available_index()
+
+
+@receiver(pre_save, sender=Shipment)
+def shipment_saving(sender, instance, **kwargs):
+    """Remember the stored busy interval so its cached utilization days can be dropped"""
+    instance._busy_previous = None
+    if instance.pk is not None:
+        instance._busy_previous = sender.objects.filter(pk=instance.pk).values(*SHIPMENT_BUSY_FIELDS).first()
+
+
+@receiver(post_save, sender=Shipment)
+def shipment_busy_changed(sender, instance, **kwargs):
+    """Drop the cached utilization days both the old and new busy interval touch"""
+    previous = getattr(instance, '_busy_previous', None)
+    current = _snapshot(instance, SHIPMENT_BUSY_FIELDS)
+    if previous == current:
+        return
+    for interval in (previous, current):
+        if interval:
+            utilization.invalidate(interval['assigned_vehicle_id'], interval['actual_pickup'], interval['actual_delivery'])
+
+
+@receiver(post_delete, sender=Shipment)
+def shipment_busy_deleted(sender, instance, **kwargs):
+    utilization.invalidate(instance.assigned_vehicle_id, instance.actual_pickup, instance.actual_delivery)
+
+
+@receiver(pre_save, sender=VehicleFuelLog)
+def fuel_log_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, FUEL_LOG_ROLLUP_FIELDS)
+
+
+@receiver(post_save, sender=VehicleFuelLog)
+def fuel_log_saved(sender, instance, created, **kwargs):
+    """New fills extend efficiency and odometer series, edits rebuild efficiency"""
+    previous = getattr(instance, '_rollup_previous', None)
+    current = _snapshot(instance, FUEL_LOG_ROLLUP_FIELDS)
+    if previous != current:
+        if previous:
+            cost_rollups.apply_delta(
+                previous['vehicle_id'], previous['fuel_date'], **cost_rollups.fuel_log_delta(previous, -1)
+            )
+        cost_rollups.apply_delta(instance.vehicle_id, instance.fuel_date, **cost_rollups.fuel_log_delta(current))
+
+    if created:
+        fuel_efficiency.record_fill(instance)
+        try:
+            odometer.record_reading(
+                instance.vehicle_id, odometer.fuel_log_timestamp(instance.fuel_date), instance.odometer_reading
+            )
+        except ValidationError as e:
+            logger.warning("Fuel log %s not added to odometer series: %s", instance.pk, e.messages[0])
+    else:
+        vehicle_ids = {instance.vehicle_id, previous['vehicle_id']} if previous else {instance.vehicle_id}
+        fuel_efficiency.recompute_vehicles(vehicle_ids)
+
+
+@receiver(post_delete, sender=VehicleFuelLog)
+def fuel_log_deleted(sender, instance, origin=None, **kwargs):
+    """Skip per-log updates when the whole vehicle is being deleted"""
+    if isinstance(origin, Vehicle):
+        return
+    current = _snapshot(instance, FUEL_LOG_ROLLUP_FIELDS)
+    cost_rollups.apply_delta(instance.vehicle_id, instance.fuel_date, **cost_rollups.fuel_log_delta(current, -1))
+    fuel_efficiency.recompute_vehicle(instance.vehicle_id)
+
+
+@receiver(pre_save, sender=VehicleMaintenanceLog)
+def maintenance_log_saving(sender, instance, **kwargs):
+    _stash_previous(sender, instance, MAINTENANCE_LOG_ROLLUP_FIELDS)
+
+
+@receiver(post_save, sender=VehicleMaintenanceLog)
+def maintenance_log_saved(sender, instance, **kwargs):
+    """Move the log's cost between rollups and re-forecast the next service"""
+    previous = getattr(instance, '_rollup_previous', None)
+    current = _snapshot(instance, MAINTENANCE_LOG_ROLLUP_FIELDS)
+    if previous != current:
+        if previous:
+            cost_rollups.apply_delta(
+                previous['vehicle_id'], previous['maintenance_date'], **cost_rollups.maintenance_log_delta(previous, -1)
+            )
+        cost_rollups.apply_delta(
+            instance.vehicle_id, instance.maintenance_date, **cost_rollups.maintenance_log_delta(current)
+        )
+
+    vehicle_ids = {instance.vehicle_id, previous['vehicle_id']} if previous else {instance.vehicle_id}
+    maintenance_forecast.forecast_vehicles(vehicle_ids)
+
+
+@receiver(post_delete, sender=VehicleMaintenanceLog)
+def maintenance_log_deleted(sender, instance, origin=None, **kwargs):
+    """Skip per-log updates when the whole vehicle is being deleted"""
+    if isinstance(origin, Vehicle):
+        return
+    current = _snapshot(instance, MAINTENANCE_LOG_ROLLUP_FIELDS)
+    cost_rollups.apply_delta(
+        instance.vehicle_id, instance.maintenance_date, **cost_rollups.maintenance_log_delta(current, -1)
+    )
+    maintenance_forecast.forecast_vehicles([instance.vehicle_id])
+
+
+@receiver(post_save, sender=ShipmentTracking)
+def tracking_event_created(sender, instance, created, **kwargs):
+    """GPS pings extend the assigned vehicle's odometer series"""
+    if not created:
+        return
+    vehicle_id = Shipment.objects.filter(pk=instance.shipment_id).values_list('assigned_vehicle_id', flat=True).first()
+    if vehicle_id is None:
+        return
+    try:
+        odometer.record_position(vehicle_id, instance.timestamp, instance.latitude, instance.longitude)
+    except ValidationError as e:
+        logger.warning("Tracking event %s not added to odometer series: %s", instance.pk, e.messages[0])
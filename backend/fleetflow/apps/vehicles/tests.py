@@ -0,0 +1,224 @@
+import io
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import fuel_import, odometer
+from .models import FuelImport, Vehicle, VehicleCostRollup, VehicleFuelLog, VehicleMaintenanceLog, VehicleOdometerSeries
+
+
+class VehicleRetrieveQueryCountTests(TestCase):
+    """Vehicle detail costs the same number of queries however many logs a vehicle has"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dispatcher', password='secret')
+        cls.empty = Vehicle.objects.create(license_plate='EMPTY-1', make='Volvo', model='FH', capacity=18000)
+        cls.busy = Vehicle.objects.create(license_plate='BUSY-1', make='Volvo', model='FH', capacity=18000)
+
+        # bulk_create skips the log signals, which aren't under test here
+        start = date(2024, 1, 1)
+        VehicleMaintenanceLog.objects.bulk_create([
+            VehicleMaintenanceLog(
+                vehicle=cls.busy, maintenance_type='repair', description='Repair',
+                cost=100, maintenance_date=start + timedelta(days=day),
+            )
+            for day in range(50)
+        ])
+        VehicleFuelLog.objects.bulk_create([
+            VehicleFuelLog(
+                vehicle=cls.busy, fuel_amount=40, cost=60,
+                odometer_reading=1000 + 100 * day, fuel_date=start + timedelta(days=day),
+            )
+            for day in range(50)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _retrieve(self, vehicle, **params):
+        response = self.client.get(f'/api/vehicles/{vehicle.pk}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_query_count_does_not_grow_with_logs(self):
+        with CaptureQueriesContext(connection) as baseline:
+            self._retrieve(self.empty)
+
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            data = self._retrieve(self.busy)
+
+        self.assertEqual(data['maintenance_count'], 50)
+        self.assertEqual(data['fuel_log_count'], 50)
+        self.assertEqual(len(data['maintenance_logs']), 10)
+        self.assertEqual(len(data['fuel_logs']), 10)
+
+    def test_log_window_is_bounded(self):
+        with CaptureQueriesContext(connection) as baseline:
+            self._retrieve(self.busy)
+
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            data = self._retrieve(self.busy, logs=1000)
+
+        self.assertEqual(len(data['fuel_logs']), 50)
+        self.assertEqual(data['fuel_logs'][0]['fuel_date'], str(date(2024, 1, 1) + timedelta(days=49)))
+
+
+class FuelLogKeysetPaginationTests(TestCase):
+    """Fuel logs page by (fuel_date, id) when the client asks for a cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dispatcher', password='secret')
+        vehicle = Vehicle.objects.create(license_plate='FUEL-1', make='Volvo', model='FH', capacity=18000)
+        VehicleFuelLog.objects.bulk_create([
+            VehicleFuelLog(
+                vehicle=vehicle, fuel_amount=40, cost=60,
+                odometer_reading=1000 + 100 * day, fuel_date=date(2024, 1, 1) + timedelta(days=day),
+            )
+            for day in range(3)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_follow_on(self):
+        response = self.client.get('/api/vehicles/fuel-logs/', {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log['fuel_date'] for log in response.data['results']], ['2024-01-03', '2024-01-02'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log['fuel_date'] for log in response.data['results']], ['2024-01-01'])
+        self.assertIsNone(response.data['next'])
+
+
+class OdometerReanchorTests(TestCase):
+    """Absolute readings behind GPS-derived points re-anchor the series instead of being dropped"""
+
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(
+            license_plate='ODO-1', make='Volvo', model='FH', capacity=18000, odometer_reading=1000
+        )
+
+    def _at(self, hour):
+        return datetime(2024, 3, 1, hour, tzinfo=dt_timezone.utc)
+
+    def test_fuel_reading_behind_pings_is_inserted_and_shifts_later_points(self):
+        odometer.record_reading(self.vehicle.pk, self._at(0), Decimal('1000'))
+        odometer.record_position(self.vehicle.pk, self._at(8), Decimal('59.0'), Decimal('18.0'))
+        odometer.record_position(self.vehicle.pk, self._at(10), Decimal('59.5'), Decimal('18.0'))
+        gps_km = odometer.reading_at(self.vehicle.pk, self._at(10)) - 1000
+
+        # Lands between the pings, behind the GPS-derived head
+        odometer.record_reading(self.vehicle.pk, self._at(9), Decimal('1050'))
+
+        head = VehicleOdometerSeries.objects.get(vehicle=self.vehicle)
+        self.assertEqual(head.last_absolute_reading, Decimal('1050'))
+        self.assertEqual(odometer.reading_at(self.vehicle.pk, self._at(9)), Decimal('1050'))
+        # The increment after the fuel reading is preserved on top of it
+        self.assertEqual(head.last_reading, 1050 + gps_km / 2)
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.odometer_reading, head.last_reading)
+
+    def test_fuel_reading_below_gps_head_caps_earlier_points(self):
+        odometer.record_reading(self.vehicle.pk, self._at(0), Decimal('1000'))
+        odometer.record_position(self.vehicle.pk, self._at(8), Decimal('59.0'), Decimal('18.0'))
+        odometer.record_position(self.vehicle.pk, self._at(10), Decimal('60.0'), Decimal('18.0'))
+
+        odometer.record_reading(self.vehicle.pk, self._at(12), Decimal('1020'))
+
+        self.assertEqual(odometer.reading_at(self.vehicle.pk, self._at(10)), Decimal('1020'))
+        self.assertEqual(VehicleOdometerSeries.objects.get(vehicle=self.vehicle).last_reading, Decimal('1020'))
+
+
+    def test_reanchor_across_days_keeps_km_rollups_consistent(self):
+        odometer.record_position(self.vehicle.pk, self._at(0) - timedelta(days=40), Decimal('59.0'), Decimal('18.0'))
+        for day, latitude in enumerate(('59.2', '59.4', '59.6'), start=1):
+            odometer.record_position(
+                self.vehicle.pk, self._at(12) + timedelta(days=day), Decimal(latitude), Decimal('18.0')
+            )
+        before = odometer.reading_at(self.vehicle.pk, self._at(12) + timedelta(days=1))
+
+        # Below the day-2 and day-3 points, so those are capped and the day-3 increment kept
+        odometer.record_reading(self.vehicle.pk, self._at(0) + timedelta(days=3), before + 1)
+
+        head = VehicleOdometerSeries.objects.get(vehicle=self.vehicle)
+        self.assertEqual(odometer.reading_at(self.vehicle.pk, self._at(12) + timedelta(days=1)), before)
+        self.assertEqual(odometer.reading_at(self.vehicle.pk, self._at(12) + timedelta(days=2)), before + 1)
+        first = odometer.reading_at(self.vehicle.pk, self._at(0) - timedelta(days=40))
+        km = sum(VehicleCostRollup.objects.filter(vehicle=self.vehicle).values_list('km_driven', flat=True))
+        self.assertEqual(km, head.last_reading - first)
+
+class CostRollupTests(TestCase):
+    """The first log of a month creates its rollup row"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('dispatcher', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vehicle = Vehicle.objects.create(license_plate='ROLL-1', make='Volvo', model='FH', capacity=18000)
+
+    def _post(self, action, data):
+        response = self.client.post(
+            f'/api/vehicles/{self.vehicle.pk}/{action}/', {'vehicle': self.vehicle.pk, **data}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_logs_for_a_month_without_a_rollup_row(self):
+        self._post('add_fuel_log', {
+            'fuel_amount': '40.00', 'cost': '60.00', 'odometer_reading': '1000.00', 'fuel_date': '2024-05-03',
+        })
+        self._post('add_maintenance_log', {
+            'maintenance_type': 'repair', 'description': 'Brakes', 'cost': '250.00', 'maintenance_date': '2024-06-10',
+        })
+
+        may = VehicleCostRollup.objects.get(vehicle=self.vehicle, month=date(2024, 5, 1))
+        self.assertEqual((may.fuel_cost, may.fuel_litres, may.fuel_log_count), (Decimal('60'), Decimal('40'), 1))
+        self.assertEqual((may.maintenance_cost, may.maintenance_count), (0, 0))
+        june = VehicleCostRollup.objects.get(vehicle=self.vehicle, month=date(2024, 6, 1))
+        self.assertEqual((june.maintenance_cost, june.maintenance_count), (Decimal('250'), 1))
+        self.assertEqual((june.fuel_cost, june.fuel_log_count), (0, 0))
+
+
+class FuelImportIdempotencyTests(TestCase):
+    """An import abandoned mid-flight doesn't hold its key forever"""
+
+    csv = b'license_plate,fuel_date,fuel_amount,cost,odometer_reading\nIMP-1,2024-04-02,40,60,1000\n'
+
+    def setUp(self):
+        Vehicle.objects.create(license_plate='IMP-1', make='Volvo', model='FH', capacity=18000)
+
+    def _import(self):
+        return fuel_import.import_fuel_logs(io.BytesIO(self.csv), 'csv', 'key-1', source_name='card.csv')
+
+    def _processing(self, age):
+        left = FuelImport.objects.create(idempotency_key='key-1', file_format='csv')
+        FuelImport.objects.filter(pk=left.pk).update(created_at=timezone.now() - age)
+
+    def test_recent_processing_import_is_reported_in_progress(self):
+        self._processing(timedelta(minutes=1))
+
+        result, created = self._import()
+
+        self.assertFalse(created)
+        self.assertEqual(result.status, 'processing')
+        self.assertFalse(VehicleFuelLog.objects.exists())
+
+    def test_stale_processing_import_is_taken_over(self):
+        self._processing(fuel_import.STALE_IMPORT_AFTER + timedelta(minutes=1))
+
+        result, created = self._import()
+
+        self.assertTrue(created)
+        self.assertEqual((result.status, result.imported_rows), ('completed', 1))
+        self.assertEqual(FuelImport.objects.count(), 1)
+        self.assertEqual(VehicleFuelLog.objects.count(), 1)
@@ -5,9 +5,10 @@ from .views import VehicleViewSet, VehicleMaintenanceLogViewSet, VehicleFuelLogV
 app_name = 'vehicles'
 
 router = DefaultRouter()
-router.register(r'', VehicleViewSet, basename='vehicle')
+# Registered ahead of the vehicle routes so the log prefixes aren't read as vehicle IDs
 router.register(r'maintenance-logs', VehicleMaintenanceLogViewSet, basename='maintenance-log')
 router.register(r'fuel-logs', VehicleFuelLogViewSet, basename='fuel-log')
+router.register(r'', VehicleViewSet, basename='vehicle')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,184 @@
+"""
+Vehicle utilization.
+
+A vehicle is busy from a shipment's actual pickup to its actual delivery (or
+now, while it is still in transit). Shipments can overlap, so busy time is
+the length of the union of those intervals: each query pulls the intervals
+of all requested vehicles sorted by (vehicle, pickup), and one linear sweep
+merges them.
+
+Busy seconds per closed UTC day are cached in VehicleUtilizationDay, so a
+window only recomputes the current day and its partial edge days. Shipment
+changes delete the cached days they touch.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from fleetflow.apps.logistics.models import Shipment
+
+from .models import VehicleUtilizationDay
+
+DAY_SECONDS = 86400
+
+
+def day_start(day):
+    """Midnight UTC at the start of a day"""
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def _intervals(vehicle_ids, start, end, now):
+    """
+    Yield (vehicle_id, busy_start, busy_end) for shipments overlapping
+    [start, end), sorted by vehicle then pickup, in one query.
+    """
+    rows = (
+        Shipment.objects.filter(
+            Q(actual_delivery__isnull=True) | Q(actual_delivery__gt=start),
+            assigned_vehicle_id__in=vehicle_ids,
+            actual_pickup__isnull=False,
+            actual_pickup__lt=end,
+        )
+        .order_by('assigned_vehicle_id', 'actual_pickup')
+        .values_list('assigned_vehicle_id', 'actual_pickup', 'actual_delivery')
+    )
+    for vehicle_id, pickup, delivery in rows.iterator():
+        yield vehicle_id, pickup, delivery or now
+
+
+def merged_intervals(vehicle_ids, start, end, now=None):
+    """
+    Union of each vehicle's busy intervals, clipped to [start, end).
+    Returns {vehicle_id: [(busy_start, busy_end), ...]} in time order.
+    """
+    now = now or timezone.now()
+    merged = {}
+    current_vehicle = current_start = current_end = None
+    for vehicle_id, busy_start, busy_end in _intervals(vehicle_ids, start, end, now):
+        busy_start, busy_end = max(busy_start, start), min(busy_end, end)
+        if busy_end <= busy_start:
+            continue
+        if vehicle_id == current_vehicle and busy_start <= current_end:
+            current_end = max(current_end, busy_end)
+            continue
+        if current_vehicle is not None:
+            merged.setdefault(current_vehicle, []).append((current_start, current_end))
+        current_vehicle, current_start, current_end = vehicle_id, busy_start, busy_end
+    if current_vehicle is not None:
+        merged.setdefault(current_vehicle, []).append((current_start, current_end))
+    return merged
+
+
+def busy_seconds(vehicle_ids, start, end, now=None):
+    """Busy seconds per vehicle within [start, end), computed from the shipments"""
+    return {
+        vehicle_id: sum((busy_end - busy_start).total_seconds() for busy_start, busy_end in intervals)
+        for vehicle_id, intervals in merged_intervals(vehicle_ids, start, end, now).items()
+    }
+
+
+def busy_seconds_by_day(vehicle_ids, first_day, last_day, now=None):
+    """Busy seconds per (vehicle, day) for the days first_day..last_day inclusive"""
+    by_day = {}
+    merged = merged_intervals(vehicle_ids, day_start(first_day), day_start(last_day + timedelta(days=1)), now)
+    for vehicle_id, intervals in merged.items():
+        for busy_start, busy_end in intervals:
+            while busy_start < busy_end:
+                day = busy_start.astimezone(dt_timezone.utc).date()
+                split = min(day_start(day + timedelta(days=1)), busy_end)
+                key = (vehicle_id, day)
+                by_day[key] = by_day.get(key, 0) + (split - busy_start).total_seconds()
+                busy_start = split
+    return by_day
+
+
+def daily_busy_seconds(vehicle_ids, first_day, last_day, now=None):
+    """
+    Busy seconds per vehicle over whole days first_day..last_day inclusive.
+    Closed days come from the cache; missing ones are computed in one pass
+    and cached, and the current day is always computed.
+    """
+    now = now or timezone.now()
+    today = now.astimezone(dt_timezone.utc).date()
+    vehicle_ids = list(vehicle_ids)
+    totals = dict.fromkeys(vehicle_ids, 0.0)
+    if last_day < first_day:
+        return totals
+
+    closed_last = min(last_day, today - timedelta(days=1))
+    cached = set()
+    for vehicle_id, day, seconds in VehicleUtilizationDay.objects.filter(
+        vehicle_id__in=vehicle_ids, day__range=(first_day, closed_last)
+    ).values_list('vehicle_id', 'day', 'busy_seconds'):
+        totals[vehicle_id] += seconds
+        cached.add((vehicle_id, day))
+
+    closed_days = [first_day + timedelta(days=offset) for offset in range((closed_last - first_day).days + 1)]
+    missing = [(vehicle_id, day) for vehicle_id in vehicle_ids for day in closed_days if (vehicle_id, day) not in cached]
+    open_days = last_day >= today
+    if not missing and not open_days:
+        return totals
+
+    # One pass covers the uncached days and the open ones
+    compute_vehicles = {vehicle_id for vehicle_id, _ in missing} | (set(vehicle_ids) if open_days else set())
+    compute_first = min(day for _, day in missing) if missing else max(first_day, today)
+    computed = busy_seconds_by_day(compute_vehicles, compute_first, last_day, now)
+
+    for vehicle_id, day in missing:
+        totals[vehicle_id] += computed.get((vehicle_id, day), 0)
+    if open_days:
+        for (vehicle_id, day), seconds in computed.items():
+            if day >= today and vehicle_id in totals:
+                totals[vehicle_id] += seconds
+
+    with transaction.atomic():
+        VehicleUtilizationDay.objects.bulk_create(
+            [
+                VehicleUtilizationDay(vehicle_id=vehicle_id, day=day, busy_seconds=computed.get((vehicle_id, day), 0))
+                for vehicle_id, day in missing
+            ],
+            ignore_conflicts=True,
+        )
+    return totals
+
+
+def utilization(vehicle_ids, start, end, now=None):
+    """
+    Fraction of [start, end) each vehicle was busy. Whole days inside the
+    window are read through the daily cache; partial days at the edges are
+    computed directly.
+    """
+    vehicle_ids = list(vehicle_ids)
+    window = (end - start).total_seconds()
+    if window <= 0:
+        return dict.fromkeys(vehicle_ids, 0.0)
+
+    start_utc, end_utc = start.astimezone(dt_timezone.utc), end.astimezone(dt_timezone.utc)
+    first_day = start_utc.date() if start_utc.time() == time.min else start_utc.date() + timedelta(days=1)
+    last_day = end_utc.date() - timedelta(days=1)
+
+    if last_day < first_day:
+        busy = dict.fromkeys(vehicle_ids, 0.0)
+        busy.update(busy_seconds(vehicle_ids, start, end, now))
+    else:
+        busy = daily_busy_seconds(vehicle_ids, first_day, last_day, now)
+        edges = [(start, day_start(first_day)), (day_start(last_day + timedelta(days=1)), end)]
+        for edge_start, edge_end in edges:
+            if edge_end > edge_start:
+                for vehicle_id, seconds in busy_seconds(vehicle_ids, edge_start, edge_end, now).items():
+                    busy[vehicle_id] += seconds
+    return {vehicle_id: seconds / window for vehicle_id, seconds in busy.items()}
+
+
+def invalidate(vehicle_id, busy_start, busy_end):
+    """Drop cached days of a vehicle overlapping a busy interval (open-ended if busy_end is None)"""
+    if vehicle_id is None or busy_start is None:
+        return
+    days = VehicleUtilizationDay.objects.filter(
+        vehicle_id=vehicle_id, day__gte=busy_start.astimezone(dt_timezone.utc).date()
+    )
+    if busy_end is not None:
+        days = days.filter(day__lte=busy_end.astimezone(dt_timezone.utc).date())
+    days.delete()
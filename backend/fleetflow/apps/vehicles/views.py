@@ -1,12 +1,30 @@
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from fleetflow.apps.common.filters import TrigramSearchFilter
+from fleetflow.apps.common.pagination import OptionalKeysetPagination
 
-from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog
-from .serializers import VehicleSerializer, VehicleListSerializer, VehicleMaintenanceLogSerializer, VehicleFuelLogSerializer
+from . import assignments, odometer, utilization
+from .availability import available_vehicle_ids
+from .filters import VehicleFilter
+from .fuel_import import detect_format, file_digest, import_fuel_logs
+from .models import Vehicle, VehicleMaintenanceLog, VehicleFuelLog, VehicleFuelEfficiency, FuelImport, VehicleCostRollup
+from .serializers import (
+    VehicleSerializer, VehicleDetailSerializer, VehicleListSerializer, VehicleMaintenanceLogSerializer,
+    VehicleFuelLogSerializer, VehicleFuelEfficiencySerializer, FuelImportSerializer,
+    VehicleMaintenanceDueSerializer, VehicleCostRollupSerializer, VehicleDriverAssignmentSerializer,
+)
 
 
 class VehicleViewSet(viewsets.ModelViewSet):
@@ -14,35 +32,109 @@ class VehicleViewSet(viewsets.ModelViewSet):
     ViewSet for managing vehicles.
     
     Available endpoints:
-    - GET /api/vehicles/ - List all vehicles
-    - GET /api/vehicles/{id}/ - Get vehicle details
+    - GET /api/vehicles/ - List all vehicles (?is_available=true|false)
+    - GET /api/vehicles/{id}/ - Get vehicle details (?logs=N latest logs of each kind)
     - POST /api/vehicles/ - Create new vehicle
     - PUT /api/vehicles/{id}/ - Update vehicle
     - DELETE /api/vehicles/{id}/ - Delete vehicle
-    - GET /api/vehicles/available/ - Get available vehicles
+    - GET /api/vehicles/available/ - Get available vehicles (?vehicle_type=, ?min_capacity=)
     - POST /api/vehicles/{id}/add_fuel_log/ - Add fuel log
     - POST /api/vehicles/{id}/add_maintenance_log/ - Add maintenance log
+    - GET /api/vehicles/{id}/fuel_efficiency/ - Get rolling fuel efficiency
+    - GET /api/vehicles/maintenance-due/ - Vehicles due for service (?days=N, ?km=N)
+    - GET /api/vehicles/{id}/distance/?start=&end= - km driven in a time window
+    - GET /api/vehicles/{id}/utilization/?start=&end= - Share of a time window spent on shipments
+    - GET /api/vehicles/{id}/costs/?from=YYYY-MM&to=YYYY-MM - Monthly cost breakdown
+    - GET /api/vehicles/cost-summary/?from=YYYY-MM&to=YYYY-MM - Cost totals per vehicle
+    - GET /api/vehicles/{id}/driver_at/?at= - Driver assigned at a moment
+    - GET /api/vehicles/{id}/assignments/ - Driver assignment history
     """
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['status', 'vehicle_type', 'fuel_type']
+    filter_backends = [DjangoFilterBackend, OrderingFilter, TrigramSearchFilter]
+    filterset_class = VehicleFilter
     search_fields = ['license_plate', 'make', 'model', 'vin']
     ordering_fields = ['created_at', 'license_plate', 'capacity']
     ordering = ['-created_at']
 
+    default_log_window = 10
+    max_log_window = 100
+    default_utilization_days = 30
+    max_utilization_days = 366 * 5
+    max_due_days = 3660
+
+    def get_log_window(self):
+        """Number of latest logs of each kind to embed, from ?logs="""
+        try:
+            window = int(self.request.query_params.get('logs', self.default_log_window))
+        except (TypeError, ValueError):
+            window = self.default_log_window
+        return max(0, min(window, self.max_log_window))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related('assigned_driver').with_computed()
+        if self.action == 'retrieve':
+            queryset = (
+                queryset.select_related('assigned_driver')
+                .with_computed('is_available')
+                .with_log_summary()
+                .with_recent_logs(self.get_log_window())
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return VehicleListSerializer
+        if self.action == 'retrieve':
+            return VehicleDetailSerializer
         return VehicleSerializer
 
     @action(detail=False, methods=['get'])
     def available(self, request):
-        """Get all available vehicles"""
-        available_vehicles = self.queryset.filter(status='active', assigned_driver__isnull=True)
-        serializer = VehicleSerializer(available_vehicles, many=True)
-        return Response(serializer.data)
+        """Get available vehicles, smallest sufficient capacity first"""
+        vehicle_type = request.query_params.get('vehicle_type')
+        if vehicle_type and vehicle_type not in dict(Vehicle.VEHICLE_TYPE_CHOICES):
+            return Response({'error': 'Invalid vehicle_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        min_capacity = request.query_params.get('min_capacity')
+        if min_capacity:
+            try:
+                min_capacity = Decimal(min_capacity)
+                if not min_capacity.is_finite():
+                    raise InvalidOperation
+            except InvalidOperation:
+                return Response({'error': 'min_capacity must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        vehicle_ids = available_vehicle_ids(vehicle_type=vehicle_type or None, min_capacity=min_capacity or None)
+        page_ids = self.paginate_queryset(vehicle_ids)
+        vehicles = Vehicle.objects.select_related('assigned_driver').with_computed().in_bulk(page_ids)
+        page = [vehicles[vehicle_id] for vehicle_id in page_ids if vehicle_id in vehicles]
+        serializer = VehicleListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='maintenance-due')
+    def maintenance_due(self, request):
+        """Get vehicles whose forecast service is due within N days or km"""
+        try:
+            days = int(request.query_params['days']) if 'days' in request.query_params else None
+            km = Decimal(request.query_params['km']) if 'km' in request.query_params else None
+            if km is not None and not km.is_finite():
+                raise InvalidOperation
+        except (ValueError, InvalidOperation):
+            return Response({'error': 'days and km must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if days is None and km is None:
+            days = 30
+        if days is not None:
+            days = max(0, min(days, self.max_due_days))
+
+        until_date = timezone.now().date() + timedelta(days=days) if days is not None else None
+        vehicles = Vehicle.objects.maintenance_due(until_date=until_date, within_km=km).order_by('next_service_date', 'id')
+        page = self.paginate_queryset(vehicles)
+        serializer = VehicleMaintenanceDueSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def add_fuel_log(self, request, pk=None):
@@ -80,6 +172,173 @@ class VehicleViewSet(viewsets.ModelViewSet):
         serializer = VehicleFuelLogSerializer(fuel_logs, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def fuel_efficiency(self, request, pk=None):
+        """Get rolling fuel efficiency for a vehicle"""
+        vehicle = self.get_object()
+        try:
+            efficiency = vehicle.fuel_efficiency
+        except VehicleFuelEfficiency.DoesNotExist:
+            return Response({'error': 'No fuel efficiency data for this vehicle'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = VehicleFuelEfficiencySerializer(efficiency)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def distance(self, request, pk=None):
+        """Get km driven between ?start= and ?end= (ISO dates or datetimes)"""
+        vehicle = self.get_object()
+        start = _parse_moment(request.query_params.get('start'))
+        end = _parse_moment(request.query_params.get('end'))
+        if start is None or end is None or end < start:
+            return Response(
+                {'error': 'start and end must be ISO dates or datetimes with start <= end'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = odometer.distance(vehicle.pk, start, end)
+        if result is None:
+            return Response({'error': 'No odometer data for this vehicle'}, status=status.HTTP_404_NOT_FOUND)
+        start_reading, end_reading, km = result
+        return Response({
+            'vehicle': vehicle.pk,
+            'start': start,
+            'end': end,
+            'start_reading': start_reading,
+            'end_reading': end_reading,
+            'distance_km': km,
+        })
+
+    @action(detail=True, methods=['get'])
+    def utilization(self, request, pk=None):
+        """Get the share of ?start= to ?end= (ISO dates or datetimes, default the last 30 days) spent on shipments"""
+        vehicle = self.get_object()
+        now = timezone.now()
+        start = _parse_moment(request.query_params.get('start')) if 'start' in request.query_params else (
+            now - timedelta(days=self.default_utilization_days)
+        )
+        end = _parse_moment(request.query_params.get('end')) if 'end' in request.query_params else now
+        if start is None or end is None or end <= start:
+            return Response(
+                {'error': 'start and end must be ISO dates or datetimes with start < end'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Every closed day in the window gets a cache row, so the window is bounded
+        max_window = timedelta(days=self.max_utilization_days)
+        if end - start > max_window or end > now + max_window:
+            return Response(
+                {'error': f'The window can span at most {self.max_utilization_days} days and end at most that far ahead'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rate = utilization.utilization([vehicle.pk], start, end, now)[vehicle.pk]
+        window_hours = (end - start).total_seconds() / 3600
+        return Response({
+            'vehicle': vehicle.pk,
+            'start': start,
+            'end': end,
+            'busy_hours': rate * window_hours,
+            'window_hours': window_hours,
+            'utilization_rate': rate,
+        })
+
+    @action(detail=True, methods=['get'])
+    def driver_at(self, request, pk=None):
+        """Get the driver assigned to the vehicle at ?at= (ISO date or datetime, default now)"""
+        vehicle = self.get_object()
+        moment = _parse_moment(request.query_params.get('at')) if 'at' in request.query_params else timezone.now()
+        if moment is None:
+            return Response({'error': 'at must be an ISO date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+
+        assignment = assignments.driver_at(vehicle.pk, moment)
+        if assignment is None:
+            return Response({'error': 'No driver assigned at that time'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = VehicleDriverAssignmentSerializer(assignment)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def assignments(self, request, pk=None):
+        """Get the vehicle's driver assignment history, latest first"""
+        vehicle = self.get_object()
+        history = vehicle.driver_assignments.select_related('driver').order_by('-period')
+        page = self.paginate_queryset(history)
+        serializer = VehicleDriverAssignmentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def costs(self, request, pk=None):
+        """Get monthly cost and cost-per-km breakdown for a vehicle"""
+        vehicle = self.get_object()
+        rollups = _filter_months(VehicleCostRollup.objects.filter(vehicle=vehicle), request)
+        if rollups is None:
+            return Response({'error': 'from and to must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+
+        months = VehicleCostRollupSerializer(rollups.order_by('month'), many=True).data
+        totals = rollups.aggregate(**_COST_TOTALS)
+        return Response({'vehicle': vehicle.pk, 'totals': _with_cost_per_km(totals), 'months': months})
+
+    @action(detail=False, methods=['get'], url_path='cost-summary')
+    def cost_summary(self, request):
+        """Get cost totals per vehicle, highest total cost first"""
+        rollups = _filter_months(VehicleCostRollup.objects.all(), request)
+        if rollups is None:
+            return Response({'error': 'from and to must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = (
+            rollups.values('vehicle', license_plate=F('vehicle__license_plate'))
+            .annotate(**_COST_TOTALS)
+            .order_by('-total_cost', 'vehicle_id')
+        )
+        page = self.paginate_queryset(summary)
+        return self.get_paginated_response([_with_cost_per_km(row) for row in page])
+
+
+_COST_TOTALS = {
+    'total_fuel_cost': Sum('fuel_cost'),
+    'total_maintenance_cost': Sum('maintenance_cost'),
+    'total_cost': Sum(F('fuel_cost') + F('maintenance_cost')),
+    'total_km': Sum('km_driven'),
+}
+
+
+def _with_cost_per_km(totals):
+    total_km = totals.get('total_km')
+    totals['cost_per_km'] = totals['total_cost'] / total_km if total_km else None
+    return totals
+
+
+def _filter_months(rollups, request):
+    """Apply ?from= and ?to= (YYYY-MM) to a rollup queryset, None if invalid"""
+    for param, lookup in (('from', 'month__gte'), ('to', 'month__lte')):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            month = parse_date(f'{value}-01')
+        except ValueError:
+            return None
+        if month is None:
+            return None
+        rollups = rollups.filter(**{lookup: month})
+    return rollups
+
+
+def _parse_moment(value):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = odometer.fuel_log_timestamp(day)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
 
 class VehicleMaintenanceLogViewSet(viewsets.ModelViewSet):
     """ViewSet for vehicle maintenance logs"""
@@ -93,11 +352,41 @@ class VehicleMaintenanceLogViewSet(viewsets.ModelViewSet):
 
 
 class VehicleFuelLogViewSet(viewsets.ModelViewSet):
-    """ViewSet for vehicle fuel logs"""
+    """
+    ViewSet for vehicle fuel logs
+
+    - POST /api/vehicles/fuel-logs/import/ - Bulk import a fuel-card file
+      (multipart `file`, CSV or JSON lines; optional `Idempotency-Key` header)
+    - GET /api/vehicles/fuel-logs/?pagination=cursor - Keyset pagination on (fuel_date, id)
+    """
     queryset = VehicleFuelLog.objects.all()
     serializer_class = VehicleFuelLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
+    keyset_ordering = ('-fuel_date', '-id')
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['vehicle']
     ordering_fields = ['fuel_date', 'created_at']
     ordering = ['-fuel_date']
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Import fuel-card transactions from a CSV or JSON-lines file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format') or detect_format(upload.name)
+        if file_format not in dict(FuelImport.FORMAT_CHOICES):
+            return Response({'error': 'Invalid format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        idempotency_key = request.headers.get('Idempotency-Key') or file_digest(upload.file)
+        max_key_length = FuelImport._meta.get_field('idempotency_key').max_length
+        if len(idempotency_key) > max_key_length:
+            return Response(
+                {'error': f'Idempotency-Key must be at most {max_key_length} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fuel_import, created = import_fuel_logs(upload.file, file_format, idempotency_key, source_name=upload.name)
+        serializer = FuelImportSerializer(fuel_import)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third-party
     "rest_framework",
@@ -152,12 +153,41 @@ REST_FRAMEWORK = {
 # ==============================
 CORS_ALLOW_ALL_ORIGINS = True
 
+# ==============================
+# CACHE
+# ==============================
+# Shared Redis cache when REDIS_CACHE_URL is set; per-process memory otherwise (dev, tests)
+REDIS_CACHE_URL = config("REDIS_CACHE_URL", default="")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # ==============================
 # CELERY
 # ==============================
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
 
+# ==============================
+# TRACKING WRITE-BEHIND
+# ==============================
+# Queue batch-ingested GPS pings in Redis and let flush_tracking_buffer write them
+TRACKING_WRITE_BEHIND = config("TRACKING_WRITE_BEHIND", default=False, cast=bool)
+TRACKING_BUFFER_URL = config("TRACKING_BUFFER_URL", default="redis://localhost:6379/2")
+TRACKING_BUFFER_MAX_SIZE = config("TRACKING_BUFFER_MAX_SIZE", default=100000, cast=int)
+TRACKING_FLUSH_BATCH_SIZE = config("TRACKING_FLUSH_BATCH_SIZE", default=5000, cast=int)
+TRACKING_FLUSH_INTERVAL = config("TRACKING_FLUSH_INTERVAL", default=1.0, cast=float)
+
 # ==============================
 # LOGGING
 # ==============================